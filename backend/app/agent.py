@@ -0,0 +1,118 @@
+"""Headless SysMon agent - collects local stats and pushes them to a hub.
+
+Run on every monitored host:
+
+    SYSMON_HUB_URL=http://hub:8000 python -m app.agent
+
+Samples are buffered and sent in batches over a keep-alive HTTP session.
+When the hub is unreachable they stay in a bounded retry buffer (oldest
+dropped first) and are delivered once it is back.
+"""
+import os
+import socket
+import time
+from collections import deque
+from typing import List, Optional
+
+import requests
+
+from app.services.history import numeric_fields, to_epoch
+from app.services.nodes import slugify_node_name
+from app.services.system_monitor import SystemMonitor
+
+# Hub base URL and this node's name (letters, digits, '.', '_' and '-'; others become '-')
+SYSMON_HUB_URL = os.environ.get('SYSMON_HUB_URL', 'http://localhost:8000')
+SYSMON_NODE_NAME = os.environ.get('SYSMON_NODE_NAME', socket.gethostname())
+# Shared secret sent as a bearer token (must match the hub's HUB_TOKEN)
+HUB_TOKEN = os.environ.get('HUB_TOKEN', '')
+# Seconds between samples, samples per batch, and samples kept while the hub is down
+AGENT_INTERVAL = float(os.environ.get('AGENT_INTERVAL', '2'))
+AGENT_BATCH_SIZE = int(os.environ.get('AGENT_BATCH_SIZE', '5'))
+AGENT_BUFFER_SIZE = int(os.environ.get('AGENT_BUFFER_SIZE', '1800'))
+AGENT_TIMEOUT = float(os.environ.get('AGENT_TIMEOUT', '5'))
+
+# Largest batch sent at once when draining a backlog
+MAX_BATCH = 500
+
+
+class Agent:
+    """Sample the local host and push batches to a SysMon hub."""
+
+    def __init__(self, hub_url: str = SYSMON_HUB_URL, node: str = SYSMON_NODE_NAME,
+                 interval: float = AGENT_INTERVAL, batch_size: int = AGENT_BATCH_SIZE,
+                 buffer_size: int = AGENT_BUFFER_SIZE, token: str = HUB_TOKEN,
+                 monitor: Optional[SystemMonitor] = None,
+                 session: Optional[requests.Session] = None):
+        # The name is a path segment; the hub rejects names that need escaping
+        slug = slugify_node_name(node)
+        if slug != node:
+            print(f"⚠ Node name '{node}' is not URL-safe, reporting as '{slug}'")
+        self.url = f"{hub_url.rstrip('/')}/api/nodes/{slug}/samples"
+        self.node = slug
+        self.interval = interval
+        self.batch_size = batch_size
+        self.monitor = monitor
+        self.fields = numeric_fields()
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.session = session or requests.Session()  # Keep-alive connection to the hub
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.sent = 0
+        self.failures = 0
+        self._retry_at = 0.0
+        self._max_backoff = 60.0
+
+    def sample(self):
+        """Collect one sample into the send buffer."""
+        stats = self.monitor.get_stats()
+        self.buffer.append([to_epoch(stats.timestamp), *(float(getattr(stats, f)) for f in self.fields)])
+
+    def send(self):
+        """Send buffered samples; they are removed only once the hub accepted them."""
+        while self.buffer:
+            batch: List[List[float]] = [self.buffer[i] for i in range(min(len(self.buffer), MAX_BATCH))]
+            response = self.session.post(
+                self.url, json={"fields": self.fields, "samples": batch}, timeout=AGENT_TIMEOUT
+            )
+            response.raise_for_status()
+            for _ in batch:
+                self.buffer.popleft()
+            self.sent += len(batch)
+
+    def tick(self, now: float):
+        """Sample, then send if a batch is ready and no retry backoff is pending."""
+        self.sample()
+        if len(self.buffer) < self.batch_size or now < self._retry_at:
+            return
+        try:
+            self.send()
+            self.failures = 0
+        except Exception as e:
+            self.failures += 1
+            delay = min(self._max_backoff, self.interval * 2 ** self.failures)
+            self._retry_at = now + delay
+            print(f"⚠ Hub unreachable ({e}), {len(self.buffer)} sample(s) buffered, retrying in {delay:.0f}s")
+
+    def run(self):
+        """Sample every interval until interrupted."""
+        print(f"🚀 SysMon agent '{self.node}' reporting to {self.url}")
+        if self.monitor is None:
+            self.monitor = SystemMonitor()
+        self.monitor.start_container_watch()
+        try:
+            while True:
+                started = time.monotonic()
+                self.tick(started)
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.monitor.stop_container_watch()
+            try:
+                self.send()
+            except Exception:
+                pass
+
+
+if __name__ == "__main__":
+    Agent().run()
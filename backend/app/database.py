@@ -1,24 +1,80 @@
 """Database initialization and session management."""
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, create_engine, Session, select
-from app.models import Tamagotchi
+from app.models import Tamagotchi, StatsSample  # noqa: F401 - register tables
+
+T = TypeVar("T")
 
 
 # Database URL from environment or default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/sysmon.db")
+# Milliseconds a SQLite connection waits for a lock before failing
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))
+# Connection pool size (also the number of database worker threads)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def create_db_engine(database_url: str = DATABASE_URL, pool_size: int = DB_POOL_SIZE,
+                     busy_timeout: int = DB_BUSY_TIMEOUT) -> Engine:
+    """Create an engine tuned for the backend in database_url.
+
+    SQLite connections run in WAL mode with synchronous=NORMAL, so commits
+    append to the WAL without an fsync (durability is kept up to the last
+    checkpoint), and wait up to busy_timeout ms for locks instead of failing.
+    In-memory databases share one connection; other URLs get a pre-pinged
+    connection pool.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, echo=False, pool_size=pool_size, pool_pre_ping=True)
+
+    connect_args = {"check_same_thread": False, "timeout": busy_timeout / 1000}
+    if _is_memory_sqlite(url):
+        engine = create_engine(url, echo=False, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        engine = create_engine(url, echo=False, connect_args=connect_args,
+                               pool_size=pool_size, max_overflow=0)
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        cursor.close()
+
+    return engine
+
 
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Set to True for SQL query logging
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_db_engine()
+
+# Blocking database work runs here, off the event loop; one thread per pooled connection
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+
+async def run_in_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call on the database executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
 
 
 def init_db():
     """Initialize database tables."""
     SQLModel.metadata.create_all(engine)
-    
+
     # Create default Tamagotchi if none exists
     with Session(engine) as session:
         tamagotchi = session.exec(select(Tamagotchi)).first()
@@ -1,19 +1,36 @@
 """FastAPI main application - serves API and static Svelte frontend."""
 import asyncio
+import json
 import os
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+import psutil
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
 from sqlmodel import Session, select
 
-from app.database import init_db, get_session, engine
-from app.models import Tamagotchi, SystemStats
+from app.database import init_db, get_session, engine, run_in_db
+from app.models import NodeSampleBatch, Tamagotchi, SystemStats
+from app.services import tamagotchi_actions
+from app.services.alerts import ALERT_WEBHOOK_URL, AlertDispatcher, AnomalyDetector, WebhookNotifier
+from app.services.collectors import CollectorScheduler
+from app.services.container_stats import CONTAINER_STATS_TIMEOUT
+from app.services.encoding import JSONBytesResponse
+from app.services.history import MetricsHistory
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsExporter
+from app.services.nodes import NodeRegistry, is_valid_node_name
+from app.services.snapshot import StatsSnapshot
+from app.services.static_files import StaticIndex
+from app.services.stats_store import StatsWriter, query_samples, run_compaction
+from app.services.tamagotchi_state import TamagotchiState
+from app.services.timings import timings
 from app.services.system_monitor import SystemMonitor
-from app.websocket.manager import ConnectionManager
+from app.websocket.manager import ConnectionManager, DEFAULT_TOPICS
+from app.websocket.protocol import normalize_topics
+from app.websocket.sse import EventStreamResponse
 
 # Read version from VERSION file (check multiple locations for dev vs container)
 VERSION_FILE_LOCATIONS = [
@@ -26,58 +43,118 @@ for version_file in VERSION_FILE_LOCATIONS:
         VERSION = version_file.read_text().strip()
         break
 
+# Per-container stats refresh interval, and whether to include them in WebSocket updates
+CONTAINER_STATS_INTERVAL = float(os.environ.get('CONTAINER_STATS_INTERVAL', '2'))
+CONTAINER_STATS_BROADCAST = os.environ.get('CONTAINER_STATS_BROADCAST', 'false').lower() in ('1', 'true', 'yes')
+
+# Shared secret agents must send to push samples (empty: no authentication)
+HUB_TOKEN = os.environ.get('HUB_TOKEN', '')
+
+# Collection tick (seconds); WebSocket clients choose update intervals in whole ticks
+BROADCAST_TICK = 1
+
+# Seconds from process start to serving requests above which startup is reported as slow
+STARTUP_TARGET = float(os.environ.get('STARTUP_TARGET', '2'))
+PROCESS_STARTED = psutil.Process().create_time()
+
 # Initialize components
 monitor = SystemMonitor()
-manager = ConnectionManager()
+manager = ConnectionManager(
+    default_topics=DEFAULT_TOPICS | ({"containers"} if CONTAINER_STATS_BROADCAST else set())
+)
+collector_scheduler = CollectorScheduler(monitor.collectors)
+snapshot = StatsSnapshot(lambda: monitor.get_stats())
+container_snapshot = StatsSnapshot(
+    lambda: monitor.get_container_stats(),
+    max_age=CONTAINER_STATS_INTERVAL + CONTAINER_STATS_TIMEOUT
+)
+history = MetricsHistory()
+stats_writer = StatsWriter(engine)
+tamagotchi_state = TamagotchiState(engine)
+nodes = NodeRegistry()
+metrics_exporter = MetricsExporter()
+detector = AnomalyDetector()
+alert_dispatcher = AlertDispatcher([WebhookNotifier(ALERT_WEBHOOK_URL)] if ALERT_WEBHOOK_URL else [])
+frontend = StaticIndex(Path(__file__).parent.parent / "frontend" / "dist")
 
 
 # Background task for broadcasting stats
 async def broadcast_system_stats():
-    """Background task: collect and broadcast stats every 2 seconds."""
+    """Background task: collect stats every tick and publish them to subscribers.
+
+    Collection runs every BROADCAST_TICK seconds; each WebSocket subscription
+    group is sent an update on the ticks matching its own interval.
+    """
     print("✓ Started background stats broadcaster")
+    tick = 0
     
     while True:
+        started = time.perf_counter()
         try:
-            # Collect system stats in thread pool (get_stats blocks for 1 second)
-            stats = await asyncio.to_thread(monitor.get_stats)
+            # Merge the latest result of every collector (each runs on its own
+            # schedule) and publish it as the shared snapshot for REST readers
+            stats = collector_scheduler.stats()
+            if stats is None:
+                # Collectors still warming up - collect everything once
+                stats = await snapshot.refresh()
+            else:
+                snapshot.publish(stats)
+            history.append(stats)
+            stats_writer.add(stats)
+            
+            # Anomaly detection runs on every sample; only alerts that fired or
+            # resolved are sent to clients and notifiers
+            with timings.time("alerts.detect"):
+                alerts = detector.observe(stats)
+            if alerts:
+                alert_dispatcher.submit(alerts)
+                await manager.broadcast({"type": "alert", "alerts": alerts})
+            
             health_score = monitor.get_health_score(stats)
             
-            # Update Tamagotchi health in database
-            with Session(engine) as session:
-                tamagotchi = session.exec(select(Tamagotchi)).first()
-                if tamagotchi:
-                    tamagotchi.health = health_score
-                    session.add(tamagotchi)
-                    session.commit()
-                    session.refresh(tamagotchi)
-                    
-                    # Broadcast to all connected clients
-                    # Convert stats to dict with ISO timestamp
-                    stats_dict = stats.model_dump()
-                    stats_dict["timestamp"] = stats.timestamp.isoformat()
-                    
-                    message = {
-                        "type": "stats_update",
-                        "stats": stats_dict,
-                        "tamagotchi": {
-                            "name": tamagotchi.name,
-                            "level": tamagotchi.level,
-                            "xp": tamagotchi.xp,
-                            "health": tamagotchi.health,
-                            "happiness": tamagotchi.happiness
-                        }
-                    }
-                    
-                    conn_count = manager.get_connection_count()
-                    if conn_count > 0:
-                        print(f"📡 Broadcasting to {conn_count} client(s)...")
-                        await manager.broadcast(message)
+            # Update Tamagotchi health in memory (flushed to the database in the background)
+            tamagotchi_state.set_health(health_score)
+            
+            # The encoder writes the timestamp as ISO 8601 itself
+            sections = {
+                "stats": stats.model_dump(),
+                "tamagotchi": tamagotchi_state.public()
+            }
+            
+            # Only add optional sections somebody subscribed to; models are
+            # encoded as they are, and only when they changed since the last tick
+            if "containers" in manager.subscribed_topics() and container_snapshot.latest is not None:
+                sections["containers"] = container_snapshot.latest
+            if "nodes" in manager.subscribed_topics() and nodes.nodes:
+                sections["nodes"] = nodes.summary()
+            processes = collector_scheduler.values.get("processes")
+            if "processes" in manager.subscribed_topics() and processes is not None:
+                sections["processes"] = processes
+            
+            conn_count = manager.get_connection_count()
+            if conn_count > 0:
+                print(f"📡 Broadcasting to {conn_count} client(s)...")
+                # Same bytes /api/stats serves for this snapshot - encoded once
+                await manager.publish(sections, tick, encoded={"stats": snapshot.encode(stats)})
             
+            timings.observe("broadcast.tick", time.perf_counter() - started)
         except Exception as e:
             print(f"⚠ Error in broadcast loop: {e}")
         
-        # Wait 2 seconds before next broadcast
-        await asyncio.sleep(2)
+        tick += BROADCAST_TICK
+        await asyncio.sleep(BROADCAST_TICK)
+
+
+async def collect_container_stats():
+    """Background task: refresh per-container stats on their own cadence."""
+    print("✓ Started container stats collector")
+    
+    while True:
+        try:
+            await container_snapshot.refresh()
+        except Exception as e:
+            print(f"⚠ Error collecting container stats: {e}")
+        await asyncio.sleep(CONTAINER_STATS_INTERVAL)
 
 
 @asynccontextmanager
@@ -96,14 +173,48 @@ async def lifespan(app: FastAPI):
             session.commit()
             print("✓ Created initial Tamagotchi")
     
-    # Start background stats broadcaster
-    task = asyncio.create_task(broadcast_system_stats())
+    # Live Tamagotchi state is kept in memory and written back in the background
+    tamagotchi_state.load()
+    
+    # Read and hash the built frontend once; compression happens after startup
+    if frontend.root.exists():
+        await asyncio.to_thread(frontend.load)
+    
+    # Connect to Docker in the background; follow its events instead of listing
+    # containers every tick once connected
+    monitor.docker.get()
+    monitor.start_container_watch()
+    collector_scheduler.start()
+    
+    # Start background stats broadcaster, history writer and compaction
+    tasks = [
+        asyncio.create_task(broadcast_system_stats()),
+        asyncio.create_task(stats_writer.run()),
+        asyncio.create_task(run_compaction(engine)),
+        asyncio.create_task(tamagotchi_state.run()),
+        asyncio.create_task(collect_container_stats()),
+        asyncio.create_task(alert_dispatcher.run()),
+    ]
+    if frontend.files:
+        # Served uncompressed (or from the build's .gz/.br files) until this finishes
+        tasks.append(asyncio.create_task(asyncio.to_thread(frontend.compress)))
+    
+    app.state.startup_seconds = round(time.time() - PROCESS_STARTED, 3)
+    if app.state.startup_seconds > STARTUP_TARGET:
+        print(f"⚠ Startup took {app.state.startup_seconds:.2f}s (target {STARTUP_TARGET:.0f}s)")
+    else:
+        print(f"✓ Ready in {app.state.startup_seconds:.2f}s")
     
     yield
     
     # Shutdown
     print("🛑 Shutting down SysMon...")
-    task.cancel()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await collector_scheduler.stop()
+    await manager.shutdown()
+    monitor.stop_container_watch()
 
 
 # Create FastAPI app
@@ -123,20 +234,190 @@ async def health_check():
         "status": "healthy", 
         "service": "SysMon",
         "version": VERSION,
-        "docker_available": monitor.docker_available
+        "docker_available": monitor.docker_available,
+        "docker": monitor.docker.status(),
+        "startup_seconds": getattr(app.state, "startup_seconds", None)
     }
 
 
 @app.get("/api/stats")
 async def get_stats():
-    """Get current system stats."""
-    stats = monitor.get_stats()
-    return stats.model_dump()
+    """Get current system stats (cached snapshot from the background collector)."""
+    stats = await snapshot.get()
+    return JSONBytesResponse(snapshot.encode(stats))
 
 
-@app.get("/api/tamagotchi")
-async def get_tamagotchi(session: Annotated[Session, Depends(get_session)]):
-    """Get Tamagotchi state."""
+@app.get("/api/stats/history")
+async def get_stats_history(
+    start: Annotated[Optional[float], Query(alias="from")] = None,
+    end: Annotated[Optional[float], Query(alias="to")] = None,
+    resolution: str = "auto"
+):
+    """Get metrics history between two Unix timestamps (default: last hour).
+
+    resolution is one of the history tiers (raw, 1m, 15m) or "auto" to pick
+    the finest tier that still covers the requested range.
+    """
+    return JSONBytesResponse(query_history(history, start, end, resolution))
+
+
+def query_history(source: MetricsHistory, start: Optional[float], end: Optional[float],
+                  resolution: str) -> dict:
+    """Validate history query parameters and run the query (default: last hour)."""
+    now = time.time()
+    end = now if end is None else end
+    start = end - 3600 if start is None else start
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    if resolution == "auto":
+        resolution = source.pick_resolution(start, now)
+    elif resolution not in source.tiers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown resolution '{resolution}', expected one of: auto, {', '.join(source.tiers)}"
+        )
+    return source.query(start, end, resolution)
+
+
+@app.get("/api/stats/archive")
+async def get_stats_archive(
+    start: Annotated[Optional[float], Query(alias="from")] = None,
+    end: Annotated[Optional[float], Query(alias="to")] = None,
+    step: Annotated[Optional[int], Query(ge=1)] = None
+):
+    """Get persisted metrics history between two Unix timestamps (default: last day).
+
+    Points are averaged into step-second buckets; without a step, one is chosen
+    so that at most 1000 points are returned.
+    """
+    end = time.time() if end is None else end
+    start = end - 86400 if start is None else start
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return JSONBytesResponse(await run_in_db(query_samples, engine, start, end, step))
+
+
+def internal_counters():
+    """SysMon's own counters and gauges for /metrics: (name, type, help, value)."""
+    now = time.time()
+    counters = [
+        ("sysmon_collections_total", "counter", "Collector runs.", monitor.collectors.runs()),
+        ("sysmon_docker_connected", "gauge", "Whether the Docker API is connected.", int(monitor.docker.connected)),
+        ("sysmon_websocket_connections", "gauge", "Connected WebSocket clients.", manager.get_connection_count()),
+        ("sysmon_websocket_dropped_messages_total", "counter",
+         "Messages dropped for slow WebSocket clients.", manager.dropped_messages()),
+        ("sysmon_history_rows_written_total", "counter", "Stats samples persisted.", stats_writer.rows_written),
+        ("sysmon_history_pending_rows", "gauge", "Stats samples waiting to be persisted.", stats_writer.pending()),
+        ("sysmon_tamagotchi_flushes_total", "counter", "Tamagotchi state writes.", tamagotchi_state.flushes),
+        ("sysmon_alerts_firing", "gauge", "Alerts currently firing.", len(detector.active)),
+        ("sysmon_alert_notifications_failed_total", "counter",
+         "Alert batches a notifier failed to deliver.", alert_dispatcher.failures),
+        ("sysmon_nodes", "gauge", "Agents known to this hub.", len(nodes.nodes)),
+        ("sysmon_nodes_online", "gauge", "Agents that reported recently.",
+         sum(nodes.is_online(state, now) for state in nodes.nodes.values())),
+    ]
+    startup_seconds = getattr(app.state, "startup_seconds", None)
+    if startup_seconds is not None:
+        counters.append(("sysmon_startup_seconds", "gauge", "Seconds from process start to serving requests.",
+                         startup_seconds))
+    return counters
+
+
+@app.get("/api/internal/timings")
+async def get_timings():
+    """Latency of SysMon's own pipeline stages (collectors, database, WebSocket).
+
+    Each stage reports its sample count, mean, max and p50/p95/p99 in
+    milliseconds, estimated from fixed-bucket histograms.
+    """
+    return timings.report()
+
+
+@app.get("/api/internal/collectors")
+async def get_collectors():
+    """Schedule, run counts and result age of every registered collector."""
+    return collector_scheduler.status()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics from the latest collected snapshot (never collects)."""
+    content = metrics_exporter.render(
+        snapshot.latest,
+        container_snapshot.latest,
+        tamagotchi_state.public(),
+        internal_counters(),
+    )
+    return Response(content=content, media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/alerts")
+async def get_alerts():
+    """Alerts currently firing (threshold, anomaly and forecast rules)."""
+    return JSONBytesResponse({"alerts": detector.active_alerts()})
+
+
+@app.get("/api/containers")
+async def get_containers():
+    """Get resource usage of every running container."""
+    containers = await container_snapshot.get()
+    return JSONBytesResponse({"containers": containers})
+
+
+@app.get("/api/processes")
+async def get_processes(sort: str = "cpu", limit: Annotated[int, Query(ge=1)] = 10):
+    """Top processes by CPU or memory, from the latest process collection."""
+    if sort not in ("cpu", "memory"):
+        raise HTTPException(status_code=400, detail="sort must be 'cpu' or 'memory'")
+    # Before the first scheduled run completes, collect (or join the running collection) now
+    await collector_scheduler.collect_now(monitor.collectors.collectors["processes"])
+    processes = collector_scheduler.values.get("processes")
+    if processes is None:
+        raise HTTPException(status_code=503, detail="Process table unavailable")
+    return JSONBytesResponse({"sort": sort, "processes": processes[sort][:limit]})
+
+
+@app.post("/api/nodes/{node}/samples")
+async def ingest_node_samples(
+    node: str,
+    batch: NodeSampleBatch,
+    authorization: Annotated[Optional[str], Header()] = None
+):
+    """Receive a batch of samples from a remote agent (see app/agent.py)."""
+    if HUB_TOKEN and authorization != f"Bearer {HUB_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid hub token")
+    if not is_valid_node_name(node):
+        raise HTTPException(status_code=422, detail=f"Invalid node name '{node}' "
+                                                    "(letters, digits, '.', '_' and '-' only)")
+    try:
+        accepted = nodes.ingest(node, batch.fields, batch.samples)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"node": node, "accepted": accepted}
+
+
+@app.get("/api/nodes")
+async def get_nodes():
+    """List nodes reporting to this hub with their latest metrics."""
+    return JSONBytesResponse(nodes.describe())
+
+
+@app.get("/api/nodes/{node}/history")
+async def get_node_history(
+    node: str,
+    start: Annotated[Optional[float], Query(alias="from")] = None,
+    end: Annotated[Optional[float], Query(alias="to")] = None,
+    resolution: str = "auto"
+):
+    """Get one node's metrics history (same parameters as /api/stats/history)."""
+    state = nodes.nodes.get(node)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown node '{node}'")
+    return JSONBytesResponse(query_history(state.history, start, end, resolution))
+
+
+def _load_tamagotchi(session: Session) -> Tamagotchi:
     tamagotchi = session.exec(select(Tamagotchi)).first()
     if not tamagotchi:
         tamagotchi = Tamagotchi()
@@ -146,52 +427,64 @@ async def get_tamagotchi(session: Annotated[Session, Depends(get_session)]):
     return tamagotchi
 
 
+# Database calls run on the database executor so they never block the event loop;
+# the rows they return are mirrored into tamagotchi_state back on the loop
+@app.get("/api/tamagotchi")
+async def get_tamagotchi(session: Annotated[Session, Depends(get_session)]):
+    """Get Tamagotchi state."""
+    tamagotchi = await run_in_db(_load_tamagotchi, session)
+    if not tamagotchi_state.loaded:
+        tamagotchi_state.apply(tamagotchi)
+    elif tamagotchi.id == tamagotchi_state.id:
+        # Health lives in memory between flushes
+        tamagotchi.health = tamagotchi_state.health
+    return JSONBytesResponse(tamagotchi)
+
+
 @app.post("/api/tamagotchi/rename")
 async def rename_tamagotchi(
     name: str,
     session: Annotated[Session, Depends(get_session)]
 ):
     """Rename the Tamagotchi."""
-    tamagotchi = session.exec(select(Tamagotchi)).first()
-    if not tamagotchi:
-        tamagotchi = Tamagotchi(name=name)
-        session.add(tamagotchi)
-        session.commit()
-        session.refresh(tamagotchi)
-        return tamagotchi
-    
-    tamagotchi.name = name
-    session.add(tamagotchi)
-    session.commit()
-    session.refresh(tamagotchi)
-    return tamagotchi
+    tamagotchi = await run_in_db(tamagotchi_actions.rename, session, name)
+    tamagotchi_state.apply(tamagotchi)
+    return JSONBytesResponse(tamagotchi)
 
 
 @app.post("/api/tamagotchi/feed")
 async def feed_tamagotchi(session: Annotated[Session, Depends(get_session)]):
     """Feed the Tamagotchi (gain XP)."""
-    tamagotchi = session.exec(select(Tamagotchi)).first()
+    tamagotchi = await run_in_db(tamagotchi_actions.feed, session)
     if tamagotchi:
-        tamagotchi.xp += 10
-        tamagotchi.happiness = min(100, tamagotchi.happiness + 5)
-        
-        # Level up every 100 XP
-        if tamagotchi.xp >= tamagotchi.level * 100:
-            tamagotchi.level += 1
-            tamagotchi.xp = 0
-        
-        session.add(tamagotchi)
-        session.commit()
-        session.refresh(tamagotchi)
-        return tamagotchi
+        tamagotchi_state.apply(tamagotchi)
+        return JSONBytesResponse(tamagotchi)
     return {"error": "Tamagotchi not found"}
 
 
+def parse_client_message(data: str) -> dict:
+    """Decode a JSON command from a WebSocket client ({} if not a command)."""
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return {}
+    return message if isinstance(message, dict) else {}
+
+
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time stats updates."""
-    await manager.connect(websocket)
+    """WebSocket endpoint for real-time stats updates.
+
+    Connect with ?protocol=delta to receive stats_delta messages containing
+    only changed fields between periodic full stats_update keyframes. Such
+    clients can send {"type": "resync"} to request a keyframe.
+    
+    Send {"type": "subscribe", "topics": [...], "interval": seconds} to choose
+    which metric groups (host, docker, tamagotchi, containers, nodes,
+    processes) to receive and how often.
+    """
+    await manager.connect(websocket, delta=websocket.query_params.get("protocol") == "delta")
     
     try:
         # Keep connection alive - broadcast loop will send data
@@ -199,6 +492,24 @@ async def websocket_endpoint(websocket: WebSocket):
             try:
                 # Wait for client messages with a timeout
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+                command = parse_client_message(data)
+                if command.get("type") == "resync":
+                    manager.request_keyframe(websocket)
+                    continue
+                if command.get("type") == "subscribe":
+                    topics, unknown = normalize_topics(command.get("topics") or [])
+                    try:
+                        interval = float(command.get("interval", manager.default_interval))
+                    except (TypeError, ValueError):
+                        interval = manager.default_interval
+                    topics, interval = manager.subscribe(websocket, topics, interval)
+                    await manager.send_personal_message(json.dumps({
+                        "type": "subscribed",
+                        "topics": sorted(topics),
+                        "interval": interval,
+                        "unknown_topics": unknown
+                    }), websocket)
+                    continue
                 # Echo back for testing
                 await manager.send_personal_message(f"Message received: {data}", websocket)
             except asyncio.TimeoutError:
@@ -212,24 +523,45 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-# Serve static frontend files (built Svelte app)
-# Mount static files after API routes
-static_dir = Path(__file__).parent.parent / "frontend" / "dist"
+@app.get("/api/stream")
+async def stream_endpoint(
+    protocol: str = "",
+    topics: Optional[str] = None,
+    interval: Optional[float] = None,
+    last_event_id: Annotated[Optional[str], Header()] = None
+):
+    """Server-Sent Events fallback for /ws (for proxies that break WebSockets).
 
-if static_dir.exists():
-    app.mount("/assets", StaticFiles(directory=static_dir / "assets"), name="assets")
-    
+    Sends the same messages as /ws, each as an SSE event with the update's
+    sequence number as its id. Choose topics (comma-separated) and interval
+    in the query string, and protocol=delta for stats_delta messages. A
+    reconnecting browser sends Last-Event-ID and resumes where it left off.
+    """
+    key = None
+    if topics is not None or interval is not None:
+        known, _ = normalize_topics(topics.split(",") if topics is not None else manager.default_topics)
+        key = manager.group_key(known, manager.default_interval if interval is None else interval)
+    try:
+        resume = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume = None
+    return EventStreamResponse(manager, key, delta=protocol == "delta", last_event_id=resume)
+
+
+# Serve static frontend files (built Svelte app)
+# Routes after the API routes; files are indexed and precompressed at startup
+if frontend.root.exists():
     @app.get("/{full_path:path}")
-    async def serve_frontend(full_path: str):
-        """Serve Svelte frontend."""
-        # Try to serve the requested file
-        file_path = static_dir / full_path
-        
-        if file_path.is_file():
-            return FileResponse(file_path)
-        
-        # Otherwise serve index.html (SPA fallback)
-        return FileResponse(static_dir / "index.html")
+    async def serve_frontend(
+        full_path: str,
+        accept_encoding: Annotated[str, Header()] = "",
+        if_none_match: Annotated[str, Header()] = ""
+    ):
+        """Serve Svelte frontend (index.html for unknown paths - SPA routing)."""
+        static_file = frontend.lookup(full_path)
+        if static_file is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return static_file.response(accept_encoding, if_none_match)
 else:
     print("⚠ Frontend dist/ directory not found. Run: cd frontend && npm run build")
     
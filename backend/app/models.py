@@ -1,7 +1,8 @@
 """Database models for SysMon Tamagotchi."""
 from __future__ import annotations  # PEP 563 - deferred annotations for Python 3.14 compatibility
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -18,6 +19,17 @@ class Tamagotchi(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class DiskUsage(SQLModel):
+    """Usage of one monitored mountpoint (not stored, just for API response)."""
+    
+    path: str
+    percent: float
+    used_gb: float
+    total_gb: float
+    stale: bool = False  # Last check timed out or failed; values are the last known
+    age: Optional[float] = None  # Seconds since the values were read, when stale
+
+
 class SystemStats(SQLModel):
     """System statistics snapshot (not stored, just for API response)."""
     
@@ -32,3 +44,88 @@ class SystemStats(SQLModel):
     docker_containers_total: int
     docker_containers_running: int
     docker_containers_stopped: int
+    # Rates from counter deltas (not persisted in stats_sample)
+    load_1: float = 0.0
+    load_5: float = 0.0
+    load_15: float = 0.0
+    net_rx_bytes_per_sec: float = 0.0
+    net_tx_bytes_per_sec: float = 0.0
+    disk_read_bytes_per_sec: float = 0.0
+    disk_write_bytes_per_sec: float = 0.0
+    disk_read_iops: float = 0.0
+    disk_write_iops: float = 0.0
+    cpu_per_core: List[float] = Field(default_factory=list)
+    disks: List[DiskUsage] = Field(default_factory=list)  # Primary disk first
+
+
+class StatsSample(SQLModel, table=True):
+    """Persisted SystemStats sample (resolution 0) or rollup of older samples."""
+    
+    __tablename__ = "stats_sample"
+    __table_args__ = (Index("ix_stats_sample_resolution_ts", "resolution", "ts"),)
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ts: float = Field(index=True)  # Unix epoch seconds (bucket start for rollups)
+    resolution: int = Field(default=0)  # 0 = raw sample, otherwise rollup step in seconds
+    samples: int = Field(default=1)  # Number of raw samples folded into this row
+    cpu_percent: float
+    memory_percent: float
+    memory_used_gb: float
+    memory_total_gb: float
+    disk_percent: float
+    disk_used_gb: float
+    disk_total_gb: float
+    docker_containers_total: float
+    docker_containers_running: float
+    docker_containers_stopped: float
+
+
+class ContainerStats(SQLModel):
+    """Resource usage of one running container (not stored, just for API response)."""
+    
+    id: str
+    name: str
+    cpu_percent: float
+    memory_used_mb: float
+    memory_limit_mb: float
+    memory_percent: float
+    net_rx_bytes: int
+    net_tx_bytes: int
+    block_read_bytes: int
+    block_write_bytes: int
+    stale: bool = False  # Stats request still running from an earlier cycle; values are the last known
+
+
+class ProcessInfo(SQLModel):
+    """One row of the top-N process table (not stored, just for API response)."""
+    
+    pid: int
+    name: str
+    username: str
+    cpu_percent: float  # Of one core, like top (can exceed 100)
+    memory_rss_mb: float
+    memory_percent: float
+
+
+class NodeSampleBatch(SQLModel):
+    """Batch of samples pushed by a remote agent (not stored as-is).
+
+    Each sample is [timestamp, *values] with values in the order of fields.
+    """
+    
+    fields: List[str]
+    samples: List[List[float]]
+
+
+class AlertEvent(SQLModel):
+    """An alert firing or resolving (not stored, sent over WebSocket and to notifiers)."""
+    
+    id: str  # Stable per condition, e.g. "cpu_percent.threshold" or "disk_full:/mnt/user"
+    kind: str  # threshold, anomaly or forecast
+    state: str  # firing or resolved
+    severity: str  # warning or critical
+    metric: str
+    value: float
+    message: str
+    started_at: datetime  # When the alert fired
+    timestamp: datetime  # Sample that caused this event
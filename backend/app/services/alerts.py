@@ -0,0 +1,338 @@
+"""Streaming anomaly detection on collected stats, and alert notifiers.
+
+Every collected sample goes through AnomalyDetector.observe, which keeps a
+few floats of state per metric (an exponentially weighted mean and
+variance, a smoothed rate of change) so each sample costs O(1) time and
+memory per metric, however long SysMon runs. Three kinds of rules are
+checked:
+
+- threshold: a value above a fixed limit, clearing only once it has dropped
+  ALERT_HYSTERESIS points below it, so a value hovering at the limit does
+  not flap
+- anomaly: a value more than ALERT_ZSCORE standard deviations away from its
+  recent baseline (spikes, sudden drops, a sustained step change)
+- forecast: memory or a disk filling up at a rate that reaches 100% within
+  ALERT_FORECAST_HOURS
+
+Only state changes are emitted (firing, then resolved), and a condition
+that fires again within ALERT_COOLDOWN seconds of its last notification
+stays silent.
+"""
+import asyncio
+import math
+from abc import ABC, abstractmethod
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+import requests
+
+from app.models import AlertEvent, SystemStats
+from app.services.encoding import dumps
+from app.services.history import to_epoch
+
+# Fixed thresholds (percent); an alert clears ALERT_HYSTERESIS points below its threshold
+ALERT_CPU_PERCENT = float(os.environ.get('ALERT_CPU_PERCENT', '90'))
+ALERT_MEMORY_PERCENT = float(os.environ.get('ALERT_MEMORY_PERCENT', '90'))
+ALERT_DISK_PERCENT = float(os.environ.get('ALERT_DISK_PERCENT', '90'))
+ALERT_HYSTERESIS = float(os.environ.get('ALERT_HYSTERESIS', '5'))
+# Anomalies: z-score against an exponentially weighted baseline that fires / clears an alert
+ALERT_ZSCORE = float(os.environ.get('ALERT_ZSCORE', '4'))
+ALERT_ZSCORE_CLEAR = float(os.environ.get('ALERT_ZSCORE_CLEAR', '2'))
+# Baseline smoothing factor (weight of each new sample) and samples seen before it is trusted
+ALERT_EWMA_ALPHA = float(os.environ.get('ALERT_EWMA_ALPHA', '0.02'))
+ALERT_WARMUP = int(os.environ.get('ALERT_WARMUP', '120'))
+# Warn when memory or a disk is forecast to be full within this many hours
+ALERT_FORECAST_HOURS = float(os.environ.get('ALERT_FORECAST_HOURS', '24'))
+# Seconds after a notification during which the same alert firing again stays silent
+ALERT_COOLDOWN = float(os.environ.get('ALERT_COOLDOWN', '300'))
+# Webhook receiving alert events as JSON (empty: no webhook)
+ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL', '')
+ALERT_WEBHOOK_TIMEOUT = float(os.environ.get('ALERT_WEBHOOK_TIMEOUT', '5'))
+
+# Metrics watched for anomalies, with the smallest deviation (in their unit) treated
+# as one standard deviation - a flat baseline would otherwise make any change an anomaly
+ANOMALY_METRICS = {
+    "cpu_percent": 5.0,
+    "memory_percent": 2.0,
+    "load_1": 0.5,
+    "net_rx_bytes_per_sec": 1024.0 * 1024,
+    "net_tx_bytes_per_sec": 1024.0 * 1024,
+    "disk_read_bytes_per_sec": 4 * 1024.0 * 1024,
+    "disk_write_bytes_per_sec": 4 * 1024.0 * 1024,
+}
+LABELS = {
+    "cpu_percent": "CPU",
+    "memory_percent": "Memory",
+    "load_1": "Load average",
+    "net_rx_bytes_per_sec": "Network receive rate",
+    "net_tx_bytes_per_sec": "Network transmit rate",
+    "disk_read_bytes_per_sec": "Disk read rate",
+    "disk_write_bytes_per_sec": "Disk write rate",
+}
+
+# Seconds between the points a growth rate is measured over, and its smoothing factor
+TREND_SPAN = 60.0
+TREND_ALPHA = 0.2
+# Rate measurements needed before a forecast is made
+TREND_WARMUP = 3
+
+
+class Ewma:
+    """Exponentially weighted mean and variance of a stream, O(1) per sample."""
+
+    __slots__ = ("alpha", "warmup", "min_std", "mean", "var", "count")
+
+    def __init__(self, alpha: float = ALERT_EWMA_ALPHA, warmup: int = ALERT_WARMUP, min_std: float = 0.0):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.min_std = min_std
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, value: float) -> Optional[float]:
+        """Add a sample; returns its z-score against the baseline before it (None while warming up)."""
+        if self.count == 0:
+            self.mean, self.count = value, 1
+            return None
+        diff = value - self.mean
+        z = diff / max(math.sqrt(self.var), self.min_std, 1e-9) if self.count >= self.warmup else None
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+        return z
+
+
+class Trend:
+    """Smoothed rate of change of a slowly moving value, for time-to-full forecasts.
+
+    The rate is measured between points at least span seconds apart (so
+    sampling noise averages out) and smoothed across measurements.
+    """
+
+    __slots__ = ("span", "alpha", "rate", "count", "_time", "_value")
+
+    def __init__(self, span: float = TREND_SPAN, alpha: float = TREND_ALPHA):
+        self.span = span
+        self.alpha = alpha
+        self.rate = 0.0  # Units per second
+        self.count = 0
+        self._time: Optional[float] = None
+        self._value = 0.0
+
+    def update(self, value: float, now: float):
+        if self._time is None:
+            self._time, self._value = now, value
+            return
+        elapsed = now - self._time
+        if elapsed < self.span:
+            return
+        rate = (value - self._value) / elapsed
+        self.rate = rate if self.count == 0 else self.rate + self.alpha * (rate - self.rate)
+        self.count += 1
+        self._time, self._value = now, value
+
+    def seconds_until(self, value: float, limit: float) -> Optional[float]:
+        """Seconds until value reaches limit at the current rate (None if not rising or not known yet)."""
+        if self.count < TREND_WARMUP or self.rate <= 0:
+            return None
+        return max(0.0, (limit - value) / self.rate)
+
+
+class AnomalyDetector:
+    """Checks every sample against threshold, anomaly and forecast rules."""
+
+    def __init__(self, cooldown: float = ALERT_COOLDOWN, forecast_hours: float = ALERT_FORECAST_HOURS,
+                 alpha: float = ALERT_EWMA_ALPHA, warmup: int = ALERT_WARMUP):
+        self.cooldown = cooldown
+        self.horizon = forecast_hours * 3600
+        self.thresholds = {"cpu_percent": ALERT_CPU_PERCENT, "memory_percent": ALERT_MEMORY_PERCENT}
+        self.baselines = {
+            metric: Ewma(alpha, warmup, min_std) for metric, min_std in ANOMALY_METRICS.items()
+        }
+        self.trends: Dict[str, Trend] = {}  # Forecast alert id -> growth rate
+        self.active: Dict[str, AlertEvent] = {}  # Firing alerts by id
+        self.silenced: Set[str] = set()  # Firing alerts that were not notified (cooldown)
+        self._notified_at: Dict[str, float] = {}
+        self.events = 0
+
+    def observe(self, stats: SystemStats) -> List[AlertEvent]:
+        """Update every rule with one sample; returns the alerts that fired or resolved."""
+        now = to_epoch(stats.timestamp)
+        events: List[AlertEvent] = []
+        seen: Set[str] = set()
+
+        def check(alert_id: str, kind: str, severity: str, metric: str, value: float,
+                  fire: bool, clear: bool, message: str):
+            seen.add(alert_id)
+            event = self._transition(alert_id, kind, severity, metric, value, fire, clear, message, stats, now)
+            if event is not None:
+                events.append(event)
+
+        for metric, limit in self.thresholds.items():
+            value = getattr(stats, metric)
+            check(f"{metric}.threshold", "threshold", "critical", metric, value,
+                  value >= limit, value < limit - ALERT_HYSTERESIS,
+                  f"{LABELS[metric]} at {value:.0f}% (threshold {limit:.0f}%)")
+
+        for metric, baseline in self.baselines.items():
+            value = getattr(stats, metric)
+            z = baseline.update(value)
+            if z is None:
+                continue
+            direction = "above" if z > 0 else "below"
+            check(f"{metric}.anomaly", "anomaly", "warning", metric, value,
+                  abs(z) >= ALERT_ZSCORE, abs(z) < ALERT_ZSCORE_CLEAR,
+                  f"{LABELS[metric]} unusually {'high' if z > 0 else 'low'}: {value:.1f}, "
+                  f"{abs(z):.1f} standard deviations {direction} its recent average")
+
+        self._forecast(check, "memory_percent.forecast", "memory_percent", stats.memory_percent, now, "Memory")
+        for disk in stats.disks:
+            if disk.stale:
+                # Last known values - keep the current alert state
+                seen.update(alert_id for alert_id in self.active if alert_id.endswith(f":{disk.path}"))
+                continue
+            check(f"disk_percent:{disk.path}", "threshold", "critical", "disk_percent", disk.percent,
+                  disk.percent >= ALERT_DISK_PERCENT, disk.percent < ALERT_DISK_PERCENT - ALERT_HYSTERESIS,
+                  f"Disk {disk.path} at {disk.percent:.0f}% (threshold {ALERT_DISK_PERCENT:.0f}%)")
+            self._forecast(check, f"disk_full:{disk.path}", "disk_percent", disk.percent, now, f"Disk {disk.path}")
+
+        # Conditions whose metric is gone (an unmounted disk) resolve instead of firing forever
+        for alert_id in [a for a in self.active if a not in seen]:
+            event = self._transition(alert_id, "", "", "", self.active[alert_id].value,
+                                     False, True, "", stats, now)
+            if event is not None:
+                events.append(event)
+        self.events += len(events)
+        return events
+
+    def _forecast(self, check, alert_id: str, metric: str, value: float, now: float, label: str):
+        trend = self.trends.get(alert_id)
+        if trend is None:
+            trend = self.trends[alert_id] = Trend()
+        trend.update(value, now)
+        seconds = trend.seconds_until(value, 100.0)
+        hours = None if seconds is None else seconds / 3600
+        # Clears once the forecast is twice the horizon away, so it does not flap
+        check(alert_id, "forecast", "warning", metric, value,
+              seconds is not None and seconds < self.horizon,
+              seconds is None or seconds >= 2 * self.horizon,
+              f"{label} at {value:.0f}%, full in about {hours:.1f}h at the current rate"
+              if hours is not None else f"{label} at {value:.0f}%")
+
+    def _transition(self, alert_id: str, kind: str, severity: str, metric: str, value: float,
+                    fire: bool, clear: bool, message: str, stats: SystemStats,
+                    now: float) -> Optional[AlertEvent]:
+        """Apply one rule result; returns an event only when a notified alert changes state."""
+        active = self.active.get(alert_id)
+        if active is None and fire:
+            event = AlertEvent(id=alert_id, kind=kind, state="firing", severity=severity, metric=metric,
+                               value=round(value, 2), message=message, started_at=stats.timestamp,
+                               timestamp=stats.timestamp)
+            self.active[alert_id] = event
+            if now - self._notified_at.get(alert_id, -math.inf) < self.cooldown:
+                self.silenced.add(alert_id)  # De-duplicate a flapping condition
+                return None
+            self._notified_at[alert_id] = now
+            return event
+        if active is not None and clear:
+            del self.active[alert_id]
+            if alert_id in self.silenced:
+                self.silenced.discard(alert_id)
+                return None
+            return active.model_copy(update={
+                "state": "resolved", "value": round(value, 2), "timestamp": stats.timestamp,
+                "message": f"Resolved: {active.message}",
+            })
+        return None
+
+    def active_alerts(self) -> List[AlertEvent]:
+        """Alerts currently firing, oldest first."""
+        return sorted(self.active.values(), key=lambda alert: alert.started_at)
+
+
+class Notifier(ABC):
+    """Destination for alert events; subclass and register with AlertDispatcher.add."""
+
+    name = "notifier"
+
+    @abstractmethod
+    def send(self, events: List[AlertEvent]):
+        """Deliver events (blocking; runs in a worker thread). Raise on failure."""
+
+
+class WebhookNotifier(Notifier):
+    """POSTs {"alerts": [...]} as JSON to a URL over a keep-alive session."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = ALERT_WEBHOOK_TIMEOUT,
+                 session: Optional[requests.Session] = None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def send(self, events: List[AlertEvent]):
+        response = self.session.post(
+            self.url, data=dumps({"alerts": events}),
+            headers={"Content-Type": "application/json"}, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class AlertDispatcher:
+    """Deliver alert events to every notifier without blocking the broadcast loop.
+
+    Events are queued (bounded, oldest dropped) and sent in batches by a
+    background task, each notifier on a worker thread, with a few retries.
+    """
+
+    def __init__(self, notifiers: Iterable[Notifier] = (), queue_size: int = 100,
+                 retries: int = 3, retry_delay: float = 1.0):
+        self.notifiers: List[Notifier] = list(notifiers)
+        self.queue: deque = deque(maxlen=queue_size)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.failures = 0
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def add(self, notifier: Notifier):
+        self.notifiers.append(notifier)
+
+    def submit(self, events: List[AlertEvent]):
+        """Queue events for delivery (never blocks)."""
+        if not self.notifiers:
+            return
+        self.queue.extend(events)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self):
+        """Background task: send queued events as they arrive."""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                if not self.queue:
+                    await self._wakeup.wait()
+                self._wakeup.clear()
+                batch = list(self.queue)
+                self.queue.clear()
+                await asyncio.gather(*(self._deliver(notifier, batch) for notifier in self.notifiers))
+        finally:
+            self._wakeup = None
+
+    async def _deliver(self, notifier: Notifier, batch: List[AlertEvent]):
+        for attempt in range(self.retries):
+            try:
+                await asyncio.to_thread(notifier.send, batch)
+                self.sent += len(batch)
+                return
+            except Exception as e:
+                if attempt + 1 == self.retries:
+                    self.failures += 1
+                    print(f"⚠ Alert {notifier.name} failed ({e}), dropped {len(batch)} event(s)")
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
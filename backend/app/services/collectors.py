@@ -0,0 +1,208 @@
+"""Collector registry and scheduler: each metric group refreshes on its own schedule."""
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models import SystemStats
+from app.services.timings import timings
+
+Values = Dict[str, Any]
+
+
+def collector_setting(name: str, setting: str, default: float) -> float:
+    """Per-collector override from the environment, e.g. COLLECT_DISK_INTERVAL."""
+    return float(os.environ.get(f"COLLECT_{name.upper()}_{setting}", default))
+
+
+def build_stats(values: Values) -> SystemStats:
+    """SystemStats from merged collector values (extra keys are ignored)."""
+    fields = {name: values[name] for name in SystemStats.model_fields if name in values}
+    return SystemStats(timestamp=datetime.utcnow(), **fields)
+
+
+class Collector:
+    """One group of metrics, collected by a blocking function returning a dict.
+
+    Each collector runs on its own single-thread executor (unless one is
+    given), so a slow collector only ever occupies its own thread and its
+    calls never pile up.
+    """
+
+    def __init__(self, name: str, collect: Callable[[], Values], interval: float,
+                 timeout: float, executor: Optional[ThreadPoolExecutor] = None,
+                 in_stats: bool = True):
+        self.name = name
+        self.in_stats = in_stats  # Contributes SystemStats fields (vs. a separate section)
+        self._collect = collect
+        self.interval = collector_setting(name, "INTERVAL", interval)
+        self.timeout = collector_setting(name, "TIMEOUT", timeout)
+        self._executor = executor
+        self.last: Values = {}  # Result of the latest successful run
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"collect-{self.name}")
+        return self._executor
+
+    def collect(self) -> Values:
+        """Run the collection on the calling thread, timing it."""
+        with timings.time(f"collect.{self.name}"):
+            values = self._collect()
+        self.last = values
+        self.runs += 1
+        return values
+
+
+class CollectorRegistry:
+    """Named collectors, in registration order."""
+
+    def __init__(self):
+        self.collectors: Dict[str, Collector] = {}
+
+    def register(self, collector: Collector) -> Collector:
+        self.collectors[collector.name] = collector
+        return collector
+
+    def __iter__(self):
+        return iter(list(self.collectors.values()))
+
+    def __len__(self) -> int:
+        return len(self.collectors)
+
+    def runs(self) -> int:
+        """Collector runs so far, across all collectors."""
+        return sum(c.runs for c in self)
+
+    def collect_all(self) -> Values:
+        """Run every SystemStats collector once on its executor, in parallel, and merge the results.
+
+        Each collector gets its own timeout; one that fails or overruns
+        contributes its last values instead of holding back the call.
+        """
+        started = time.monotonic()
+        futures = [(c, c.executor.submit(c.collect)) for c in self if c.in_stats]
+        values: Values = {}
+        for collector, future in futures:
+            remaining = collector.timeout - (time.monotonic() - started)
+            try:
+                values.update(future.result(timeout=max(0.0, remaining)))
+            except FutureTimeoutError:
+                collector.timeouts += 1
+                print(f"⚠ Collector '{collector.name}' exceeded {collector.timeout}s, using previous values")
+                values.update(collector.last)
+            except Exception as e:
+                collector.failures += 1
+                print(f"⚠ Collector '{collector.name}' failed: {e}")
+                values.update(collector.last)
+        return values
+
+
+class CollectorScheduler:
+    """Run every registered collector on its own interval and merge the latest results.
+
+    A collector that overruns its timeout is reported and skipped until its
+    call finishes; its previous values stay in the merged view, so one slow
+    collector never holds back the others.
+    """
+
+    def __init__(self, registry: CollectorRegistry):
+        self.registry = registry
+        self.values: Values = {}
+        self.updated: Dict[str, float] = {}  # Collector name -> time.time() of its last result
+        self._pending: Dict[str, Future] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def ready(self) -> bool:
+        """True once every SystemStats collector has produced a result."""
+        return all(c.name in self.updated for c in self.registry if c.in_stats)
+
+    def stats(self) -> Optional[SystemStats]:
+        """SystemStats built from the latest merged values (None until ready)."""
+        if not self.ready:
+            return None
+        return build_stats(self.values)
+
+    async def run_collector(self, collector: Collector) -> bool:
+        """Collect once on the collector's executor; returns whether it produced values."""
+        pending = self._pending.get(collector.name)
+        if pending is not None and not pending.done():
+            return False  # Previous call still stuck - don't pile up threads
+        future = collector.executor.submit(collector.collect)
+        self._pending[collector.name] = future
+        try:
+            # asyncio.timeout, unlike wait_for on 3.11, never swallows a
+            # cancellation that races with the call completing
+            async with asyncio.timeout(collector.timeout):
+                values = await asyncio.wrap_future(future)
+        except TimeoutError:
+            collector.timeouts += 1
+            print(f"⚠ Collector '{collector.name}' exceeded {collector.timeout}s, keeping previous values")
+            return False
+        except Exception as e:
+            collector.failures += 1
+            print(f"⚠ Collector '{collector.name}' failed: {e}")
+            return False
+        self.values.update(values)
+        self.updated[collector.name] = time.time()
+        return True
+
+    async def collect_now(self, collector: Collector) -> bool:
+        """Make sure a collector has produced values, for on-demand readers.
+
+        Joins the call already in flight (waiting at most the collector's
+        timeout) rather than returning empty-handed or submitting another.
+        """
+        if collector.name in self.updated:
+            return True
+        pending = self._pending.get(collector.name)
+        if pending is None or pending.done():
+            return await self.run_collector(collector)
+        try:
+            async with asyncio.timeout(collector.timeout):
+                values = await asyncio.shield(asyncio.wrap_future(pending))
+        except Exception:
+            return False
+        self.values.update(values)
+        self.updated[collector.name] = time.time()
+        return True
+
+    async def _loop(self, collector: Collector):
+        while True:
+            started = time.monotonic()
+            await self.run_collector(collector)
+            await asyncio.sleep(max(0.0, collector.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Start one scheduling task per collector on the running loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._loop(c)) for c in self.registry]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-collector schedule and health, for diagnostics."""
+        now = time.time()
+        return {
+            c.name: {
+                "interval": c.interval,
+                "timeout": c.timeout,
+                "runs": c.runs,
+                "failures": c.failures,
+                "timeouts": c.timeouts,
+                "age": round(now - self.updated[c.name], 3) if c.name in self.updated else None,
+            }
+            for c in self.registry
+        }
@@ -0,0 +1,161 @@
+"""Per-container resource usage collected concurrently over the Docker API."""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.models import ContainerStats
+
+# Concurrent stats requests (each one is a blocking HTTP call over the socket)
+CONTAINER_STATS_WORKERS = int(os.environ.get('CONTAINER_STATS_WORKERS', '8'))
+# Seconds to wait for a collection cycle; slower containers are reported stale this cycle
+CONTAINER_STATS_TIMEOUT = float(os.environ.get('CONTAINER_STATS_TIMEOUT', '1.5'))
+
+
+def _sum_network(raw: dict) -> Tuple[int, int]:
+    rx = tx = 0
+    for iface in (raw.get('networks') or {}).values():
+        rx += iface.get('rx_bytes', 0)
+        tx += iface.get('tx_bytes', 0)
+    return rx, tx
+
+
+def _sum_block_io(raw: dict) -> Tuple[int, int]:
+    read = write = 0
+    entries = (raw.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+    for entry in entries:
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            read += entry.get('value', 0)
+        elif op == 'write':
+            write += entry.get('value', 0)
+    return read, write
+
+
+def _memory(raw: dict) -> Tuple[float, float]:
+    """(used, limit) bytes, excluding page cache like `docker stats` does."""
+    mem = raw.get('memory_stats') or {}
+    usage = mem.get('usage', 0)
+    details = mem.get('stats') or {}
+    # cgroup v2 reports inactive_file, cgroup v1 reports total_inactive_file / cache
+    cache = details.get('inactive_file', details.get('total_inactive_file', details.get('cache', 0)))
+    return max(0, usage - cache), mem.get('limit', 0)
+
+
+class ContainerStatsCollector:
+    """Collect per-container CPU, memory, network and block I/O on a worker pool.
+
+    Stats are requested with ``one_shot=True`` so the daemon answers
+    immediately instead of waiting a second to fill ``precpu_stats``; CPU
+    utilization is instead computed from the delta against the previous
+    sample this collector took for the same container.
+
+    A stats call cannot be cancelled once it is running, so every container
+    has at most one request in flight: one whose previous request has not
+    returned is not resubmitted and is reported as stale with its last-known
+    values, so a hung container ties up at most one worker.
+    """
+
+    def __init__(self, api_client, workers: int = CONTAINER_STATS_WORKERS,
+                 timeout: float = CONTAINER_STATS_TIMEOUT):
+        self.api_client = api_client
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="container-stats")
+        self._previous: Dict[str, Tuple[int, int]] = {}  # id -> (container cpu ns, system cpu ns)
+        self._pending: Dict[str, Future] = {}  # id -> stats request in flight
+        self._last: Dict[str, ContainerStats] = {}  # id -> last good result
+        self._lock = threading.Lock()
+
+    def collect(self, containers: Sequence[Tuple[str, str]]) -> List[ContainerStats]:
+        """Fetch stats for (id, name) pairs concurrently.
+
+        Containers that fail are skipped; ones still waiting for a request
+        (this cycle's or an earlier one's) are reported stale.
+        """
+        # Only new requests are waited for; one still stuck from an earlier
+        # cycle is just looked at, so a hung container costs one wait at most
+        submitted = []
+        for cid, _ in containers:
+            if cid not in self._pending:
+                future = self._executor.submit(self.api_client.stats, cid, stream=False, one_shot=True)
+                self._pending[cid] = future
+                submitted.append(future)
+        if submitted:
+            wait(submitted, timeout=self.timeout)
+
+        results = []
+        for cid, name in containers:
+            result = self._result(cid, name)
+            if result is not None:
+                results.append(result)
+
+        # Forget baselines and requests of containers that are no longer running
+        live = {cid for cid, _ in containers}
+        for cid in list(self._pending):
+            if cid not in live:
+                del self._pending[cid]
+        for cid in list(self._last):
+            if cid not in live:
+                del self._last[cid]
+        with self._lock:
+            for cid in list(self._previous):
+                if cid not in live:
+                    del self._previous[cid]
+
+        results.sort(key=lambda c: c.name)
+        return results
+
+    def _result(self, cid: str, name: str) -> Optional[ContainerStats]:
+        future = self._pending[cid]
+        if not future.done():
+            last = self._last.get(cid)
+            if last is None:
+                return ContainerStats(
+                    id=cid[:12], name=name or cid[:12], cpu_percent=0.0, memory_used_mb=0.0,
+                    memory_limit_mb=0.0, memory_percent=0.0, net_rx_bytes=0, net_tx_bytes=0,
+                    block_read_bytes=0, block_write_bytes=0, stale=True,
+                )
+            return last.model_copy(update={"stale": True})
+
+        del self._pending[cid]
+        try:
+            self._last[cid] = self._parse(cid, name, future.result())
+        except Exception as e:
+            print(f"⚠ Error fetching stats for container {name or cid[:12]}: {e}")
+            self._last.pop(cid, None)
+            return None
+        return self._last[cid]
+
+    def _cpu_percent(self, cid: str, raw: dict) -> float:
+        cpu = raw.get('cpu_stats') or {}
+        total = (cpu.get('cpu_usage') or {}).get('total_usage', 0)
+        system = cpu.get('system_cpu_usage', 0)
+        online = cpu.get('online_cpus') or len((cpu.get('cpu_usage') or {}).get('percpu_usage') or []) or 1
+
+        with self._lock:
+            previous = self._previous.get(cid)
+            self._previous[cid] = (total, system)
+        if previous is None:
+            return 0.0
+        cpu_delta = total - previous[0]
+        system_delta = system - previous[1]
+        if cpu_delta < 0 or system_delta <= 0:
+            return 0.0  # Container restarted or no time passed
+        return cpu_delta / system_delta * online * 100
+
+    def _parse(self, cid: str, name: str, raw: dict) -> ContainerStats:
+        used, limit = _memory(raw)
+        rx, tx = _sum_network(raw)
+        read, write = _sum_block_io(raw)
+        return ContainerStats(
+            id=cid[:12],
+            name=name or (raw.get('name') or '').lstrip('/'),
+            cpu_percent=round(self._cpu_percent(cid, raw), 2),
+            memory_used_mb=round(used / (1024 ** 2), 2),
+            memory_limit_mb=round(limit / (1024 ** 2), 2),
+            memory_percent=round(used / limit * 100, 2) if limit else 0.0,
+            net_rx_bytes=rx,
+            net_tx_bytes=tx,
+            block_read_bytes=read,
+            block_write_bytes=write,
+        )
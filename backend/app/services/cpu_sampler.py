@@ -0,0 +1,69 @@
+"""Non-blocking CPU utilization sampler based on cumulative CPU time deltas."""
+import threading
+import time
+from typing import Optional, Tuple
+
+import psutil
+
+
+def _busy_and_total(times) -> Tuple[float, float]:
+    """Split a psutil cpu_times() result into (busy, total) seconds.
+
+    Mirrors psutil's own accounting: guest time is already included in
+    user time on Linux, and iowait counts as idle.
+    """
+    total = sum(times) - getattr(times, "guest", 0.0) - getattr(times, "guest_nice", 0.0)
+    idle = times.idle + getattr(times, "iowait", 0.0)
+    return total - idle, total
+
+
+class CpuSampler:
+    """Compute CPU utilization from the delta since the previous sample.
+
+    Unlike ``psutil.cpu_percent(interval=1)`` this never sleeps: each call
+    reads the cumulative CPU time counters once and compares them with the
+    stored baseline. Calls that arrive before at least ``min_interval``
+    seconds of wall time (measured in CPU time across all cores) have
+    accumulated return the last complete interval instead of a noisy value,
+    so the result stays meaningful however often callers poll.
+    """
+
+    def __init__(self, min_interval: float = 0.1):
+        self._lock = threading.Lock()
+        self._min_delta = min_interval * (psutil.cpu_count() or 1)
+        self._busy, self._total = _busy_and_total(psutil.cpu_times())
+        self._sampled_at = time.monotonic()
+        self._percent = 0.0
+        self._interval: Optional[float] = None
+
+    def sample(self) -> float:
+        """Return CPU utilization (0-100) for the interval since the last sample."""
+        times = psutil.cpu_times()
+        now = time.monotonic()
+        busy, total = _busy_and_total(times)
+
+        with self._lock:
+            total_delta = total - self._total
+            if total_delta < 0:
+                # Counters went backwards (e.g. CPU hot-unplug): rebase silently
+                self._busy, self._total, self._sampled_at = busy, total, now
+                return self._percent
+            if total_delta < self._min_delta:
+                # Too little time has passed for a stable reading
+                return self._percent
+
+            busy_delta = max(0.0, busy - self._busy)
+            self._percent = min(100.0, busy_delta / total_delta * 100)
+            self._interval = now - self._sampled_at
+            self._busy, self._total, self._sampled_at = busy, total, now
+            return self._percent
+
+    @property
+    def percent(self) -> float:
+        """CPU utilization of the last complete interval (no sampling)."""
+        return self._percent
+
+    @property
+    def interval(self) -> Optional[float]:
+        """Wall-clock length in seconds of the last complete interval."""
+        return self._interval
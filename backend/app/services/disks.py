@@ -0,0 +1,134 @@
+"""Per-mountpoint disk usage, checked in parallel with a timeout per mount."""
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import psutil
+
+from app.models import DiskUsage
+
+GIB = 1024 ** 3
+
+# Extra mountpoints to monitor: comma-separated paths, or "auto" to discover
+# them with psutil.disk_partitions. The primary disk (DISK_PATH) always comes first
+DISK_PATHS = os.environ.get('DISK_PATHS', '')
+# Filesystem types skipped by auto-discovery (pseudo, in-memory and image filesystems)
+DISK_FSTYPE_EXCLUDE = os.environ.get(
+    'DISK_FSTYPE_EXCLUDE', 'tmpfs,devtmpfs,overlay,squashfs,iso9660,nsfs,autofs'
+).split(',')
+# Seconds one mount's statvfs may take before the mount is reported stale
+DISK_MOUNT_TIMEOUT = float(os.environ.get('DISK_MOUNT_TIMEOUT', '5'))
+# Threads checking mounts in parallel
+DISK_WORKERS = int(os.environ.get('DISK_WORKERS', '4'))
+
+
+def parse_paths(value: str) -> List[str]:
+    return [path.strip() for path in value.split(',') if path.strip()]
+
+
+def discover_mountpoints(exclude_fstypes: Sequence[str] = DISK_FSTYPE_EXCLUDE) -> List[str]:
+    """Mountpoints of real filesystems, one per device.
+
+    Reading the partition table never touches the mounts themselves, so a
+    hung network mount cannot block discovery.
+    """
+    seen_devices = set()
+    mountpoints = []
+    for partition in psutil.disk_partitions(all=False):
+        if partition.fstype in exclude_fstypes or partition.device in seen_devices:
+            continue
+        seen_devices.add(partition.device)
+        mountpoints.append(partition.mountpoint)
+    return mountpoints
+
+
+class MountState:
+    """Last-known usage and the check in flight for one mountpoint."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending: Optional[Future] = None
+        self.last: Optional[DiskUsage] = None
+        self.read_at: Optional[float] = None  # time.monotonic() of the last good read
+        self.stale = False
+
+
+class DiskMonitor:
+    """Usage of several mountpoints, each checked on a worker pool with its own timeout.
+
+    A statvfs on a hung NFS/SMB mount or a spinning-up array disk can block
+    for minutes. Every mount has at most one check in flight: a mount whose
+    previous check has not returned is not resubmitted and is reported as
+    stale with its last-known values, so it ties up at most one worker and
+    never delays the other mounts or the collector.
+    """
+
+    def __init__(self, primary: str, paths: str = DISK_PATHS, timeout: float = DISK_MOUNT_TIMEOUT,
+                 workers: int = DISK_WORKERS):
+        self.primary = primary
+        self.paths = paths
+        self.timeout = timeout
+        self.mounts: Dict[str, MountState] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disk")
+
+    def mountpoints(self) -> List[str]:
+        """Primary path first, then the configured or discovered mountpoints."""
+        extra = discover_mountpoints() if self.paths.strip() == "auto" else parse_paths(self.paths)
+        return list(dict.fromkeys([self.primary, *extra]))
+
+    def _read(self, path: str) -> DiskUsage:
+        try:
+            usage = psutil.disk_usage(path)
+        except (FileNotFoundError, PermissionError):
+            if path != self.primary:
+                raise
+            # Host path not mounted into the container - fall back to its root
+            usage = psutil.disk_usage('/')
+        return DiskUsage(
+            path=path,
+            percent=round(usage.percent, 2),
+            used_gb=round(usage.used / GIB, 2),
+            total_gb=round(usage.total / GIB, 2),
+        )
+
+    def sample(self) -> List[DiskUsage]:
+        """Check every mountpoint in parallel; returns one entry per mount, primary first."""
+        paths = self.mountpoints()
+        self.mounts = {path: self.mounts.get(path) or MountState(path) for path in paths}
+
+        # Only new checks are waited for; one still stuck from an earlier
+        # sample is just looked at, so a hung mount costs one wait at most
+        submitted = []
+        for state in self.mounts.values():
+            if state.pending is None:
+                state.pending = self._executor.submit(self._read, state.path)
+                submitted.append(state.pending)
+        if submitted:
+            wait(submitted, timeout=self.timeout)
+
+        now = time.monotonic()
+        return [self._result(state, now) for state in self.mounts.values()]
+
+    def _result(self, state: MountState, now: float) -> DiskUsage:
+        future = state.pending
+        if future.done():
+            state.pending = None
+            try:
+                state.last = future.result()
+                state.read_at = now
+                if state.stale:
+                    print(f"✓ Disk '{state.path}' is responding again")
+                state.stale = False
+                return state.last
+            except Exception as e:
+                if not state.stale:
+                    print(f"⚠ Disk '{state.path}' unavailable: {e}")
+        elif not state.stale:
+            print(f"⚠ Disk '{state.path}' did not answer within {self.timeout}s, reporting it as stale")
+        state.stale = True
+
+        age = round(now - state.read_at, 1) if state.read_at is not None else None
+        if state.last is None:
+            return DiskUsage(path=state.path, percent=0.0, used_gb=0.0, total_gb=0.0, stale=True)
+        return state.last.model_copy(update={"stale": True, "age": age})
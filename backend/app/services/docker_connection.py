@@ -0,0 +1,129 @@
+"""Lazily connected Docker API client with exponential-backoff reconnects."""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Docker socket and fixed API version (Docker 20.10+). The low-level APIClient is
+# used directly: DockerClient() and version auto-detection can fail in containers
+DOCKER_BASE_URL = 'http+unix:///var/run/docker.sock'
+DOCKER_API_VERSION = '1.41'
+# Seconds a single Docker API call may take
+DOCKER_TIMEOUT = float(os.environ.get('DOCKER_TIMEOUT', '10'))
+# Reconnect backoff (seconds): starts at DOCKER_RETRY_MIN and doubles up to DOCKER_RETRY_MAX
+DOCKER_RETRY_MIN = float(os.environ.get('DOCKER_RETRY_MIN', '1'))
+DOCKER_RETRY_MAX = float(os.environ.get('DOCKER_RETRY_MAX', '60'))
+# Seconds a collector waits for a connection attempt in flight before reporting no Docker
+DOCKER_CONNECT_WAIT = float(os.environ.get('DOCKER_CONNECT_WAIT', '1'))
+
+
+class DockerConnection:
+    """Docker API client connected in the background, reconnecting with backoff.
+
+    Nothing talks to the daemon until the client is first asked for, so
+    importing and starting SysMon never waits for the socket. Connection
+    attempts run on their own thread, one at a time; callers wait for an
+    attempt at most as long as they choose. A failed attempt or a failed call
+    marks the connection down and the next attempt is only made once the
+    backoff delay has passed, so a daemon that starts (or restarts) after
+    SysMon is picked up without retrying in a tight loop.
+    """
+
+    def __init__(self, on_connect: Optional[Callable[[Any], None]] = None,
+                 on_disconnect: Optional[Callable[[], None]] = None,
+                 retry_min: float = DOCKER_RETRY_MIN, retry_max: float = DOCKER_RETRY_MAX,
+                 clock: Callable[[], float] = time.monotonic):
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.clock = clock
+        self.api_client = None
+        self.state = "disconnected"  # disconnected -> connecting -> connected / unavailable
+        self.version: Optional[str] = None
+        self.api_version: Optional[str] = None
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.connected_at: Optional[float] = None  # time.time() of the last successful connect
+        self._delay = retry_min
+        self._retry_at = 0.0
+        self._attempt: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.state == "connected"
+
+    def get(self, wait: float = 0.0):
+        """The API client if connected, else None.
+
+        Starts a background connection attempt if one is due and waits up to
+        wait seconds for the attempt in flight.
+        """
+        if self.state == "connected":
+            return self.api_client
+        with self._lock:
+            attempt = self._attempt
+            if attempt is None or not attempt.is_alive():
+                if self.state == "connected" or self.clock() < self._retry_at:
+                    return self.api_client if self.state == "connected" else None
+                self.state = "connecting"
+                attempt = self._attempt = threading.Thread(
+                    target=self._connect, name="docker-connect", daemon=True
+                )
+                attempt.start()
+        if wait > 0:
+            attempt.join(wait)
+        return self.api_client if self.state == "connected" else None
+
+    def _connect(self):
+        self.attempts += 1
+        try:
+            if self.api_client is None:
+                # Using 'http+unix://' prefix to trigger Docker SDK's built-in UnixHTTPAdapter;
+                # with a fixed version the constructor makes no API calls
+                from docker import APIClient
+                self.api_client = APIClient(
+                    base_url=DOCKER_BASE_URL, version=DOCKER_API_VERSION, timeout=DOCKER_TIMEOUT
+                )
+            version = self.api_client.version()
+        except Exception as e:
+            self._mark_down(e)
+            return None
+
+        self.version = version.get('Version', 'unknown')
+        self.api_version = version.get('ApiVersion', 'unknown')
+        self.last_error = None
+        self.connected_at = time.time()
+        self._delay = self.retry_min
+        self.state = "connected"
+        print(f"✓ Docker API connected - Docker v{self.version}, API v{self.api_version}")
+        if self.on_connect is not None:
+            self.on_connect(self.api_client)
+        return self.api_client
+
+    def failed(self, error: Exception):
+        """Report a failed call; the connection is re-checked after the backoff delay."""
+        if self.state == "connected":
+            self._mark_down(error)
+
+    def _mark_down(self, error: Exception):
+        was_connected = self.state == "connected"
+        self.state = "unavailable"
+        self.last_error = str(error)
+        self._retry_at = self.clock() + self._delay
+        print(f"⚠ Docker API unavailable ({error}), retrying in {self._delay:.0f}s")
+        self._delay = min(self._delay * 2, self.retry_max)
+        if was_connected and self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def status(self) -> Dict[str, Any]:
+        """Connection state for /api/health."""
+        status: Dict[str, Any] = {"state": self.state, "attempts": self.attempts}
+        if self.connected:
+            status.update(version=self.version, api_version=self.api_version,
+                          connected_at=self.connected_at)
+        elif self.state == "unavailable":
+            status.update(error=self.last_error,
+                          retry_in=round(max(0.0, self._retry_at - self.clock()), 1))
+        return status
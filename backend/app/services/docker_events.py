@@ -0,0 +1,149 @@
+"""Container state index kept current from the Docker events stream."""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Full re-listing interval (seconds) to correct any drift from missed events
+DOCKER_RESYNC_INTERVAL = float(os.environ.get('DOCKER_RESYNC_INTERVAL', '300'))
+
+# Container states counted as "stopped" (matches the original listing logic)
+STOPPED_STATES = {'exited', 'stopped', 'created'}
+
+# Event action -> resulting container state (None = container removed)
+ACTION_STATES: Dict[str, Optional[str]] = {
+    'create': 'created',
+    'start': 'running',
+    'restart': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'die': 'exited',
+    'stop': 'exited',
+    'destroy': None,
+}
+
+
+class ContainerIndex:
+    """In-memory map of container id -> (state, name).
+
+    Seeded from one ``containers(all=True)`` listing, then updated from the
+    ``/events`` stream so running/stopped/total counts are O(1) reads instead
+    of a full listing per tick. The stream is re-established (after a full
+    resync) every ``resync_interval`` seconds and whenever it breaks, e.g.
+    because the Docker daemon restarted.
+    """
+
+    def __init__(self, api_client, resync_interval: float = DOCKER_RESYNC_INTERVAL):
+        self.api_client = api_client
+        self.resync_interval = resync_interval
+        self.containers: Dict[str, Tuple[str, str]] = {}
+        self.synced = False
+        self.reconnect_delay = 1.0
+        self.max_reconnect_delay = 30.0
+        self._states: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stream = None
+        self._thread: Optional[threading.Thread] = None
+
+    def counts(self) -> Dict[str, int]:
+        """Current container counts by state group (O(1))."""
+        with self._lock:
+            return {
+                "total": len(self.containers),
+                "running": self._states['running'],
+                "stopped": sum(self._states[s] for s in STOPPED_STATES),
+            }
+
+    def running(self) -> List[Tuple[str, str]]:
+        """(id, name) of every running container."""
+        with self._lock:
+            return [(cid, name) for cid, (state, name) in self.containers.items() if state == 'running']
+
+    def resync(self):
+        """Rebuild the index from a full container listing."""
+        listing = self.api_client.containers(all=True)
+        containers = {}
+        for c in listing:
+            names = c.get('Names') or ['']
+            containers[c['Id']] = (c.get('State', ''), names[0].lstrip('/'))
+        with self._lock:
+            self.containers = containers
+            self._states = Counter(state for state, _ in containers.values())
+            self.synced = True
+
+    def apply_event(self, event: dict):
+        """Apply one Docker container event to the index."""
+        if event.get('Type', 'container') != 'container':
+            return
+        action = event.get('Action') or event.get('status') or ''
+        actor = event.get('Actor') or {}
+        container_id = event.get('id') or actor.get('ID')
+        if not container_id:
+            return
+        name = (actor.get('Attributes') or {}).get('name')
+
+        with self._lock:
+            current = self.containers.get(container_id)
+            if action == 'rename' and current:
+                self.containers[container_id] = (current[0], name or current[1])
+                return
+            if action not in ACTION_STATES:
+                return  # exec_*, health_status, kill, oom... don't change state
+            new_state = ACTION_STATES[action]
+            if current:
+                self._states[current[0]] -= 1
+            if new_state is None:
+                self.containers.pop(container_id, None)
+                return
+            self.containers[container_id] = (new_state, name or (current[1] if current else ''))
+            self._states[new_state] += 1
+
+    def start(self):
+        """Start following the events stream in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="docker-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop following events and close the open stream."""
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                # Subscribe from just before the listing so no event is missed;
+                # replaying a few already-reflected events converges to the same state
+                since = int(time.time()) - 1
+                self.resync()
+                until = since + int(self.resync_interval)
+                self._stream = self.api_client.events(
+                    since=since, until=until, decode=True, filters={'type': 'container'}
+                )
+                for event in self._stream:
+                    if self._stop.is_set():
+                        break
+                    self.apply_event(event)
+                if not self._stop.is_set() and time.time() < until - 1:
+                    raise ConnectionError("events stream closed early")
+                # Stream ended at `until`: loop around for a full resync
+                delay = self.reconnect_delay
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.synced = False
+                print(f"⚠ Docker events stream lost ({e}), reconnecting in {delay:.0f}s")
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                self._stream = None
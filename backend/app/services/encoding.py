@@ -0,0 +1,62 @@
+"""Fast JSON encoding (orjson) shared by WebSocket broadcasts and REST responses."""
+from typing import Any, Dict, Iterable, Tuple
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # Models (SystemStats, Tamagotchi, ...) are written from their fields;
+    # anything else orjson can't encode falls back to str(), like json.dumps(default=str)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode value as compact UTF-8 JSON (datetimes as ISO 8601)."""
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+def join_object(fields: Iterable[Tuple[str, bytes]]) -> bytes:
+    """Build a JSON object from keys and already-encoded values."""
+    return b"{" + b",".join(dumps(key) + b":" + value for key, value in fields) + b"}"
+
+
+class SectionCache:
+    """Encodings of message sections, reused while a section's value is unchanged.
+
+    Sections such as the Tamagotchi or the process table change far less
+    often than they are broadcast; comparing them to the last value is much
+    cheaper than encoding them again. Cached values must not be mutated
+    afterwards (the broadcast loop builds fresh sections every tick).
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, bytes]] = {}
+        self.hits = 0
+
+    def encode(self, name: str, value: Any) -> bytes:
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == value:
+            self.hits += 1
+            return entry[1]
+        encoded = dumps(value)
+        self._entries[name] = (value, encoded)
+        return encoded
+
+
+class JSONBytesResponse(Response):
+    """JSON response written with orjson; already-encoded bytes are sent as they are.
+
+    Returning it from a route skips FastAPI's generic jsonable_encoder pass.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
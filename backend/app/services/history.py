@@ -0,0 +1,174 @@
+"""In-memory metrics history stored in fixed-size column arrays."""
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.models import SystemStats
+
+# (name, step seconds, retention seconds) - finest tier first
+DEFAULT_TIERS: Tuple[Tuple[str, int, int], ...] = (
+    ("raw", 2, 60 * 60),             # 2s samples for an hour
+    ("1m", 60, 24 * 60 * 60),        # 1-minute rollups for a day
+    ("15m", 15 * 60, 30 * 24 * 60 * 60),  # 15-minute rollups for a month
+)
+
+
+def numeric_fields(model=SystemStats) -> List[str]:
+    """Names of the scalar numeric fields of a model (the history columns)."""
+    return [
+        name for name, field in model.model_fields.items()
+        if field.annotation in (int, float)
+    ]
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Convert a naive UTC datetime (as used by SystemStats) to epoch seconds."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class HistoryTier:
+    """Ring buffer of per-step means for one resolution.
+
+    Every column is a preallocated ``array('d')`` of ``capacity`` doubles.
+    Incoming samples are averaged into the currently open bucket; when a
+    sample for a later bucket arrives, the open bucket is written to the
+    ring, overwriting the oldest entry once the ring is full.
+    """
+
+    def __init__(self, name: str, step: int, retention: int, metrics: Sequence[str]):
+        self.name = name
+        self.step = step
+        self.capacity = max(1, retention // step)
+        self.metrics = list(metrics)
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.columns = [array('d', bytes(8 * self.capacity)) for _ in self.metrics]
+        self.head = 0  # next write position
+        self.count = 0
+        # Accumulator for the bucket that is still open
+        self._bucket: Optional[float] = None
+        self._sums = [0.0] * len(self.metrics)
+        self._samples = 0
+
+    @property
+    def retention(self) -> int:
+        return self.capacity * self.step
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the preallocated arrays."""
+        return self.timestamps.itemsize * self.capacity * (1 + len(self.columns))
+
+    def add(self, ts: float, values: Sequence[float]):
+        """Fold one sample into the tier."""
+        bucket = ts - ts % self.step
+        if self._bucket is not None:
+            if bucket < self._bucket:
+                return  # Late sample for a bucket already written - drop it
+            if bucket > self._bucket:
+                self._flush()
+        if self._samples == 0:
+            self._bucket = bucket
+        sums = self._sums
+        for i, value in enumerate(values):
+            sums[i] += value
+        self._samples += 1
+
+    def _flush(self):
+        n = self._samples
+        pos = self.head
+        self.timestamps[pos] = self._bucket
+        for column, total in zip(self.columns, self._sums):
+            column[pos] = total / n
+        self.head = (pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._sums = [0.0] * len(self.metrics)
+        self._samples = 0
+
+    def _physical(self, i: int) -> int:
+        """Map chronological index i (0 = oldest) to an array position."""
+        return (self.head - self.count + i) % self.capacity
+
+    def _bisect(self, ts: float, right: bool = False) -> int:
+        """First chronological index whose timestamp is >= ts (> ts if right)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.timestamps[self._physical(mid)]
+            if value < ts or (right and value == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def oldest(self) -> Optional[float]:
+        """Timestamp of the oldest point held (including the open bucket)."""
+        if self.count:
+            return self.timestamps[self._physical(0)]
+        return self._bucket if self._samples else None
+
+    def query(self, start: float, end: float) -> Tuple[List[float], Dict[str, List[float]]]:
+        """Return points with start <= timestamp <= end, oldest first.
+
+        The open bucket is included as a partial mean so the newest data is
+        visible before its step has completed.
+        """
+        first = self._bisect(start)
+        last = self._bisect(end, right=True)
+        positions = [self._physical(i) for i in range(first, last)]
+        timestamps = [self.timestamps[p] for p in positions]
+        series = {
+            name: [column[p] for p in positions]
+            for name, column in zip(self.metrics, self.columns)
+        }
+        if self._samples and start <= self._bucket <= end:
+            timestamps.append(self._bucket)
+            for name, total in zip(self.metrics, self._sums):
+                series[name].append(total / self._samples)
+        return timestamps, series
+
+
+class MetricsHistory:
+    """Multi-resolution history of SystemStats with bounded, fixed memory."""
+
+    def __init__(self, tiers: Sequence[Tuple[str, int, int]] = DEFAULT_TIERS,
+                 metrics: Optional[Sequence[str]] = None):
+        self.metrics = list(metrics) if metrics is not None else numeric_fields()
+        self.tiers: Dict[str, HistoryTier] = {
+            name: HistoryTier(name, step, retention, self.metrics)
+            for name, step, retention in tiers
+        }
+
+    def memory_bytes(self) -> int:
+        """Total bytes preallocated for all tiers (fixed at construction)."""
+        return sum(tier.memory_bytes() for tier in self.tiers.values())
+
+    def append(self, stats: SystemStats):
+        """Record one stats sample in every tier."""
+        ts = to_epoch(stats.timestamp)
+        self.append_values(ts, [float(getattr(stats, name)) for name in self.metrics])
+
+    def append_values(self, ts: float, values: Sequence[float]):
+        """Record one sample given as values in self.metrics order."""
+        for tier in self.tiers.values():
+            tier.add(ts, values)
+
+    def pick_resolution(self, start: float, now: float) -> str:
+        """Finest tier whose retention window still reaches back to start."""
+        for name, tier in self.tiers.items():
+            if start >= now - tier.retention:
+                return name
+        return list(self.tiers)[-1]
+
+    def query(self, start: float, end: float, resolution: str) -> Dict:
+        """Return a column-oriented slice of one tier."""
+        tier = self.tiers[resolution]
+        timestamps, series = tier.query(start, end)
+        return {
+            "resolution": resolution,
+            "step": tier.step,
+            "from": start,
+            "to": end,
+            "timestamps": timestamps,
+            "metrics": series,
+        }
@@ -0,0 +1,146 @@
+"""Prometheus text exposition of the latest stats snapshot and internal counters."""
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models import ContainerStats, DiskUsage, SystemStats
+from app.services.history import numeric_fields, to_epoch
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+GIB = 1024 ** 3
+
+# (labels, value) pairs of one metric
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_metric(name: str, help_text: str, metric_type: str, samples: Samples) -> str:
+    """Render one metric family (HELP, TYPE and one line per sample)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        label_str = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_str}}} {_format_value(value)}" if label_str
+                     else f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _stats_metric(field: str) -> Tuple[str, float]:
+    """Metric name and scale for a SystemStats field (GB fields exported in bytes)."""
+    if field.endswith("_gb"):
+        return f"sysmon_{field[:-3]}_bytes", GIB
+    return f"sysmon_{field}", 1.0
+
+
+# Container counts are one gauge labelled by state (a _total suffix is reserved for counters)
+DOCKER_CONTAINER_STATES = (
+    ("docker_containers_total", "all"),
+    ("docker_containers_running", "running"),
+    ("docker_containers_stopped", "stopped"),
+)
+
+
+def render_disks(disks: Sequence[DiskUsage]) -> str:
+    """Per-mountpoint usage gauges, labelled by path."""
+    return "".join([
+        format_metric("sysmon_disk_mount_used_bytes", "Used space of a monitored mountpoint.", "gauge",
+                      [({"path": d.path}, d.used_gb * GIB) for d in disks]),
+        format_metric("sysmon_disk_mount_size_bytes", "Size of a monitored mountpoint.", "gauge",
+                      [({"path": d.path}, d.total_gb * GIB) for d in disks]),
+        format_metric("sysmon_disk_mount_stale", "1 if the mountpoint's last check timed out or failed.", "gauge",
+                      [({"path": d.path}, float(d.stale)) for d in disks]),
+    ])
+
+
+def render_stats(stats: SystemStats) -> str:
+    """Host and Docker gauges for one snapshot."""
+    parts = [format_metric(
+        "sysmon_stats_timestamp_seconds", "Collection time of the exported snapshot.",
+        "gauge", [({}, to_epoch(stats.timestamp))]
+    ), format_metric(
+        "sysmon_docker_containers", "Docker containers by state.", "gauge",
+        [({"state": state}, getattr(stats, field)) for field, state in DOCKER_CONTAINER_STATES]
+    )]
+    if stats.disks:
+        parts.append(render_disks(stats.disks))
+    container_fields = {field for field, _ in DOCKER_CONTAINER_STATES}
+    for field in numeric_fields(type(stats)):
+        if field in container_fields:
+            continue
+        name, scale = _stats_metric(field)
+        parts.append(format_metric(
+            name, field.replace("_", " ").capitalize() + ".", "gauge",
+            [({}, getattr(stats, field) * scale)]
+        ))
+    return "".join(parts)
+
+
+CONTAINER_METRICS = (
+    ("cpu_percent", "sysmon_container_cpu_percent", "gauge", "Container CPU usage."),
+    ("memory_used_mb", "sysmon_container_memory_used_bytes", "gauge", "Container memory usage (excluding page cache)."),
+    ("memory_limit_mb", "sysmon_container_memory_limit_bytes", "gauge", "Container memory limit."),
+    ("net_rx_bytes", "sysmon_container_network_receive_bytes_total", "counter", "Bytes received by the container."),
+    ("net_tx_bytes", "sysmon_container_network_transmit_bytes_total", "counter", "Bytes sent by the container."),
+    ("block_read_bytes", "sysmon_container_block_read_bytes_total", "counter", "Bytes read from block devices."),
+    ("block_write_bytes", "sysmon_container_block_write_bytes_total", "counter", "Bytes written to block devices."),
+)
+
+
+def render_containers(containers: Sequence[ContainerStats]) -> str:
+    """Per-container gauges and counters, labelled by container name."""
+    parts = []
+    for field, name, metric_type, help_text in CONTAINER_METRICS:
+        scale = 1024 ** 2 if field.endswith("_mb") else 1
+        parts.append(format_metric(name, help_text, metric_type, [
+            ({"name": c.name, "id": c.id[:12]}, getattr(c, field) * scale) for c in containers
+        ]))
+    return "".join(parts)
+
+
+class MetricsExporter:
+    """Render /metrics from already-collected data, never triggering a collection.
+
+    The snapshot-derived sections are rendered once per published snapshot
+    and reused by every scrape until the next one; only the handful of live
+    lines (Tamagotchi, internal counters) are formatted per scrape.
+    """
+
+    def __init__(self):
+        self._stats: Optional[SystemStats] = None
+        self._stats_text = ""
+        self._containers: Optional[List[ContainerStats]] = None
+        self._containers_text = ""
+        self.renders = 0
+
+    def render(self, stats: Optional[SystemStats], containers: Optional[List[ContainerStats]],
+               tamagotchi: Dict[str, Any], counters: Sequence[Tuple[str, str, str, float]]) -> str:
+        """Build the exposition; counters are (name, type, help, value) tuples."""
+        if stats is not self._stats:
+            self._stats = stats
+            self._stats_text = render_stats(stats) if stats is not None else ""
+            self.renders += 1
+        if containers is not self._containers:
+            self._containers = containers
+            self._containers_text = render_containers(containers) if containers else ""
+
+        parts = [self._stats_text, self._containers_text]
+        for field in ("health", "happiness", "level", "xp"):
+            value = tamagotchi.get(field)
+            if value is not None:
+                parts.append(format_metric(
+                    f"sysmon_tamagotchi_{field}", f"Tamagotchi {field}.", "gauge", [({}, value)]
+                ))
+        for name, metric_type, help_text, value in counters:
+            parts.append(format_metric(name, help_text, metric_type, [({}, value)]))
+        return "".join(parts)
@@ -0,0 +1,114 @@
+"""Hub-side registry of remote SysMon agents (nodes) and their samples."""
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.history import DEFAULT_TIERS, MetricsHistory, numeric_fields
+
+# A node that hasn't reported for this many seconds is shown as offline
+NODE_OFFLINE_AFTER = float(os.environ.get('NODE_OFFLINE_AFTER', '10'))
+# Maximum number of nodes the hub accepts (each holds a fixed-size history)
+NODE_MAX_COUNT = int(os.environ.get('NODE_MAX_COUNT', '100'))
+
+# Node names are URL path segments: a letter or digit, then letters, digits, '.', '_' or '-'
+NODE_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+# Per-node history: raw and 1-minute tiers (~520 KB per node, ~52 MB at the default NODE_MAX_COUNT)
+NODE_TIERS = DEFAULT_TIERS[:2]
+
+
+def is_valid_node_name(name: str) -> bool:
+    return NODE_NAME_RE.match(name) is not None
+
+
+def slugify_node_name(name: str) -> str:
+    """A valid node name for name: other characters become '-' (e.g. 'web 1/a' -> 'web-1-a')."""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '-', name).lstrip('._-')[:64].rstrip('-')
+    return slug or "node"
+
+
+class NodeState:
+    """Latest sample and history of one node."""
+
+    def __init__(self, name: str, metrics: Sequence[str]):
+        self.name = name
+        self.history = MetricsHistory(tiers=NODE_TIERS, metrics=metrics)
+        self.latest: Dict[str, float] = {}
+        self.timestamp: Optional[float] = None  # Sample time of latest
+        self.last_seen: Optional[float] = None  # Hub time of the last batch
+        self.samples = 0
+
+
+class NodeRegistry:
+    """Per-node latest state and history, fed by agent batches.
+
+    Ingest only maps the batch's columns onto the history columns and
+    appends to preallocated ring buffers, so it stays cheap with dozens of
+    agents reporting every second or two.
+    """
+
+    def __init__(self, offline_after: float = NODE_OFFLINE_AFTER, max_nodes: int = NODE_MAX_COUNT):
+        self.offline_after = offline_after
+        self.max_nodes = max_nodes
+        self.metrics = numeric_fields()
+        self.nodes: Dict[str, NodeState] = {}
+
+    def ingest(self, node: str, fields: Sequence[str], samples: Sequence[Sequence[float]]) -> int:
+        """Record a batch of [timestamp, *values] rows; returns the number stored.
+
+        fields names the value columns of each row. Metrics the agent didn't
+        send are recorded as 0 and unknown fields are ignored.
+        """
+        state = self.nodes.get(node)
+        if state is None:
+            if len(self.nodes) >= self.max_nodes:
+                raise ValueError(f"Node limit reached ({self.max_nodes})")
+            state = self.nodes[node] = NodeState(node, self.metrics)
+
+        positions = {name: i + 1 for i, name in enumerate(fields)}
+        columns = [positions.get(name) for name in self.metrics]
+        stored = 0
+        for row in sorted(samples, key=lambda r: r[0]):
+            if len(row) != len(fields) + 1:
+                continue
+            values = [float(row[i]) if i is not None else 0.0 for i in columns]
+            state.history.append_values(row[0], values)
+            if state.timestamp is None or row[0] >= state.timestamp:
+                state.timestamp = row[0]
+                state.latest = dict(zip(self.metrics, values))
+            stored += 1
+        state.samples += stored
+        state.last_seen = time.time()
+        return stored
+
+    def is_online(self, state: NodeState, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return state.last_seen is not None and now - state.last_seen <= self.offline_after
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Multi-node view: latest metrics and status per node."""
+        now = time.time()
+        return {
+            name: {
+                "online": self.is_online(state, now),
+                "timestamp": state.timestamp,
+                **state.latest,
+            }
+            for name, state in sorted(self.nodes.items())
+        }
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Node list for the REST API."""
+        now = time.time()
+        return [
+            {
+                "name": name,
+                "online": self.is_online(state, now),
+                "last_seen": state.last_seen,
+                "timestamp": state.timestamp,
+                "samples": state.samples,
+                "latest": state.latest,
+            }
+            for name, state in sorted(self.nodes.items())
+        ]
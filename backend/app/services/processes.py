@@ -0,0 +1,79 @@
+"""Top-N process table from per-PID CPU time deltas."""
+import heapq
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import psutil
+
+from app.models import ProcessInfo
+
+# Processes kept per ranking (by CPU and by memory)
+PROCESS_TOP_N = int(os.environ.get('PROCESS_TOP_N', '10'))
+
+# Only what the table needs - psutil reads these in one pass per process
+PROCESS_ATTRS = ["pid", "name", "username", "cpu_times", "memory_info", "create_time"]
+
+
+class ProcessTable:
+    """Rank host processes by CPU and memory without sleeping per process.
+
+    Each sample walks ``psutil.process_iter`` once with a restricted
+    attribute set and compares every process's cumulative CPU time with its
+    baseline from the previous sample. Baselines are keyed by PID and
+    creation time, so a reused PID starts fresh, and are rebuilt on every
+    sample, so exited processes are pruned automatically. Only the top N
+    rows are turned into models.
+    """
+
+    def __init__(self, top_n: int = PROCESS_TOP_N):
+        self.top_n = top_n
+        self._baselines: Dict[int, Tuple[float, float]] = {}  # pid -> (create_time, cpu seconds)
+        self._sampled_at = None
+        self._lock = threading.Lock()
+        self.process_count = 0
+
+    def sample(self) -> Dict[str, List[ProcessInfo]]:
+        """Return {"cpu": [...], "memory": [...]}, the top N processes by each."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._sampled_at if self._sampled_at is not None else None
+            previous = self._baselines
+            baselines: Dict[int, Tuple[float, float]] = {}
+            rows = []
+            for proc in psutil.process_iter(PROCESS_ATTRS):
+                info = proc.info
+                times, memory = info["cpu_times"], info["memory_info"]
+                if times is None or memory is None:
+                    continue  # Access denied
+                pid, created = info["pid"], info["create_time"]
+                cpu = times.user + times.system
+                baselines[pid] = (created, cpu)
+                base = previous.get(pid)
+                if elapsed and base is not None and base[0] == created and cpu >= base[1]:
+                    cpu_percent = (cpu - base[1]) / elapsed * 100
+                else:
+                    cpu_percent = 0.0
+                rows.append((cpu_percent, memory.rss, pid, info["name"], info["username"]))
+            self._baselines = baselines
+            self._sampled_at = now
+            self.process_count = len(rows)
+
+        total_memory = psutil.virtual_memory().total or 1
+        return {
+            "cpu": [self._info(row, total_memory) for row in heapq.nlargest(self.top_n, rows, key=lambda r: r[0])],
+            "memory": [self._info(row, total_memory) for row in heapq.nlargest(self.top_n, rows, key=lambda r: r[1])],
+        }
+
+    @staticmethod
+    def _info(row, total_memory: float) -> ProcessInfo:
+        cpu_percent, rss, pid, name, username = row
+        return ProcessInfo(
+            pid=pid,
+            name=name or "",
+            username=username or "",
+            cpu_percent=round(cpu_percent, 2),
+            memory_rss_mb=round(rss / (1024 ** 2), 2),
+            memory_percent=round(rss / total_memory * 100, 2),
+        )
@@ -0,0 +1,97 @@
+"""Per-second rates from cumulative counters (network, disk I/O, per-core CPU)."""
+import fnmatch
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.services.cpu_sampler import _busy_and_total
+
+# Partitions are counted through their parent disk, so skip them to avoid double counting
+PARTITION_RE = re.compile(r"^((?:[shv]|xv)d[a-z]+\d+|(?:nvme\d+n\d+|mmcblk\d+)p\d+)$")
+
+
+def matches_any(name: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+class CounterRates:
+    """Summed per-second rates of cumulative counters across many devices.
+
+    Each update takes {device: (counter, counter, ...)} with the same
+    columns for every device. All devices are flattened into one list and
+    differenced against the previous flat list in a single pass, then
+    summed per column with strided slices - no per-device bookkeeping in
+    the common case where the device set is unchanged.
+
+    A device that appears (hot-plug) contributes nothing until its second
+    sample, and a counter that goes backwards (wrap or device reset)
+    contributes zero for that interval, so neither shows up as a spike.
+    """
+
+    def __init__(self, columns: int):
+        self.columns = columns
+        self._keys: Optional[Sequence[str]] = None
+        self._values: List[float] = []
+        self._time = 0.0
+        self._rates = [0.0] * columns
+        self._lock = threading.Lock()
+        self.clock = time.monotonic
+
+    def update(self, counters: Dict[str, Sequence[float]], now: Optional[float] = None) -> List[float]:
+        """Record a sample; returns the per-second rate of each column since the last one."""
+        now = self.clock() if now is None else now
+        keys = tuple(counters)
+        values = [float(v) for key in keys for v in counters[key]]
+        with self._lock:
+            if self._keys is None:
+                previous = None
+            elif keys == self._keys:
+                previous = self._values
+            else:
+                previous = self._realign(keys, values)
+            elapsed = now - self._time
+            self._keys, self._values, self._time = keys, values, now
+            if previous is None or elapsed <= 0:
+                return list(self._rates)
+            deltas = [c - p if c >= p else 0.0 for c, p in zip(values, previous)]
+            k = self.columns
+            self._rates = [sum(deltas[i::k]) / elapsed for i in range(k)]
+            return list(self._rates)
+
+    def _realign(self, keys: Sequence[str], values: List[float]) -> List[float]:
+        """Previous values laid out like keys; new devices use their current values."""
+        k = self.columns
+        old = {key: self._values[i * k:(i + 1) * k] for i, key in enumerate(self._keys)}
+        previous: List[float] = []
+        for i, key in enumerate(keys):
+            previous.extend(old.get(key) or values[i * k:(i + 1) * k])
+        return previous
+
+
+class PerCoreUsage:
+    """Per-core CPU utilization from per-core cumulative CPU time deltas."""
+
+    def __init__(self):
+        self._busy: List[float] = []
+        self._total: List[float] = []
+        self._percent: List[float] = []
+        self._lock = threading.Lock()
+
+    def update(self, per_core_times: Sequence) -> List[float]:
+        """Return utilization (0-100) per core since the previous update."""
+        pairs = [_busy_and_total(t) for t in per_core_times]
+        busy = [b for b, _ in pairs]
+        total = [t for _, t in pairs]
+        with self._lock:
+            if len(busy) == len(self._busy):
+                self._percent = [
+                    round(min(100.0, max(0.0, (b - pb) / (t - pt) * 100)), 2) if t > pt else last
+                    for b, t, pb, pt, last in zip(busy, total, self._busy, self._total,
+                                                  self._percent or [0.0] * len(busy))
+                ]
+            else:
+                # First sample or cores went on/offline - start a new baseline
+                self._percent = [0.0] * len(busy)
+            self._busy, self._total = busy, total
+            return list(self._percent)
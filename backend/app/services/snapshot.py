@@ -0,0 +1,85 @@
+"""Shared latest-stats snapshot with single-flight collection."""
+import asyncio
+import os
+import time
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from app.services.encoding import dumps
+
+T = TypeVar("T")
+
+# Maximum age (seconds) of a cached snapshot before REST readers trigger a refresh.
+# The background broadcaster publishes every tick (1 second), so readers normally never collect.
+STATS_MAX_AGE = float(os.environ.get('STATS_MAX_AGE', '5'))
+
+
+class StatsSnapshot(Generic[T]):
+    """Hold the most recent stats (e.g. SystemStats) and share collections between readers.
+
+    The background collector publishes every snapshot it takes; readers get
+    the cached copy while it is younger than ``max_age``. When it is stale,
+    concurrent readers await one shared in-flight collection instead of each
+    starting their own, so collection cost does not grow with reader count.
+    """
+
+    def __init__(self, collect: Callable[[], T], max_age: float = STATS_MAX_AGE):
+        self._collect = collect
+        self.max_age = max_age
+        self._stats: Optional[T] = None
+        self._updated_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self._encoded: Optional[Tuple[T, bytes]] = None
+        self.collections = 0
+
+    @property
+    def latest(self) -> Optional[T]:
+        """Most recently published stats, regardless of age."""
+        return self._stats
+
+    def age(self) -> float:
+        """Seconds since the snapshot was last published (inf if never)."""
+        if self._stats is None:
+            return float("inf")
+        return time.monotonic() - self._updated_at
+
+    def publish(self, stats: T):
+        """Store a freshly collected snapshot."""
+        self._stats = stats
+        self._updated_at = time.monotonic()
+
+    def encode(self, stats: T) -> bytes:
+        """JSON encoding of stats, written once per snapshot and shared by every reader."""
+        if self._encoded is None or self._encoded[0] is not stats:
+            self._encoded = (stats, dumps(stats))
+        return self._encoded[1]
+
+    def clear(self):
+        """Drop the cached snapshot (and any in-flight collection) so the next reader collects."""
+        self._stats = None
+        self._updated_at = 0.0
+        self._inflight = None
+        self._encoded = None
+
+    async def get(self) -> T:
+        """Return the cached snapshot, refreshing it only if older than max_age."""
+        if self._stats is not None and self.age() <= self.max_age:
+            return self._stats
+        return await self.refresh()
+
+    async def refresh(self) -> T:
+        """Collect a new snapshot, joining a collection already in flight."""
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._run_collection())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shield so one cancelled reader does not cancel the shared collection
+        return await asyncio.shield(self._inflight)
+
+    async def _run_collection(self) -> T:
+        self.collections += 1
+        stats = await asyncio.to_thread(self._collect)
+        self.publish(stats)
+        return stats
+
+    def _clear_inflight(self, task: asyncio.Task):
+        if self._inflight is task:
+            self._inflight = None
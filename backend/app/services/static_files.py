@@ -0,0 +1,172 @@
+"""Precompressed, cache-friendly serving of the built frontend (frontend/dist)."""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi.responses import FileResponse, Response
+
+try:  # Optional: brotli is used when installed, gzip otherwise
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files larger than this (bytes) are streamed from disk instead of being held in memory
+STATIC_MEMORY_LIMIT = int(os.environ.get('STATIC_MEMORY_LIMIT', str(1024 * 1024)))
+
+# Text formats worth compressing (images and fonts are already compressed)
+COMPRESSIBLE_SUFFIXES = {'.html', '.js', '.mjs', '.css', '.svg', '.json', '.map', '.txt', '.xml', '.webmanifest', '.ico'}
+# Vite names built assets <name>-<content hash>.<ext>; their content never changes under that name
+HASHED_ASSET_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Encodings in order of preference
+ENCODINGS = ("br", "gzip")
+_SUFFIX = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "br":
+        return brotli.compress(data, quality=11) if brotli is not None else None
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def accepted_encodings(header: str) -> List[str]:
+    """Content codings the client accepts (q > 0), from an Accept-Encoding header."""
+    accepted = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name.strip():
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class StaticFile:
+    """One built file: its encodings (in memory or on disk), ETag and cache policy."""
+
+    def __init__(self, path: Path, url_path: str):
+        self.path = path
+        self.url_path = url_path
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.cache_control = IMMUTABLE if HASHED_ASSET_RE.match(url_path) else REVALIDATE
+        self.compressible = path.suffix in COMPRESSIBLE_SUFFIXES
+        self.stat = path.stat()
+        self.in_memory = self.stat.st_size <= STATIC_MEMORY_LIMIT
+        self.body: Optional[bytes] = None
+        self.variants: Dict[str, bytes] = {}  # encoding -> compressed body
+
+        data = path.read_bytes()
+        self.size = len(data)
+        self.etag = '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+        if self.in_memory:
+            self.body = data
+        if self.compressible:
+            for encoding in ENCODINGS:
+                self._add_variant(encoding, self._precompressed(encoding))
+
+    def _precompressed(self, encoding: str) -> Optional[bytes]:
+        """A .br/.gz sibling written by the frontend build, if any."""
+        sibling = self.path.with_name(self.path.name + _SUFFIX[encoding])
+        return sibling.read_bytes() if sibling.is_file() else None
+
+    def _add_variant(self, encoding: str, variant: Optional[bytes]):
+        # Only worth it (and worth the memory) if clearly smaller
+        if variant is not None and len(variant) < self.size * 0.9:
+            self.variants[encoding] = variant
+
+    def compress(self):
+        """Compress the encodings the build did not provide (blocking).
+
+        Until this runs the file is served as is; variants are only ever
+        added, so it can run on a worker thread while requests are served.
+        """
+        missing = [e for e in ENCODINGS if e not in self.variants] if self.compressible else []
+        if not missing:
+            return
+        data = self.body if self.body is not None else self.path.read_bytes()
+        for encoding in missing:
+            self._add_variant(encoding, _compress(data, encoding))
+
+    def encoding_for(self, accept_encoding: str) -> Optional[str]:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return None
+
+    def response(self, accept_encoding: str = "", if_none_match: str = "") -> Response:
+        """The file in the best encoding the client accepts, or 304 if its copy is current."""
+        encoding = self.encoding_for(accept_encoding)
+        # Each encoding is a different representation, so it gets its own ETag
+        etag = self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.compressible:
+            headers["Vary"] = "Accept-Encoding"
+
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+        if self.body is not None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        return FileResponse(self.path, media_type=self.media_type, headers=headers, stat_result=self.stat)
+
+
+class StaticIndex:
+    """Every file of the built frontend, read and hashed once at startup.
+
+    Requests are then a dict lookup and a byte copy: no filesystem access per
+    request, nothing compressed on the fly, and browsers revalidate with
+    If-None-Match (304) or, for content-hashed assets, never ask again.
+    Compressed variants come from the build's .gz/.br files; any that are
+    missing are made by compress(), which runs in the background after
+    startup rather than delaying it.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.files: Dict[str, StaticFile] = {}
+        self.index: Optional[StaticFile] = None
+
+    def load(self):
+        """Index every file under root, without compressing (blocking; run once at startup)."""
+        files = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or path.suffix in (".gz", ".br"):
+                continue
+            url_path = path.relative_to(self.root).as_posix()
+            files[url_path] = StaticFile(path, url_path)
+        self.files = files
+        self.index = files.get("index.html")
+        print(f"✓ Indexed {len(files)} frontend file(s), {self._memory() / 1024:.0f} KB in memory")
+
+    def compress(self):
+        """Compress every file the build did not precompress (blocking; run in the background)."""
+        for static_file in list(self.files.values()):
+            static_file.compress()
+        compressor = "brotli and gzip" if brotli is not None else "gzip"
+        print(f"✓ Compressed frontend files ({compressor}), {self._memory() / 1024:.0f} KB in memory")
+
+    def _memory(self) -> int:
+        return sum(len(f.body or b"") + sum(len(v) for v in f.variants.values()) for f in self.files.values())
+
+    def lookup(self, url_path: str) -> Optional[StaticFile]:
+        """The file for a request path; unknown non-asset paths get index.html (SPA routes)."""
+        found = self.files.get(url_path)
+        if found is not None or url_path.startswith("assets/"):
+            return found
+        return self.index
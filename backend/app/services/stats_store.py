@@ -0,0 +1,248 @@
+"""Durable time-series storage of SystemStats with batched writes and compaction."""
+import asyncio
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, cast, delete, func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.database import run_in_db
+from app.models import StatsSample, SystemStats
+from app.services.history import numeric_fields, to_epoch
+from app.services.timings import timings
+
+# Write-behind batching: one transaction per HISTORY_BATCH_SIZE samples or
+# HISTORY_FLUSH_INTERVAL seconds, whichever comes first
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', '30'))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', '60'))
+# Samples kept for retry while writes fail (e.g. database locked); oldest dropped first
+HISTORY_BUFFER_LIMIT = int(os.environ.get('HISTORY_BUFFER_LIMIT', '3600'))
+
+# Retention: raw rows -> 5-minute rollups -> 1-hour rollups -> deleted
+HISTORY_RAW_RETENTION_HOURS = float(os.environ.get('HISTORY_RAW_RETENTION_HOURS', '24'))
+HISTORY_ROLLUP_RETENTION_DAYS = float(os.environ.get('HISTORY_ROLLUP_RETENTION_DAYS', '30'))
+HISTORY_RETENTION_DAYS = float(os.environ.get('HISTORY_RETENTION_DAYS', '365'))
+HISTORY_COMPACT_INTERVAL = float(os.environ.get('HISTORY_COMPACT_INTERVAL', '3600'))
+
+# Metric columns shared by SystemStats and the stats_sample table
+SAMPLE_COLUMNS = [name for name in numeric_fields(SystemStats) if name in StatsSample.model_fields]
+
+# Maximum number of points returned by an automatically bucketed query
+MAX_QUERY_POINTS = 1000
+
+# Rows are compacted one window at a time to keep transactions short
+COMPACT_WINDOW = 24 * 60 * 60
+
+_table = StatsSample.__table__
+
+
+def compaction_levels() -> List[Tuple[int, int, float]]:
+    """(source resolution, target resolution, max age seconds) per compaction step."""
+    return [
+        (0, 300, HISTORY_RAW_RETENTION_HOURS * 3600),
+        (300, 3600, HISTORY_ROLLUP_RETENTION_DAYS * 86400),
+    ]
+
+
+def stats_to_row(stats: SystemStats) -> Dict:
+    """Convert a SystemStats snapshot into a raw stats_sample row."""
+    row = {name: float(getattr(stats, name)) for name in SAMPLE_COLUMNS}
+    row["ts"] = to_epoch(stats.timestamp)
+    row["resolution"] = 0
+    row["samples"] = 1
+    return row
+
+
+def _rollup(rows: Sequence, step: int) -> List[Dict]:
+    """Fold rows (ordered by ts) into sample-weighted means per step bucket."""
+    buckets: Dict[float, Dict] = {}
+    for row in rows:
+        bucket = row.ts - row.ts % step
+        agg = buckets.get(bucket)
+        if agg is None:
+            agg = buckets[bucket] = {name: 0.0 for name in SAMPLE_COLUMNS}
+            agg["ts"] = bucket
+            agg["resolution"] = step
+            agg["samples"] = 0
+        weight = row.samples
+        for name in SAMPLE_COLUMNS:
+            agg[name] += getattr(row, name) * weight
+        agg["samples"] += weight
+    for agg in buckets.values():
+        for name in SAMPLE_COLUMNS:
+            agg[name] /= agg["samples"]
+    return list(buckets.values())
+
+
+def write_rows(engine: Engine, rows: List[Dict]):
+    """Insert rows in a single transaction (executemany)."""
+    if rows:
+        with timings.time("db.history_write"), engine.begin() as conn:
+            conn.execute(insert(_table), rows)
+
+
+def query_samples(engine: Engine, start: float, end: float, step: Optional[int] = None) -> Dict:
+    """Return stored history between two Unix timestamps, column-oriented.
+
+    Raw rows and rollups never overlap (compaction deletes what it rolls up),
+    so all resolutions in range are read through the ts index and bucketed
+    to ``step`` seconds in SQL, as sample-weighted means. Without a step, one
+    is chosen so the result has at most MAX_QUERY_POINTS points.
+    """
+    if step is None:
+        step = max(2, math.ceil((end - start) / MAX_QUERY_POINTS))
+    # Integer bucket start (SQLite's % truncates its operands to integers)
+    whole_ts = cast(_table.c.ts, Integer)
+    bucket = (whole_ts - whole_ts % step).label("bucket")
+    weight = func.sum(_table.c.samples)
+    stmt = (
+        select(bucket, *[
+            (func.sum(_table.c[name] * _table.c.samples) / weight).label(name)
+            for name in SAMPLE_COLUMNS
+        ])
+        .where(_table.c.ts >= start, _table.c.ts <= end)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    with engine.connect() as conn:
+        points = conn.execute(stmt).all()
+    return {
+        "step": step,
+        "from": start,
+        "to": end,
+        "timestamps": [float(p.bucket) for p in points],
+        "metrics": {name: [float(getattr(p, name)) for p in points] for name in SAMPLE_COLUMNS},
+    }
+
+
+def compact(engine: Engine, now: Optional[float] = None) -> int:
+    """Roll old rows up into coarser rows and apply final retention.
+
+    Returns the number of source rows removed.
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    for source, target, max_age in compaction_levels():
+        # Only roll up whole target buckets so none is split across runs
+        cutoff = now - max_age
+        cutoff -= cutoff % target
+        with engine.connect() as conn:
+            oldest = conn.execute(
+                select(_table.c.ts)
+                .where(_table.c.resolution == source, _table.c.ts < cutoff)
+                .order_by(_table.c.ts)
+                .limit(1)
+            ).scalar()
+        if oldest is None:
+            continue
+        window_start = oldest - oldest % target
+        while window_start < cutoff:
+            window_end = min(window_start + COMPACT_WINDOW, cutoff)
+            in_window = (
+                (_table.c.resolution == source)
+                & (_table.c.ts >= window_start)
+                & (_table.c.ts < window_end)
+            )
+            with engine.begin() as conn:
+                rows = conn.execute(select(_table).where(in_window).order_by(_table.c.ts)).all()
+                if rows:
+                    conn.execute(insert(_table), _rollup(rows, target))
+                    conn.execute(delete(_table).where(in_window))
+                    removed += len(rows)
+            window_start = window_end
+
+    # Final retention for the coarsest rollups
+    with engine.begin() as conn:
+        result = conn.execute(delete(_table).where(_table.c.ts < now - HISTORY_RETENTION_DAYS * 86400))
+        removed += result.rowcount or 0
+    return removed
+
+
+class StatsWriter:
+    """Write-behind buffer that persists samples in batches off the event loop."""
+
+    def __init__(self, engine: Engine, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval: float = HISTORY_FLUSH_INTERVAL,
+                 buffer_limit: int = HISTORY_BUFFER_LIMIT):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_limit = buffer_limit
+        self._buffer: List[Dict] = []
+        self._batch_ready: Optional[asyncio.Event] = None  # Created by run() on its loop
+        self.rows_written = 0
+        self.rows_dropped = 0
+
+    def add(self, stats: SystemStats):
+        """Queue a sample for the next batch (never blocks)."""
+        self._buffer.append(stats_to_row(stats))
+        self._trim()
+        if len(self._buffer) >= self.batch_size and self._batch_ready is not None:
+            self._batch_ready.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _trim(self):
+        """Drop the oldest samples beyond buffer_limit (only while writes are failing)."""
+        overflow = len(self._buffer) - self.buffer_limit
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.rows_dropped += overflow
+
+    async def flush(self):
+        """Write all buffered samples in one transaction.
+
+        If the write fails the samples go back to the front of the buffer
+        (keeping at most buffer_limit, newest first) for the next flush.
+        """
+        rows, self._buffer = self._buffer, []
+        if self._batch_ready is not None:
+            self._batch_ready.clear()
+        if not rows:
+            return
+        try:
+            await run_in_db(write_rows, self.engine, rows)
+        except BaseException:
+            # Samples added while the write was running stay after the older ones
+            self._buffer = rows + self._buffer
+            self._trim()
+            raise
+        self.rows_written += len(rows)
+
+    async def run(self):
+        """Background task: flush on a full batch or every flush_interval seconds."""
+        print("✓ Started stats history writer")
+        self._batch_ready = asyncio.Event()
+        try:
+            while True:
+                # asyncio.timeout, unlike wait_for on 3.11, never swallows a
+                # cancellation that races with the event being set
+                try:
+                    async with asyncio.timeout(self.flush_interval):
+                        await self._batch_ready.wait()
+                except TimeoutError:
+                    pass
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"⚠ Error writing stats history: {e}")
+        finally:
+            # Persist what is left on shutdown
+            if self._buffer:
+                write_rows(self.engine, self._buffer)
+                self._buffer = []
+
+
+async def run_compaction(engine: Engine, interval: float = HISTORY_COMPACT_INTERVAL):
+    """Background task: periodically compact the stats history table."""
+    while True:
+        try:
+            removed = await run_in_db(compact, engine)
+            if removed:
+                print(f"✓ Compacted {removed} stats history row(s)")
+        except Exception as e:
+            print(f"⚠ Error compacting stats history: {e}")
+        await asyncio.sleep(interval)
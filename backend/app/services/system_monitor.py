@@ -2,97 +2,191 @@
 import psutil
 import docker
 import os
-from datetime import datetime
-from typing import Dict, Any
-from app.models import SystemStats
+from typing import Dict, Any, List, Optional
+from app.models import ContainerStats, SystemStats
+from app.services.collectors import Collector, CollectorRegistry, build_stats
+from app.services.container_stats import ContainerStatsCollector
+from app.services.cpu_sampler import CpuSampler
+from app.services.disks import DiskMonitor
+from app.services.docker_connection import DOCKER_CONNECT_WAIT, DockerConnection
+from app.services.docker_events import ContainerIndex
+from app.services.processes import ProcessTable
+from app.services.rates import PARTITION_RE, CounterRates, PerCoreUsage, matches_any
+from app.services.timings import timings
 
-# Host disk path - can be overridden via environment variable
+# Primary host disk path (the disk_* fields) - can be overridden via environment variable
 # For Unraid: mount /mnt/user to /host/mnt/user and set DISK_PATH=/host/mnt/user
+# More mountpoints can be added with DISK_PATHS (see app.services.disks)
 DISK_PATH = os.environ.get('DISK_PATH', '/')
 
+# Network interfaces and block devices left out of the throughput totals
+# (loopback, and virtual interfaces whose traffic is already counted on a physical NIC)
+NET_EXCLUDE = os.environ.get('NET_EXCLUDE', 'lo,veth*,docker*,br-*').split(',')
+DISK_IO_EXCLUDE = os.environ.get('DISK_IO_EXCLUDE', 'loop*,ram*,zram*,dm-*,md*').split(',')
+
 
 class SystemMonitor:
     """Monitor system metrics (CPU, RAM, disk, Docker)."""
     
     def __init__(self):
-        """Initialize Docker client."""
+        """Initialize samplers and collectors (Docker connects lazily, see DockerConnection)."""
+        # Delta-based CPU sampler - never sleeps, unlike cpu_percent(interval=1)
+        self.cpu_sampler = CpuSampler()
+        self.core_usage = PerCoreUsage()
+        self.net_rates = CounterRates(columns=2)
+        self.disk_io_rates = CounterRates(columns=4)
+        self.process_table = ProcessTable()
+        self.disk_monitor = DiskMonitor(DISK_PATH)
+        
+        # Metric groups, each refreshed on its own schedule by a CollectorScheduler
+        self.collectors = CollectorRegistry()
+        self._register_collectors()
+        
         self.docker_client = None
         self.docker_available = False
+        self.api_client = None
+        self.container_index: Optional[ContainerIndex] = None
+        self.container_stats: Optional[ContainerStatsCollector] = None
+        self._watch_containers = False
         
-        try:
-            # Debug: Check environment
-            docker_host_env = os.environ.get('DOCKER_HOST', 'NOT_SET')
-            print(f"🔍 DOCKER_HOST environment: {docker_host_env}")
-            
-            # CRITICAL: Completely bypass DockerClient and use APIClient directly
-            # DockerClient() has internal auto-detection that can fail in containers
-            from docker import APIClient
-            
-            # Create low-level API client with explicit socket and API version
-            # Using 'http+unix://' prefix to trigger Docker SDK's built-in UnixHTTPAdapter
-            # Using version='1.41' (Docker 20.10+) to avoid auto-detection which fails in some envs
-            api_client = APIClient(
-                base_url='http+unix:///var/run/docker.sock',
-                version='1.41',  # Fixed API version (Docker 20.10+), no auto-detect
-                timeout=10
-            )
-            
-            # Test connection
-            version = api_client.version()
-            print(f"✓ Docker API connected - Docker v{version.get('Version', 'unknown')}, API v{version.get('ApiVersion', 'unknown')}")
-            
-            # Store API client for container operations
-            self.api_client = api_client
-            self.docker_available = True
-            
-        except Exception as e:
-            print(f"⚠ Docker API unavailable: {e}")
-            self.api_client = None
-            self.docker_available = False
+        # No Docker calls here: the connection is made in the background when
+        # first needed and retried with backoff
+        print(f"🔍 DOCKER_HOST environment: {os.environ.get('DOCKER_HOST', 'NOT_SET')}")
+        self.docker = DockerConnection(on_connect=self._docker_connected,
+                                       on_disconnect=self._docker_disconnected)
     
-    def get_stats(self) -> SystemStats:
-        """Collect all system statistics."""
-        # CPU usage (averaged over 1 second)
-        cpu_percent = psutil.cpu_percent(interval=1)
-        
-        # Memory usage
+    def _docker_connected(self, api_client):
+        self.api_client = api_client
+        if self.container_stats is None:
+            self.container_stats = ContainerStatsCollector(api_client)
+        self.docker_available = True
+        if self._watch_containers:
+            self._start_index()
+    
+    def _docker_disconnected(self):
+        # The events index reconnects on its own; counts fall back to listing until it resyncs
+        self.docker_available = False
+    
+    def _register_collectors(self):
+        """Register the built-in collectors with their default schedules.
+
+        CPU and memory are cheap and refresh every second; disk usage of a
+        large array barely changes and statvfs can be slow, so it refreshes
+        every 30 seconds with a generous timeout.
+        """
+        self.collectors.register(Collector("cpu", self._collect_cpu, interval=1, timeout=1))
+        self.collectors.register(Collector("memory", self._collect_memory, interval=1, timeout=1))
+        self.collectors.register(Collector("disk", self._collect_disk, interval=30, timeout=10))
+        self.collectors.register(Collector("docker", self._collect_docker, interval=2, timeout=5))
+        self.collectors.register(Collector("cores", self._collect_cores, interval=1, timeout=1))
+        self.collectors.register(Collector("load", self._collect_load, interval=5, timeout=1))
+        self.collectors.register(Collector("network", self._collect_network, interval=2, timeout=2))
+        self.collectors.register(Collector("disk_io", self._collect_disk_io, interval=2, timeout=2))
+        # Walking every host process is the most expensive collection - keep it infrequent
+        self.collectors.register(Collector("processes", self._collect_processes, interval=5, timeout=5,
+                                           in_stats=False))
+    
+    def _collect_cpu(self) -> Dict[str, Any]:
+        # CPU usage since the previous sample (non-blocking)
+        return {"cpu_percent": round(self.cpu_sampler.sample(), 2)}
+    
+    def _collect_memory(self) -> Dict[str, Any]:
         memory = psutil.virtual_memory()
-        memory_percent = memory.percent
-        memory_used_gb = memory.used / (1024 ** 3)
-        memory_total_gb = memory.total / (1024 ** 3)
-        
-        # Disk usage - try configured path, fallback to root
-        try:
-            disk = psutil.disk_usage(DISK_PATH)
-        except (FileNotFoundError, PermissionError):
-            # Fallback to container root if host path not available
-            disk = psutil.disk_usage('/')
-        disk_percent = disk.percent
-        disk_used_gb = disk.used / (1024 ** 3)
-        disk_total_gb = disk.total / (1024 ** 3)
-        
-        # Docker container stats
+        return {
+            "memory_percent": round(memory.percent, 2),
+            "memory_used_gb": round(memory.used / (1024 ** 3), 2),
+            "memory_total_gb": round(memory.total / (1024 ** 3), 2),
+        }
+    
+    def _collect_disk(self) -> Dict[str, Any]:
+        # Every mount is checked in parallel with its own timeout; the primary disk comes first
+        disks = self.disk_monitor.sample()
+        primary = disks[0]
+        return {
+            "disk_percent": primary.percent,
+            "disk_used_gb": primary.used_gb,
+            "disk_total_gb": primary.total_gb,
+            "disks": disks,
+        }
+    
+    def _collect_docker(self) -> Dict[str, Any]:
         docker_stats = self._get_docker_stats()
-        
-        return SystemStats(
-            timestamp=datetime.utcnow(),
-            cpu_percent=round(cpu_percent, 2),
-            memory_percent=round(memory_percent, 2),
-            memory_used_gb=round(memory_used_gb, 2),
-            memory_total_gb=round(memory_total_gb, 2),
-            disk_percent=round(disk_percent, 2),
-            disk_used_gb=round(disk_used_gb, 2),
-            disk_total_gb=round(disk_total_gb, 2),
-            docker_containers_total=docker_stats["total"],
-            docker_containers_running=docker_stats["running"],
-            docker_containers_stopped=docker_stats["stopped"]
-        )
+        return {
+            "docker_containers_total": docker_stats["total"],
+            "docker_containers_running": docker_stats["running"],
+            "docker_containers_stopped": docker_stats["stopped"],
+        }
+    
+    def _collect_cores(self) -> Dict[str, Any]:
+        return {"cpu_per_core": self.core_usage.update(psutil.cpu_times(percpu=True))}
+    
+    def _collect_load(self) -> Dict[str, Any]:
+        load_1, load_5, load_15 = psutil.getloadavg()
+        return {"load_1": round(load_1, 2), "load_5": round(load_5, 2), "load_15": round(load_15, 2)}
+    
+    def _collect_network(self) -> Dict[str, Any]:
+        counters = psutil.net_io_counters(pernic=True) or {}
+        rx, tx = self.net_rates.update({
+            nic: (c.bytes_recv, c.bytes_sent)
+            for nic, c in counters.items() if not matches_any(nic, NET_EXCLUDE)
+        })
+        return {"net_rx_bytes_per_sec": round(rx, 1), "net_tx_bytes_per_sec": round(tx, 1)}
+    
+    def _collect_disk_io(self) -> Dict[str, Any]:
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        read_bytes, write_bytes, reads, writes = self.disk_io_rates.update({
+            disk: (c.read_bytes, c.write_bytes, c.read_count, c.write_count)
+            for disk, c in counters.items()
+            if not PARTITION_RE.match(disk) and not matches_any(disk, DISK_IO_EXCLUDE)
+        })
+        return {
+            "disk_read_bytes_per_sec": round(read_bytes, 1),
+            "disk_write_bytes_per_sec": round(write_bytes, 1),
+            "disk_read_iops": round(reads, 2),
+            "disk_write_iops": round(writes, 2),
+        }
+    
+    def _collect_processes(self) -> Dict[str, Any]:
+        return {"processes": self.process_table.sample()}
+    
+    def get_stats(self) -> SystemStats:
+        """Collect all system statistics at once (every registered collector)."""
+        return build_stats(self.collectors.collect_all())
+    
+    def start_container_watch(self):
+        """Track container states from the Docker events stream instead of polling.
+
+        If Docker isn't connected yet, the index starts once it connects.
+        """
+        self._watch_containers = True
+        if self.docker_available:
+            self._start_index()
+    
+    def _start_index(self):
+        if self.container_index is not None:
+            return
+        self.container_index = ContainerIndex(self.api_client)
+        self.container_index.start()
+        print("✓ Following Docker container events")
+    
+    def stop_container_watch(self):
+        """Stop following Docker events (counts fall back to listing)."""
+        self._watch_containers = False
+        if self.container_index is not None:
+            self.container_index.stop()
+            self.container_index = None
     
     def _get_docker_stats(self) -> Dict[str, int]:
         """Get Docker container statistics."""
-        if not self.docker_available:
+        # Starts connecting in the background if needed; None while Docker is down
+        if self.docker.get(wait=DOCKER_CONNECT_WAIT) is None:
             return {"total": 0, "running": 0, "stopped": 0}
         
+        # O(1) counts from the event-driven index once it has been seeded
+        index = self.container_index
+        if index is not None and index.synced:
+            return index.counts()
+        
         try:
             # Use APIClient.containers() instead of high-level API
             containers = self.api_client.containers(all=True)
@@ -108,8 +202,26 @@ class SystemMonitor:
             }
         except Exception as e:
             print(f"⚠ Error fetching Docker stats: {e}")
+            self.docker.failed(e)
             return {"total": 0, "running": 0, "stopped": 0}
     
+    def get_container_stats(self) -> List[ContainerStats]:
+        """Collect resource usage of every running container."""
+        if self.docker.get(wait=DOCKER_CONNECT_WAIT) is None:
+            return []
+        
+        index = self.container_index
+        if index is not None and index.synced:
+            running = index.running()
+        else:
+            running = [
+                (c['Id'], (c.get('Names') or [''])[0].lstrip('/'))
+                for c in self.api_client.containers()
+                if c.get('State', 'running') == 'running'
+            ]
+        with timings.time("collect.containers"):
+            return self.container_stats.collect(running)
+    
     def get_health_score(self, stats: SystemStats) -> float:
         """
         Calculate health score (0-100) based on system metrics.
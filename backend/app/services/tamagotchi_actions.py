@@ -0,0 +1,65 @@
+"""Atomic Tamagotchi mutations, each a single UPDATE ... RETURNING statement."""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, update
+from sqlmodel import Session, select
+
+from app.models import Tamagotchi
+
+# XP gained and happiness restored per feed
+FEED_XP = 10
+FEED_HAPPINESS = 5
+
+
+def _returning_first(session: Session, statement) -> Optional[Tamagotchi]:
+    """Execute an UPDATE ... RETURNING and commit, keeping the returned row loaded."""
+    tamagotchi = session.exec(statement).scalars().first()
+    if tamagotchi is not None:
+        session.expunge(tamagotchi)  # Committing must not expire it (no reload query)
+    session.commit()
+    return tamagotchi
+
+
+def _first_id():
+    """The Tamagotchi the app works with (the first row)."""
+    return select(Tamagotchi.id).order_by(Tamagotchi.id).limit(1).scalar_subquery()
+
+
+def feed(session: Session) -> Optional[Tamagotchi]:
+    """Feed the Tamagotchi: gain XP and happiness, levelling up every level * 100 XP.
+
+    The increment and the level-up rule run in the database in one statement,
+    so concurrent feeds never lose XP. Returns None if there is no Tamagotchi.
+    """
+    levels_up = Tamagotchi.xp + FEED_XP >= Tamagotchi.level * 100
+    happiness = Tamagotchi.happiness + FEED_HAPPINESS
+    statement = (
+        update(Tamagotchi)
+        .where(Tamagotchi.id == _first_id())
+        .values(
+            xp=case((levels_up, 0), else_=Tamagotchi.xp + FEED_XP),
+            level=case((levels_up, Tamagotchi.level + 1), else_=Tamagotchi.level),
+            happiness=case((happiness > 100, 100.0), else_=happiness),
+            updated_at=datetime.utcnow(),
+        )
+        .returning(Tamagotchi)
+    )
+    return _returning_first(session, statement)
+
+
+def rename(session: Session, name: str) -> Tamagotchi:
+    """Rename the Tamagotchi in one statement, creating it if there is none."""
+    statement = (
+        update(Tamagotchi)
+        .where(Tamagotchi.id == _first_id())
+        .values(name=name, updated_at=datetime.utcnow())
+        .returning(Tamagotchi)
+    )
+    tamagotchi = _returning_first(session, statement)
+    if tamagotchi is None:
+        tamagotchi = Tamagotchi(name=name)
+        session.add(tamagotchi)
+        session.commit()
+        session.refresh(tamagotchi)
+    return tamagotchi
@@ -0,0 +1,174 @@
+"""In-memory Tamagotchi state with dirty tracking and write-behind persistence."""
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.database import run_in_db
+from app.models import Tamagotchi
+from app.services.timings import timings
+
+# Flush dirty state at least this often (seconds)...
+TAMAGOTCHI_FLUSH_INTERVAL = float(os.environ.get('TAMAGOTCHI_FLUSH_INTERVAL', '60'))
+# ...or as soon as health moved this many points from the persisted value
+TAMAGOTCHI_HEALTH_THRESHOLD = float(os.environ.get('TAMAGOTCHI_HEALTH_THRESHOLD', '5'))
+
+# Fields included in broadcasts
+PUBLIC_FIELDS = ("name", "level", "xp", "health", "happiness")
+
+
+class TamagotchiState:
+    """Source of truth for the live Tamagotchi between database flushes.
+
+    The broadcast loop updates health every tick in memory only. Dirty
+    fields are written back with a single UPDATE when health has moved
+    meaningfully, every flush_interval seconds, and on shutdown. Fields
+    changed through the REST API (name, xp, level, happiness) are committed
+    by the API and mirrored here with apply(), on the event loop.
+    """
+
+    def __init__(self, engine: Engine, flush_interval: float = TAMAGOTCHI_FLUSH_INTERVAL,
+                 health_threshold: float = TAMAGOTCHI_HEALTH_THRESHOLD):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.health_threshold = health_threshold
+        self.id: Optional[int] = None
+        self.updated_at: Optional[datetime] = None  # Of the last row applied
+        self.values: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self._persisted_health = 0.0
+        self._flush_due: Optional[asyncio.Event] = None  # Created by run() on its loop
+        self.flushes = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.id is not None
+
+    @property
+    def health(self) -> float:
+        return self.values.get("health", 100.0)
+
+    def load(self):
+        """Read the Tamagotchi row into memory (blocking; call at startup)."""
+        with Session(self.engine) as session:
+            tamagotchi = session.exec(select(Tamagotchi)).first()
+        if tamagotchi is not None:
+            self.apply(tamagotchi)
+            self.values["health"] = tamagotchi.health
+            self._persisted_health = tamagotchi.health
+            self._dirty.clear()
+
+    def apply(self, tamagotchi: Tamagotchi):
+        """Mirror a committed row (e.g. after rename/feed), keeping unflushed health.
+
+        Requests finish in any order, so a row older than the state (less
+        level/XP progress, or as much but an earlier updated_at) is ignored.
+        """
+        if self.id is not None and tamagotchi.id != self.id:
+            return
+        if self.updated_at is not None and self._is_older(tamagotchi):
+            return
+        self.id = tamagotchi.id
+        self.updated_at = tamagotchi.updated_at
+        for field in PUBLIC_FIELDS:
+            if field not in self._dirty:
+                self.values[field] = getattr(tamagotchi, field)
+
+    def _is_older(self, tamagotchi: Tamagotchi) -> bool:
+        # Feeding is the only way level and XP change, and they only move forward
+        current = (self.values.get("level"), self.values.get("xp"), self.updated_at)
+        return (tamagotchi.level, tamagotchi.xp, tamagotchi.updated_at) < current
+
+    def public(self) -> Dict[str, Any]:
+        """Broadcast view of the current state."""
+        return {field: self.values.get(field) for field in PUBLIC_FIELDS}
+
+    def set_health(self, health: float):
+        """Update health in memory; wake the flusher if it moved meaningfully."""
+        if self.values.get("health") == health:
+            return
+        self.values["health"] = health
+        self._dirty.add("health")
+        if abs(health - self._persisted_health) >= self.health_threshold and self._flush_due is not None:
+            self._flush_due.set()
+
+    def is_dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def _take_dirty(self) -> Dict[str, Any]:
+        """Snapshot the dirty fields and start a new dirty set."""
+        if not self._dirty or self.id is None:
+            return {}
+        dirty, self._dirty = self._dirty, set()
+        return {field: self.values[field] for field in dirty}
+
+    def _write(self, values: Dict[str, Any]):
+        """Write a snapshot of fields with one UPDATE (blocking)."""
+        with timings.time("db.tamagotchi_flush"), self.engine.begin() as conn:
+            conn.execute(
+                update(Tamagotchi)
+                .where(Tamagotchi.id == self.id)
+                .values(**values, updated_at=datetime.utcnow())
+            )
+
+    def _written(self, values: Dict[str, Any]):
+        if "health" in values:
+            self._persisted_health = values["health"]
+        self.flushes += 1
+
+    def flush_sync(self):
+        """Write dirty fields with one UPDATE (blocking)."""
+        values = self._take_dirty()
+        if not values:
+            return
+        try:
+            self._write(values)
+        except Exception:
+            self._dirty |= values.keys()  # Retry on the next flush
+            raise
+        self._written(values)
+
+    async def flush(self):
+        """Write dirty fields off the event loop.
+
+        The dirty set is swapped and the values snapshotted here on the loop,
+        so updates made while the write is in flight stay dirty for the next
+        flush instead of being lost.
+        """
+        values = self._take_dirty()
+        if not values:
+            return
+        try:
+            await run_in_db(self._write, values)
+        except Exception:
+            self._dirty |= values.keys()  # Retry on the next flush
+            raise
+        self._written(values)
+
+    async def run(self):
+        """Background task: flush on meaningful change or every flush_interval seconds."""
+        self._flush_due = asyncio.Event()
+        try:
+            while True:
+                # asyncio.timeout, unlike wait_for on 3.11, never swallows a
+                # cancellation that races with the event being set
+                try:
+                    async with asyncio.timeout(self.flush_interval):
+                        await self._flush_due.wait()
+                except TimeoutError:
+                    pass
+                self._flush_due.clear()
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"⚠ Error saving Tamagotchi state: {e}")
+        finally:
+            # Persist the latest state on shutdown
+            try:
+                self.flush_sync()
+            except Exception as e:
+                print(f"⚠ Error saving Tamagotchi state on shutdown: {e}")
@@ -0,0 +1,109 @@
+"""Fixed-bucket latency histograms for timing SysMon's own pipeline stages."""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Upper bounds (seconds) from 50us to 10s, roughly 1-2.5-5 steps; the last bucket is +Inf
+LATENCY_BUCKETS: Sequence[float] = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class LatencyHistogram:
+    """Counts of observations per fixed bucket; quantiles are estimated on read.
+
+    Recording is a bisect and a few integer updates, so timing a stage costs
+    well under a microsecond and nothing is computed unless someone reads it.
+    """
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Count, mean, max and p50/p95/p99 in milliseconds."""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "max_ms": ms(self.max) if self.count else None,
+            "p50_ms": ms(self.quantile(0.50)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+        }
+
+
+class Timings:
+    """Named latency histograms, created on first use."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram(self.bounds))
+        return histogram
+
+    def observe(self, name: str, seconds: float):
+        self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """Time the enclosed block into the named histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def names(self) -> List[str]:
+        return sorted(self.histograms)
+
+    def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Summary of every stage, by name."""
+        return {name: self.histograms[name].summary() for name in self.names()}
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+
+# Process-wide registry used by the collectors, database writers and WebSocket manager
+timings = Timings()
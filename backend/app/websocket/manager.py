@@ -1,55 +1,359 @@
 """WebSocket connection manager for broadcasting system stats."""
 import asyncio
-import json
-from typing import List
+import os
+import time
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
 from fastapi import WebSocket
-from datetime import datetime
+
+from app.services.encoding import SectionCache, dumps, join_object
+from app.services.timings import timings
+from app.websocket.protocol import build_payload, diff_message
+
+# Seconds a single send may take before the client is considered stalled
+WS_SEND_TIMEOUT = float(os.environ.get('WS_SEND_TIMEOUT', '5'))
+# Outbound messages buffered per client; older ones are dropped when full
+WS_QUEUE_SIZE = int(os.environ.get('WS_QUEUE_SIZE', '2'))
+# One-off events (alerts) buffered per client; never dropped - a client this far
+# behind is disconnected instead, and reloads current state when it reconnects
+WS_EVENT_QUEUE_SIZE = int(os.environ.get('WS_EVENT_QUEUE_SIZE', '32'))
+# Delta protocol: send a full keyframe every N stats updates
+WS_KEYFRAME_INTERVAL = int(os.environ.get('WS_KEYFRAME_INTERVAL', '30'))
+# Update interval (seconds) for clients that never subscribe, and allowed range
+WS_DEFAULT_INTERVAL = int(os.environ.get('WS_DEFAULT_INTERVAL', '2'))
+WS_MIN_INTERVAL = 1
+WS_MAX_INTERVAL = 60
+
+# Topics a client receives until it subscribes
+DEFAULT_TOPICS = frozenset({"host", "docker", "tamagotchi"})
+
+GroupKey = Tuple[FrozenSet[str], int]
+# A message as (key, encoded JSON value) pairs, spliced into one object per frame
+EncodedFields = List[Tuple[str, bytes]]
+
+
+class Frame(NamedTuple):
+    """One outbound message, serialized once and shared by all clients.
+
+    Stats updates carry a sequence number and, for delta-protocol clients,
+    an alternative encoding with only the fields changed since ``base``.
+    """
+    full: str
+    delta: Optional[str] = None
+    seq: Optional[int] = None
+    base: Optional[int] = None
+
+
+class EventQueueFull(Exception):
+    """A client fell so far behind that an event (alert) would have been lost."""
+
+
+class ClientConnection:
+    """Bounded outbound queues and writer task for one WebSocket client.
+
+    Broadcasts only append to a queue, so a slow client never delays the
+    others. Stats updates (frames with a seq) go to a small queue that drops
+    the oldest when full (latest wins - every stats update supersedes the
+    previous one). Other messages, such as alerts, are events that nothing
+    supersedes: they go to their own queue, are sent first, and are never
+    dropped.
+    """
+
+    kind = "WebSocket"
+
+    def __init__(self, websocket: WebSocket, queue_size: int = WS_QUEUE_SIZE, delta: bool = False):
+        self.websocket = websocket
+        self.delta = delta
+        self.group: Optional[GroupKey] = None
+        self.last_seq: Optional[int] = None  # Last stats update delivered to this client
+        self.queue: deque = deque(maxlen=queue_size)
+        self.events: deque = deque()
+        self.overflowed = False
+        self.dropped = 0
+        self.sending = False
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def enqueue(self, frame: Frame):
+        """Queue a frame without blocking; stats updates drop the oldest if full."""
+        if frame.seq is None:
+            if len(self.events) >= WS_EVENT_QUEUE_SIZE:
+                self.overflowed = True  # The writer disconnects the client
+            else:
+                self.events.append(frame)
+        else:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(frame)
+        self._wakeup.set()
+
+    def pending(self) -> bool:
+        return bool(self.events or self.queue or self.sending)
+
+    def select(self, frame: Frame) -> str:
+        """Pick the encoding to send: a delta only if it builds on what we delivered."""
+        if self.delta and frame.delta is not None and self.last_seq == frame.base:
+            return frame.delta
+        return frame.full
+
+    async def run(self, send_timeout: float):
+        """Send queued messages until a send fails or times out."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.events or self.queue:
+                if self.overflowed:
+                    raise EventQueueFull(f"more than {WS_EVENT_QUEUE_SIZE} events pending")
+                frame = self.events.popleft() if self.events else self.queue.popleft()
+                self.sending = True
+                try:
+                    # asyncio.timeout, unlike wait_for on 3.11, never swallows a
+                    # cancellation that races with a send completing (shutdown)
+                    with timings.time("ws.send"):
+                        async with asyncio.timeout(send_timeout):
+                            await self.send(frame)
+                finally:
+                    self.sending = False
+                if frame.seq is not None:
+                    self.last_seq = frame.seq
+
+    async def send(self, frame: Frame):
+        await self.websocket.send_text(self.select(frame))
+
+
+class SubscriptionGroup:
+    """Clients sharing the same (topics, interval): one payload per update for all."""
+
+    def __init__(self, topics: FrozenSet[str], interval: int):
+        self.topics = topics
+        self.interval = interval
+        self.clients: Set[ClientConnection] = set()
+        self.previous: Optional[Dict[str, Any]] = None  # Last payload, for deltas
+        self.previous_seq: Optional[int] = None
+        self.updates = 0
 
 
 class ConnectionManager:
-    """Manage WebSocket connections and broadcast messages."""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-    
-    async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection."""
+    """Manage WebSocket connections and broadcast messages.
+
+    Clients are grouped by their subscription (topics, update interval).
+    Each tick, every group that is due gets its payload built, delta-encoded
+    and serialized once, then queued to all of its members. Sections are
+    encoded once per tick for all groups sharing them, and rarely-changing
+    ones (Tamagotchi, processes, ...) only when their value changed.
+    """
+
+    def __init__(self, send_timeout: float = WS_SEND_TIMEOUT, queue_size: int = WS_QUEUE_SIZE,
+                 keyframe_interval: int = WS_KEYFRAME_INTERVAL,
+                 default_topics: Iterable[str] = DEFAULT_TOPICS,
+                 default_interval: int = WS_DEFAULT_INTERVAL):
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.keyframe_interval = keyframe_interval
+        self.default_topics = frozenset(default_topics)
+        self.default_interval = default_interval
+        self.groups: Dict[GroupKey, SubscriptionGroup] = {}
+        self._seq = 0  # Global, so sequence numbers never collide across groups
+        self._dropped_closed = 0  # Messages dropped for clients that have since disconnected
+        self._sections = SectionCache()
+
+    async def connect(self, websocket: WebSocket, delta: bool = False):
+        """Accept new WebSocket connection and start its writer task.
+
+        Clients connecting with delta=True receive stats_delta messages with
+        only the changed fields, after a full stats_update keyframe.
+        """
         await websocket.accept()
-        self.active_connections.append(websocket)
-        print(f"✓ WebSocket connected. Total connections: {len(self.active_connections)}")
-    
+        self.add(ClientConnection(websocket, self.queue_size, delta=delta))
+
+    def add(self, client: ClientConnection, key: Optional[GroupKey] = None):
+        """Register an accepted client (any transport) and start its writer task.
+
+        The client joins the group for key, or the default subscription.
+        """
+        client.task = asyncio.create_task(self._write(client))
+        self.active_connections[client.websocket] = client
+        self._join(client, key or (self.default_topics, self.default_interval))
+        print(f"✓ {client.kind} connected. Total connections: {len(self.active_connections)}")
+
     def disconnect(self, websocket: WebSocket):
-        """Remove WebSocket connection."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            print(f"✗ WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
+        """Remove WebSocket connection and stop its writer task."""
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+        self._leave(client)
+        self._dropped_closed += client.dropped
+        if client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+        print(f"✗ {client.kind} disconnected. Total connections: {len(self.active_connections)}")
+
+    def group_key(self, topics: Iterable[str], interval: float) -> GroupKey:
+        """The subscription group for topics and an interval clamped to the allowed range."""
+        return frozenset(topics), int(min(WS_MAX_INTERVAL, max(WS_MIN_INTERVAL, round(interval))))
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str], interval: float) -> GroupKey:
+        """Move a client to the group for (topics, interval); returns the effective key."""
+        client = self.active_connections.get(websocket)
+        key = self.group_key(topics, interval)
+        if client is not None and client.group != key:
+            self._leave(client)
+            self._join(client, key)
+            client.last_seq = None  # New payload shape - start with a keyframe
+        return key
+
+    def _join(self, client: ClientConnection, key: GroupKey):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = SubscriptionGroup(*key)
+        group.clients.add(client)
+        client.group = key
+
+    def _leave(self, client: ClientConnection):
+        group = self.groups.get(client.group)
+        if group is not None:
+            group.clients.discard(client)
+            if not group.clients:
+                del self.groups[client.group]
+        client.group = None
+
+    def subscribed_topics(self) -> Set[str]:
+        """Union of the topics any connected client is subscribed to."""
+        topics: Set[str] = set()
+        for topic_set, _ in self.groups:
+            topics |= topic_set
+        return topics
+
+    async def _write(self, client: ClientConnection):
+        try:
+            await client.run(self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(f"⚠ {client.kind} stalled for {self.send_timeout}s, disconnecting")
+            self.disconnect(client.websocket)
+            await self._close(client.websocket)
+        except EventQueueFull as e:
+            print(f"⚠ {client.kind} too far behind ({e}), disconnecting")
+            self.disconnect(client.websocket)
+            await self._close(client.websocket)
+        except Exception as e:
+            print(f"⚠ Error broadcasting to client: {e}")
+            self.disconnect(client.websocket)
+
+    async def _close(self, websocket: WebSocket):
+        """Best-effort close of a stalled connection (it may never complete)."""
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), timeout=self.send_timeout)
+        except Exception:
+            pass
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send message to specific client."""
         try:
-            await websocket.send_text(message)
+            await asyncio.wait_for(websocket.send_text(message), timeout=self.send_timeout)
         except Exception as e:
             print(f"⚠ Error sending personal message: {e}")
             self.disconnect(websocket)
-    
+
+    def request_keyframe(self, websocket: WebSocket):
+        """Make the next stats update for this client a full keyframe."""
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            client.last_seq = None
+
+    def _encode_payload(self, payload: Dict[str, Any], sections: Dict[str, Any],
+                        encoded: Dict[str, bytes]) -> EncodedFields:
+        """Encode a payload's sections, reusing encodings given for unfiltered sections."""
+        started = time.perf_counter()
+        fields = []
+        for key, value in payload.items():
+            if key in encoded and value is sections.get(key):
+                fields.append((key, encoded[key]))
+            elif key in ("type", "stats"):
+                # Stats change every tick (and are filtered per topic set) - nothing to reuse
+                fields.append((key, dumps(value)))
+            else:
+                fields.append((key, self._sections.encode(key, value)))
+        timings.observe("ws.encode", time.perf_counter() - started)
+        return fields
+
+    def _group_frame(self, group: SubscriptionGroup, payload: Dict[str, Any],
+                     fields: Optional[EncodedFields] = None) -> Frame:
+        """Number a group's update and, unless a keyframe is due, encode its delta.
+
+        fields is the payload already encoded (shared by the groups with the
+        same topics); only the sequence number is added per group.
+        """
+        if fields is None:
+            fields = [(key, dumps(value)) for key, value in payload.items()]
+        self._seq += 1
+        seq = self._seq
+        group.updates += 1
+        message = {**payload, "seq": seq}
+        started = time.perf_counter()
+        delta_json = None
+        keyframe_due = self.keyframe_interval <= 1 or group.updates % self.keyframe_interval == 0
+        if (group.previous is not None and not keyframe_due
+                and any(c.delta for c in group.clients)):
+            delta = {"type": "stats_delta", "seq": seq, "base": group.previous_seq}
+            delta.update(diff_message(group.previous, message))
+            delta_json = dumps(delta).decode()
+        base = group.previous_seq
+        group.previous, group.previous_seq = message, seq
+        full = join_object([*fields, ("seq", dumps(seq))]).decode()
+        frame = Frame(full, delta_json, seq, base)
+        timings.observe("ws.serialize", time.perf_counter() - started)
+        return frame
+
+    async def publish(self, sections: Dict[str, Any], tick: int,
+                      encoded: Optional[Dict[str, bytes]] = None):
+        """Queue a stats update to every group whose interval divides tick.
+
+        sections holds the full data for this tick (stats, tamagotchi, ...);
+        each due group gets the subset matching its topics. encoded may hold
+        JSON already written for some sections (e.g. the stats snapshot also
+        served over REST), used wherever a group gets that section unfiltered.
+        """
+        started = time.perf_counter()
+        payloads: Dict[FrozenSet[str], Tuple[Dict[str, Any], EncodedFields]] = {}
+        for group in list(self.groups.values()):
+            if tick % group.interval:
+                continue
+            entry = payloads.get(group.topics)
+            if entry is None:
+                payload = build_payload(sections, group.topics)
+                entry = payloads[group.topics] = (payload, self._encode_payload(payload, sections, encoded or {}))
+            frame = self._group_frame(group, *entry)
+            for client in group.clients:
+                client.enqueue(frame)
+        timings.observe("ws.publish", time.perf_counter() - started)
+
     async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients."""
-        # Convert dict to JSON string
-        message_json = json.dumps(message, default=str)
-        
-        # Send to all connections, remove dead ones
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                print(f"⚠ Error broadcasting to client: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
-    
+        """Queue message for all connected clients (serialized once, never blocks)."""
+        frame = Frame(dumps(message).decode())
+        for client in self.active_connections.values():
+            client.enqueue(frame)
+
+    async def drain(self):
+        """Wait until every client's queue has been sent (or the client dropped)."""
+        while any(c.pending() for c in self.active_connections.values()):
+            await asyncio.sleep(0)
+
+    async def shutdown(self):
+        """Stop every writer task (used on application shutdown)."""
+        clients = list(self.active_connections.values())
+        self.active_connections.clear()
+        self.groups.clear()
+        for client in clients:
+            if client.task is not None:
+                client.task.cancel()
+        await asyncio.gather(*(c.task for c in clients if c.task is not None), return_exceptions=True)
+
+    def dropped_messages(self) -> int:
+        """Total messages dropped for slow clients since startup."""
+        return self._dropped_closed + sum(c.dropped for c in self.active_connections.values())
+
     def get_connection_count(self) -> int:
         """Get number of active connections."""
         return len(self.active_connections)
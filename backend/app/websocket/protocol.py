@@ -0,0 +1,71 @@
+"""Topic filtering and delta encoding of stats_update messages."""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Message envelope keys that are not payload sections
+ENVELOPE_KEYS = {"type", "seq", "base"}
+
+# Topics that are fields of the "stats" section (SystemStats), split by prefix
+STATS_TOPICS = {"host", "docker"}
+# Topics that map one-to-one onto a message section of the same name
+SECTION_TOPICS = {"tamagotchi", "containers", "nodes", "processes"}
+TOPICS = STATS_TOPICS | SECTION_TOPICS
+
+
+def normalize_topics(topics: Iterable[str]) -> Tuple[FrozenSet[str], List[str]]:
+    """Split requested topics into (known topics, unknown names)."""
+    requested = set(topics)
+    return frozenset(requested & TOPICS), sorted(requested - TOPICS)
+
+
+def _stats_topic(field: str) -> str:
+    return "docker" if field.startswith("docker_") else "host"
+
+
+def build_payload(sections: Dict[str, Any], topics: FrozenSet[str]) -> Dict[str, Any]:
+    """Build a stats_update message holding only the subscribed topics."""
+    payload: Dict[str, Any] = {"type": "stats_update"}
+    stats = sections.get("stats")
+    if stats is not None and topics >= STATS_TOPICS:
+        payload["stats"] = stats  # Unfiltered - shares the broadcast loop's encoding
+    elif stats is not None and topics & STATS_TOPICS:
+        payload["stats"] = {
+            k: v for k, v in stats.items()
+            if k == "timestamp" or _stats_topic(k) in topics
+        }
+    for topic in sorted(topics & SECTION_TOPICS):
+        if sections.get(topic) is not None:
+            payload[topic] = sections[topic]
+    return payload
+
+_MISSING = object()
+
+
+def diff_message(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the sections/fields of current that differ from previous.
+
+    Dict sections (stats, tamagotchi, nodes) are compared field by field and
+    only changed fields are kept; any other section is sent whole when it
+    changed. What current no longer has is listed under "removed": a section
+    maps to the fields it lost, or to None when the whole section is gone.
+    """
+    changes: Dict[str, Any] = {}
+    removed: Dict[str, Optional[List[str]]] = {}
+    for key, value in current.items():
+        if key in ENVELOPE_KEYS:
+            continue
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            changed = {k: v for k, v in value.items() if old.get(k, _MISSING) != v}
+            if changed:
+                changes[key] = changed
+            gone = [k for k in old if k not in value]
+            if gone:
+                removed[key] = gone
+        elif old != value or key not in previous:
+            changes[key] = value
+    for key in previous:
+        if key not in current and key not in ENVELOPE_KEYS:
+            removed[key] = None
+    if removed:
+        changes["removed"] = removed
+    return changes
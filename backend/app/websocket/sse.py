@@ -0,0 +1,125 @@
+"""Server-Sent Events transport for the broadcast pipeline (/api/stream).
+
+SSE clients are ordinary ConnectionManager clients: they join the same
+subscription groups as WebSocket clients and are queued the same frames,
+built and serialized once per group. Only the last step differs - each
+frame is written as a text/event-stream event, and that encoding is also
+made once per frame and shared by every SSE client that receives it.
+"""
+import asyncio
+import os
+from typing import Dict, Optional
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.websocket.manager import ClientConnection, ConnectionManager, Frame, GroupKey
+
+# Seconds between heartbeat comments on an idle stream (keeps proxies from closing it)
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', '15'))
+# Milliseconds browsers wait before reconnecting a dropped stream
+SSE_RETRY_MS = 3000
+
+# Encoded events kept for reuse: enough for every group's frames of a tick
+EVENT_CACHE_SIZE = 256
+_events: Dict[str, bytes] = {}
+
+
+def encode_event(data: str, event_id: Optional[int] = None) -> bytes:
+    """One SSE event for a JSON message (compact JSON never contains newlines).
+
+    Messages are shared str objects with a cached hash, so clients after the
+    first get the encoded event from a dict lookup.
+    """
+    event = _events.get(data)
+    if event is None:
+        if len(_events) >= EVENT_CACHE_SIZE:
+            _events.clear()
+        head = f"id: {event_id}\n" if event_id is not None else ""
+        event = _events[data] = f"{head}data: {data}\n\n".encode()
+    return event
+
+
+class EventStream:
+    """Write side of one SSE response; stands in for the WebSocket in ConnectionManager."""
+
+    def __init__(self, send: Send):
+        self._send = send
+        self.closed = asyncio.Event()
+
+    async def send_bytes(self, data: bytes):
+        await self._send({"type": "http.response.body", "body": data, "more_body": True})
+
+    async def send_text(self, data: str):
+        await self.send_bytes(data.encode())
+
+    async def close(self, code: int = 1000):
+        self.closed.set()
+
+
+class StreamConnection(ClientConnection):
+    """A ConnectionManager client receiving frames as SSE events; seq is the event id."""
+
+    kind = "SSE client"
+
+    async def send(self, frame: Frame):
+        await self.websocket.send_bytes(encode_event(self.select(frame), frame.seq))
+
+
+class EventStreamResponse(Response):
+    """Stream a manager subscription as text/event-stream until the client leaves.
+
+    last_event_id (the Last-Event-ID header a browser sends when it
+    reconnects) is taken as the last stats update the client has, so a
+    delta client resumes with a delta when it missed nothing and with a
+    keyframe otherwise.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, manager: ConnectionManager, key: Optional[GroupKey] = None,
+                 delta: bool = False, last_event_id: Optional[int] = None,
+                 heartbeat: float = SSE_HEARTBEAT):
+        # Like StreamingResponse: no body, so no Content-Length header
+        self.status_code = 200
+        self.background = None
+        self.init_headers({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        self.manager = manager
+        self.key = key
+        self.delta = delta
+        self.last_event_id = last_event_id
+        self.heartbeat = heartbeat
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        stream = EventStream(send)
+        await stream.send_text(f"retry: {SSE_RETRY_MS}\n\n")
+        client = StreamConnection(stream, self.manager.queue_size, delta=self.delta)
+        client.last_seq = self.last_event_id
+        self.manager.add(client, self.key)
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        closed = asyncio.ensure_future(stream.closed.wait())
+        try:
+            while stream in self.manager.active_connections:
+                done, _ = await asyncio.wait({disconnected, closed}, timeout=self.heartbeat,
+                                           return_when=asyncio.FIRST_COMPLETED)
+                if done:
+                    break
+                # Comment line: ignored by EventSource, but keeps the connection busy
+                await self.manager.send_personal_message(": heartbeat\n\n", stream)
+        finally:
+            client_left = disconnected.done()
+            disconnected.cancel()
+            closed.cancel()
+            self.manager.disconnect(stream)
+        if not client_left:
+            # Dropped by the server (stalled): end the response
+            try:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _wait_for_disconnect(receive: Receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
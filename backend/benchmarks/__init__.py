@@ -0,0 +1,5 @@
+"""Offline benchmarks for SysMon's collection, serialization and broadcast pipeline.
+
+Run from the backend directory: ``python -m benchmarks.run --output results.json``
+and compare two runs with ``python -m benchmarks.compare old.json new.json``.
+"""
@@ -0,0 +1,80 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+
+Exits with status 1 when any compared metric got worse by more than the
+threshold (a fraction of the baseline value).
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Compared metrics and whether a higher value is better; p99/max are too noisy at these sample counts
+METRICS = {
+    "mean_ms": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "full_bytes": False,
+    "delta_bytes": False,
+    "requests_per_sec": True,
+}
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Dotted name -> value for every compared metric in a results tree."""
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif key in METRICS and isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float) -> List[Tuple[str, float, float, Optional[float], bool]]:
+    """(metric, baseline, current, relative change, regressed) for metrics in both runs."""
+    old = flatten(baseline["results"])
+    new = flatten(current["results"])
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name], new[name]
+        change = (after - before) / before if before else None
+        higher_is_better = METRICS[name.rsplit(".", 1)[-1]]
+        worse = change is not None and (-change if higher_is_better else change) > threshold
+        rows.append((name, before, after, change, worse))
+    return rows
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two SysMon benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative change counted as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"{baseline['meta'].get('version')} -> {current['meta'].get('version')}")
+    rows = compare(baseline, current, args.threshold)
+    for name, before, after, change, worse in rows:
+        delta = f"{change:+.1%}" if change is not None else "n/a"
+        flag = "  ⚠ regression" if worse else ""
+        print(f"{name:<45} {before:>12.4f} {after:>12.4f} {delta:>9}{flag}")
+
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f"⚠ {regressions} metric(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
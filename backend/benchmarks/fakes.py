@@ -0,0 +1,139 @@
+"""Fake host, Docker daemon and WebSocket clients, so benchmarks run offline."""
+import asyncio
+import contextlib
+import io
+from collections import namedtuple
+from typing import Iterator, Optional
+from unittest.mock import MagicMock, Mock, patch
+
+GIB = 1024 ** 3
+
+CpuTimes = namedtuple("CpuTimes", ["user", "system", "idle"])
+NetIO = namedtuple("NetIO", ["bytes_recv", "bytes_sent"])
+DiskIO = namedtuple("DiskIO", ["read_bytes", "write_bytes", "read_count", "write_count"])
+
+
+class FakeHost:
+    """Cumulative counters that advance on every read, like a busy host.
+
+    Every call moves the CPU times and I/O counters forward, so the
+    delta-based samplers do the same work as on real hardware.
+    """
+
+    def __init__(self, cores: int = 8, nics: int = 4, disks: int = 4, containers: int = 20):
+        self.cores = cores
+        self.nics = nics
+        self.disks = disks
+        self.containers = containers
+        self.calls = 0
+
+    def cpu_times(self, percpu=False):
+        self.calls += 1
+        n = self.calls
+        if percpu:
+            return [CpuTimes(user=(3.0 + core) * n, system=1.0 * n, idle=(6.0 - core % 6) * n)
+                    for core in range(self.cores)]
+        return CpuTimes(user=45.5 * n, system=4.5 * n, idle=50.0 * n)
+
+    def net_io_counters(self, pernic=False):
+        n = self.calls
+        return {f"eth{i}": NetIO(bytes_recv=125_000 * n * (i + 1), bytes_sent=50_000 * n * (i + 1))
+                for i in range(self.nics)}
+
+    def disk_io_counters(self, perdisk=False):
+        n = self.calls
+        return {f"sd{chr(97 + i)}": DiskIO(read_bytes=4096 * 300 * n, write_bytes=4096 * 120 * n,
+                                            read_count=300 * n, write_count=120 * n)
+                for i in range(self.disks)}
+
+    def api_client(self) -> MagicMock:
+        client = MagicMock()
+        client.version.return_value = {"Version": "24.0.0", "ApiVersion": "1.43"}
+        client.containers.return_value = [
+            {"Id": f"{i:012x}", "Names": [f"/app-{i}"], "State": "running" if i % 4 else "exited"}
+            for i in range(self.containers)
+        ]
+        client.events.return_value = iter(())
+        return client
+
+
+@contextlib.contextmanager
+def fake_host(host: Optional[FakeHost] = None) -> Iterator[FakeHost]:
+    """Patch psutil and the Docker client used by SystemMonitor.
+
+    Must be entered before app.main is imported: it builds its
+    SystemMonitor (and Docker client) at import time.
+    """
+    host = host or FakeHost()
+    prefix = "app.services.system_monitor"
+    patches = [
+        patch(f"{prefix}.psutil.cpu_times", side_effect=host.cpu_times),
+        patch(f"{prefix}.psutil.virtual_memory",
+              return_value=Mock(percent=60.2, used=8 * GIB, total=16 * GIB)),
+        patch(f"{prefix}.psutil.disk_usage",
+              return_value=Mock(percent=70.0, used=700 * GIB, total=1000 * GIB)),
+        patch(f"{prefix}.psutil.getloadavg", return_value=(0.5, 0.75, 1.0)),
+        patch(f"{prefix}.psutil.net_io_counters", side_effect=host.net_io_counters),
+        patch(f"{prefix}.psutil.disk_io_counters", side_effect=host.disk_io_counters),
+        patch("docker.APIClient", return_value=host.api_client()),
+    ]
+    with contextlib.ExitStack() as stack:
+        for p in patches:
+            stack.enter_context(p)
+        yield host
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """Swallow SysMon's per-connection log lines while a benchmark runs."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class Delivery:
+    """Counts messages received by the fast clients of a round."""
+
+    def __init__(self):
+        self.expected = 0
+        self.received = 0
+        self.done = asyncio.Event()
+
+    def expect(self, count: int):
+        self.expected = count
+        self.received = 0
+        self.done.clear()
+        if count == 0:
+            self.done.set()
+
+    def record(self):
+        self.received += 1
+        if self.received >= self.expected:
+            self.done.set()
+
+
+class FakeWebSocket:
+    """In-process stand-in for a WebSocket; a delay makes it a slow consumer."""
+
+    def __init__(self, delay: float = 0.0, delivery: Optional[Delivery] = None):
+        self.delay = delay
+        self.delivery = delivery
+        self.messages = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages += 1
+        self.bytes += len(data)
+        if self.delivery is not None:
+            self.delivery.record()
+
+    async def send_bytes(self, data: bytes):
+        """Server-Sent Events clients write encoded events."""
+        await self.send_text(data)
+
+    async def close(self, code: int = 1000):
+        pass
@@ -0,0 +1,303 @@
+"""Run SysMon's benchmarks and write the results as JSON.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick
+
+Everything runs in-process against a fake host and Docker daemon (see
+benchmarks.fakes) and an in-memory database, so results only depend on
+SysMon's own code and the machine running it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+# Never touch the real database; must be set before app.database is imported
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from benchmarks.fakes import Delivery, FakeWebSocket, fake_host, quiet  # noqa: E402
+
+DEFAULT_CLIENTS = (10, 100, 1000, 5000)
+QUICK_CLIENTS = (10, 100)
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, Any]:
+    """Count, mean, max and p50/p95/p99 (nearest rank) of durations in seconds, in ms."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+    def ms(value: float) -> float:
+        return round(value * 1000, 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": ms(sum(ordered) / len(ordered)),
+        "p50_ms": ms(pct(0.50)),
+        "p95_ms": ms(pct(0.95)),
+        "p99_ms": ms(pct(0.99)),
+        "max_ms": ms(ordered[-1]),
+    }
+
+
+def time_calls(func: Callable[[], Any], iterations: int, warmup: int = 5) -> List[float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def tamagotchi_section() -> Dict[str, Any]:
+    """The Tamagotchi section exactly as the broadcast loop sends it."""
+    from app.models import Tamagotchi
+    from app.services.tamagotchi_state import TamagotchiState
+
+    state = TamagotchiState(engine=None)
+    state.apply(Tamagotchi(id=1, name="Byte", level=3, xp=40, health=87.5, happiness=90.0))
+    return state.public()
+
+
+def broadcast_sections(stats, tamagotchi: Dict[str, Any]) -> Dict[str, Any]:
+    """The sections the broadcast loop publishes for one tick."""
+    return {"stats": stats.model_dump(), "tamagotchi": tamagotchi}
+
+
+def bench_collection(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """SystemMonitor.get_stats: every collector once, on their worker threads."""
+    from app.services.system_monitor import SystemMonitor
+
+    with quiet():
+        monitor = SystemMonitor()
+    return {"collection.get_stats": summarize(time_calls(monitor.get_stats, iterations))}
+
+
+def bench_serialization(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Encoding one stats_update (and its delta) for a subscription group."""
+    from app.services.system_monitor import SystemMonitor
+    from app.websocket.manager import ClientConnection, ConnectionManager, DEFAULT_TOPICS, SubscriptionGroup
+    from app.websocket.protocol import build_payload
+
+    with quiet():
+        monitor = SystemMonitor()
+    tamagotchi = tamagotchi_section()
+    payloads = [
+        build_payload(broadcast_sections(monitor.get_stats(), tamagotchi), DEFAULT_TOPICS)
+        for _ in range(10)
+    ]
+    manager = ConnectionManager()
+    group = SubscriptionGroup(DEFAULT_TOPICS, 1)
+    # One delta client in the group, so the delta encoding is measured too
+    group.clients.add(ClientConnection(FakeWebSocket(), delta=True))
+
+    frames = []
+
+    def encode():
+        payload = payloads[len(frames) % len(payloads)]
+        fields = manager._encode_payload(payload, {}, {})
+        frames.append(manager._group_frame(group, payload, fields))
+
+    samples = time_calls(encode, iterations)
+    full = [len(f.full) for f in frames]
+    deltas = [len(f.delta) for f in frames if f.delta is not None]
+    result = summarize(samples)
+    result["full_bytes"] = round(sum(full) / len(full), 1)
+    result["delta_bytes"] = round(sum(deltas) / len(deltas), 1) if deltas else None
+    return {"serialize.stats_update": result}
+
+
+async def _fanout(clients: int, rounds: int, slow_ratio: float, slow_delay: float,
+                  transport: str = "ws") -> Dict[str, Any]:
+    from app.services.system_monitor import SystemMonitor
+    from app.websocket.manager import ConnectionManager
+    from app.websocket.sse import StreamConnection
+
+    with quiet():
+        monitor = SystemMonitor()
+    stats = monitor.get_stats()
+    tamagotchi = tamagotchi_section()
+
+    # A generous send timeout keeps slow clients connected; they should only drop messages
+    manager = ConnectionManager(send_timeout=60, default_interval=1)
+    delivery = Delivery()
+    slow = int(clients * slow_ratio)
+    with quiet():
+        for i in range(clients):
+            websocket = FakeWebSocket(delay=slow_delay) if i < slow else FakeWebSocket(delivery=delivery)
+            if transport == "sse":
+                manager.add(StreamConnection(websocket, manager.queue_size, delta=True))
+            else:
+                await manager.connect(websocket, delta=True)
+
+    publish, deliver = [], []
+    for tick in range(rounds):
+        sections = broadcast_sections(
+            stats.model_copy(update={"cpu_percent": float(tick % 100)}), tamagotchi
+        )
+        delivery.expect(clients - slow)
+        started = time.perf_counter()
+        await manager.publish(sections, tick)
+        publish.append(time.perf_counter() - started)
+        await delivery.done.wait()
+        deliver.append(time.perf_counter() - started)
+
+    dropped = manager.dropped_messages()
+    with quiet():
+        await manager.shutdown()
+    return {
+        "clients": clients,
+        "slow_clients": slow,
+        "publish": summarize(publish),
+        "deliver": summarize(deliver),
+        "dropped_messages": dropped,
+    }
+
+
+def bench_fanout(client_counts: Sequence[int], rounds: int, slow_ratio: float,
+                 slow_delay: float) -> Dict[str, Dict[str, Any]]:
+    """ConnectionManager.publish to N fake clients, some of them slow.
+
+    publish is the time to queue an update for everyone; deliver is the
+    time until every fast client has sent it. fanout.sse.N runs the same
+    with Server-Sent Events clients, which share the pipeline.
+    """
+    results = {}
+    for n in client_counts:
+        results[f"fanout.{n}"] = asyncio.run(_fanout(n, rounds, slow_ratio, slow_delay))
+        results[f"fanout.sse.{n}"] = asyncio.run(_fanout(n, rounds, slow_ratio, slow_delay, transport="sse"))
+    return results
+
+
+async def _broadcast(clients: int, ticks: int) -> Dict[str, Any]:
+    from app import main
+    from app.services.timings import timings
+
+    with quiet():
+        main.init_db()
+        main.tamagotchi_state.load()
+        for _ in range(clients):
+            await main.manager.connect(FakeWebSocket(), delta=True)
+    timings.reset()
+    task = asyncio.create_task(main.broadcast_system_stats())
+    with quiet():
+        await asyncio.sleep(ticks * main.BROADCAST_TICK + 0.5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await main.manager.shutdown()
+    main.snapshot.clear()
+    return {"clients": clients, **timings.histogram("broadcast.tick").summary()}
+
+
+def bench_broadcast(clients: int, ticks: int) -> Dict[str, Dict[str, Any]]:
+    """The real broadcast_system_stats loop, timed by its own histogram."""
+    return {f"broadcast.tick.{clients}": asyncio.run(_broadcast(clients, ticks))}
+
+
+def bench_rest(requests: int) -> Dict[str, Dict[str, Any]]:
+    """Sequential in-process requests against the app, background tasks running."""
+    from fastapi.testclient import TestClient
+    from app import main
+
+    results = {}
+    with quiet(), TestClient(main.app) as client:
+        for path in ("/api/stats", "/api/tamagotchi"):
+            samples = time_calls(lambda: client.get(path).raise_for_status(), requests)
+            result = summarize(samples)
+            result["requests_per_sec"] = round(len(samples) / sum(samples), 1)
+            results[f"rest.{path}"] = result
+    return results
+
+
+# Imports the app against the fake host in a fresh process, starts it and reports
+# the startup time it measured itself (process start to serving requests)
+_STARTUP_SCRIPT = """
+import os, sys
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+from benchmarks.fakes import fake_host, quiet
+with fake_host():
+    with quiet():
+        from fastapi.testclient import TestClient
+        from app.main import app
+        with TestClient(app) as client:
+            client.get("/api/health")
+    print(app.state.startup_seconds)
+"""
+
+
+def bench_startup(runs: int) -> Dict[str, Dict[str, Any]]:
+    """Time from process start until the app serves requests, in a new process each run."""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], cwd=backend, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return {"startup.ready": summarize(samples)}
+
+
+def metadata(quick: bool) -> Dict[str, Any]:
+    from app.main import VERSION
+
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "quick": quick,
+    }
+
+
+def main(argv: Sequence[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark SysMon's collection and broadcast pipeline")
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and clients (smoke run)")
+    parser.add_argument("--clients", help="Comma-separated fan-out client counts "
+                                          f"(default {','.join(map(str, DEFAULT_CLIENTS))})")
+    parser.add_argument("--slow-ratio", type=float, default=0.1, help="Share of slow clients in fan-out")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="Seconds each slow client takes per send")
+    args = parser.parse_args(argv)
+
+    iterations = 50 if args.quick else 500
+    if args.clients:
+        client_counts = [int(n) for n in args.clients.split(",")]
+    else:
+        client_counts = QUICK_CLIENTS if args.quick else DEFAULT_CLIENTS
+
+    results: Dict[str, Any] = {}
+    with fake_host(), quiet():
+        with quiet():
+            import app.main  # noqa: F401 - builds its SystemMonitor against the fake host
+        results.update(bench_collection(iterations))
+        results.update(bench_serialization(iterations * 4))
+        results.update(bench_fanout(client_counts, rounds=10 if args.quick else 30,
+                                    slow_ratio=args.slow_ratio, slow_delay=args.slow_delay))
+        results.update(bench_broadcast(clients=100, ticks=2 if args.quick else 5))
+        results.update(bench_rest(iterations))
+        results.update(bench_startup(runs=3 if args.quick else 10))
+        report = {"meta": metadata(args.quick), "results": results}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"✓ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
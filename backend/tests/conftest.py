@@ -1,21 +1,27 @@
 """Test configuration and fixtures for SysMon tests."""
 import pytest
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
-from app.database import get_session
-from app.models import Tamagotchi  # Import models before creating tables
+from sqlmodel import Session, SQLModel
+from app.database import create_db_engine, get_session
+from app.models import Tamagotchi, StatsSample  # Import models before creating tables
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path):
+    """Create a test database engine with all tables.
+
+    A file rather than :memory: so, as in production, every database thread
+    gets its own pooled connection (an in-memory database shares one, and
+    concurrent commits on it fail at random).
+    """
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
 
 
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(engine):
     """Create a test database session."""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    SQLModel.metadata.create_all(engine)
-    
     with Session(engine) as session:
         yield session
 
@@ -23,11 +29,28 @@ def session_fixture():
 @pytest.fixture
 def mock_system_monitor(monkeypatch):
     """Mock psutil and docker for testing without host access."""
+    from collections import namedtuple
     from unittest.mock import MagicMock, Mock
     
+    CpuTimes = namedtuple("CpuTimes", ["user", "system", "idle"])
+    
     # Mock psutil
     mock_psutil = MagicMock()
-    mock_psutil.cpu_percent.return_value = 45.5
+    # Cumulative CPU times advance by 45.5s busy / 54.5s idle per call,
+    # so every delta-based sample reports 45.5% utilization
+    cpu_calls = {"count": 0}
+    
+    def cpu_times(percpu=False):
+        if percpu:
+            # Two cores: one idle, one fully busy
+            n = cpu_calls.setdefault("percpu", 0)
+            cpu_calls["percpu"] += 1
+            return [CpuTimes(user=0.0, system=0.0, idle=10.0 * n), CpuTimes(user=10.0 * n, system=0.0, idle=0.0)]
+        n = cpu_calls["count"]
+        cpu_calls["count"] += 1
+        return CpuTimes(user=45.5 * n, system=0.0, idle=54.5 * n)
+    
+    mock_psutil.cpu_times.side_effect = cpu_times
     mock_psutil.virtual_memory.return_value = Mock(
         percent=60.2,
         used=8 * (1024 ** 3),  # 8 GB
@@ -49,15 +72,28 @@ def mock_system_monitor(monkeypatch):
         {"State": "exited", "Id": "jkl012"},
     ]
     mock_api_client.version.return_value = {"Version": "24.0.0"}
+    mock_api_client.stats.return_value = {
+        "name": "/web",
+        "cpu_stats": {"cpu_usage": {"total_usage": 1000}, "system_cpu_usage": 10000, "online_cpus": 2},
+        "memory_stats": {"usage": 512 * (1024 ** 2), "limit": 2048 * (1024 ** 2)},
+        "networks": {"eth0": {"rx_bytes": 100, "tx_bytes": 50}},
+        "blkio_stats": {"io_service_bytes_recursive": []},
+    }
     
     mock_docker = MagicMock()
     # Mock APIClient constructor
     mock_docker.APIClient.return_value = mock_api_client
     
     # Apply mocks - patch modules where they're used
-    monkeypatch.setattr("app.services.system_monitor.psutil.cpu_percent", mock_psutil.cpu_percent)
+    monkeypatch.setattr("app.services.system_monitor.psutil.cpu_times", mock_psutil.cpu_times)
     monkeypatch.setattr("app.services.system_monitor.psutil.virtual_memory", mock_psutil.virtual_memory)
     monkeypatch.setattr("app.services.system_monitor.psutil.disk_usage", mock_psutil.disk_usage)
+    mock_psutil.getloadavg.return_value = (0.5, 0.75, 1.0)
+    mock_psutil.net_io_counters.return_value = {}
+    mock_psutil.disk_io_counters.return_value = {}
+    monkeypatch.setattr("app.services.system_monitor.psutil.getloadavg", mock_psutil.getloadavg)
+    monkeypatch.setattr("app.services.system_monitor.psutil.net_io_counters", mock_psutil.net_io_counters)
+    monkeypatch.setattr("app.services.system_monitor.psutil.disk_io_counters", mock_psutil.disk_io_counters)
     monkeypatch.setattr("app.services.system_monitor.docker.APIClient", mock_docker.APIClient)
     
     return {
@@ -0,0 +1,80 @@
+"""Tests for the headless agent's batching and retry buffer."""
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import requests
+from app.agent import Agent
+from app.models import SystemStats
+
+
+def make_monitor():
+    monitor = MagicMock()
+    monitor.get_stats.return_value = SystemStats(
+        timestamp=datetime(2026, 1, 1), cpu_percent=10.0, memory_percent=50.0,
+        memory_used_gb=8.0, memory_total_gb=16.0, disk_percent=40.0,
+        disk_used_gb=400.0, disk_total_gb=1000.0, docker_containers_total=2,
+        docker_containers_running=1, docker_containers_stopped=1
+    )
+    return monitor
+
+
+def make_agent(**kwargs):
+    session = MagicMock()
+    session.headers = {}
+    agent = Agent(hub_url="http://hub:8000/", node="web 1", interval=1, batch_size=3,
+                  monitor=make_monitor(), session=session, **kwargs)
+    return agent, session
+
+
+def test_samples_are_sent_in_batches():
+    agent, session = make_agent(token="secret")
+
+    for now in range(6):
+        agent.tick(float(now))
+
+    assert session.post.call_count == 2
+    url = session.post.call_args.args[0]
+    body = session.post.call_args.kwargs["json"]
+    assert url == "http://hub:8000/api/nodes/web-1/samples"
+    assert body["fields"] == agent.fields
+    assert len(body["samples"]) == 3
+    assert body["samples"][0][1 + agent.fields.index("cpu_percent")] == 10.0
+    assert session.headers["Authorization"] == "Bearer secret"
+    assert agent.sent == 6 and not agent.buffer
+
+
+def test_failed_sends_are_buffered_and_retried_with_backoff():
+    agent, session = make_agent(buffer_size=100)
+    session.post.side_effect = requests.ConnectionError("hub down")
+
+    for now in range(5):
+        agent.tick(float(now))
+
+    # Failed at t=2, then backing off (retry at t=4 fails again)
+    assert session.post.call_count == 2
+    assert len(agent.buffer) == 5
+
+    session.post.side_effect = None
+    agent.tick(20.0)
+
+    assert session.post.call_count == 3
+    assert len(session.post.call_args.kwargs["json"]["samples"]) == 6
+    assert not agent.buffer
+
+
+def test_retry_buffer_is_bounded():
+    agent, session = make_agent(buffer_size=4)
+    session.post.side_effect = requests.ConnectionError("hub down")
+
+    for now in range(10):
+        agent.tick(float(now))
+
+    assert len(agent.buffer) == 4
+
+
+def test_node_name_is_made_url_safe():
+    """Names the hub would reject (e.g. with '/') are reported under a valid slug."""
+    agent = Agent(hub_url="http://hub:8000", node="rack 2/web.local", session=MagicMock())
+
+    assert agent.node == "rack-2-web.local"
+    assert agent.url == "http://hub:8000/api/nodes/rack-2-web.local/samples"
@@ -0,0 +1,180 @@
+"""Tests for streaming anomaly detection and alert notifiers."""
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.models import DiskUsage, SystemStats
+from app.services.alerts import AlertDispatcher, AnomalyDetector, Ewma, Notifier, WebhookNotifier
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_stats(seconds: float, cpu: float = 20.0, memory: float = 50.0, disks=None) -> SystemStats:
+    return SystemStats(
+        timestamp=BASE + timedelta(seconds=seconds),
+        cpu_percent=cpu,
+        memory_percent=memory,
+        memory_used_gb=8.0,
+        memory_total_gb=16.0,
+        disk_percent=40.0,
+        disk_used_gb=400.0,
+        disk_total_gb=1000.0,
+        docker_containers_total=2,
+        docker_containers_running=1,
+        docker_containers_stopped=1,
+        disks=disks or []
+    )
+
+
+def disk(path: str, percent: float, stale: bool = False) -> DiskUsage:
+    return DiskUsage(path=path, percent=percent, used_gb=percent * 10, total_gb=1000.0, stale=stale)
+
+
+@pytest.fixture
+def webhook():
+    """Local stub HTTP server recording posted JSON; fails the first `failures` requests."""
+    received = []
+    state = {"failures": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if state["failures"] > 0:
+                state["failures"] -= 1
+                self.send_response(500)
+            else:
+                received.append(json.loads(body))
+                self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield {"url": f"http://127.0.0.1:{server.server_port}/hook", "received": received, "state": state}
+    server.shutdown()
+    server.server_close()
+
+
+def test_ewma_zscore():
+    baseline = Ewma(alpha=0.1, warmup=20, min_std=0.0)
+
+    warming = [baseline.update(10.0 + (i % 2)) for i in range(20)]
+    normal = baseline.update(10.5)
+    spike = baseline.update(30.0)
+
+    assert warming[-1] is None
+    assert abs(normal) < 2
+    assert spike > 10
+
+
+def test_threshold_hysteresis_and_dedup():
+    detector = AnomalyDetector(cooldown=0)
+
+    states = [
+        [(e.id, e.state) for e in detector.observe(make_stats(i, cpu=cpu))]
+        for i, cpu in enumerate([50, 95, 97, 88, 86, 84])
+    ]
+
+    assert states[1] == [("cpu_percent.threshold", "firing")]
+    # Still above 90, then in the hysteresis band: no duplicate events
+    assert states[2] == states[3] == states[4] == []
+    assert states[5] == [("cpu_percent.threshold", "resolved")]
+    assert detector.active == {}
+
+
+def test_cooldown_silences_flapping_alert():
+    detector = AnomalyDetector(cooldown=300)
+
+    def events(seconds, cpu):
+        return [e.state for e in detector.observe(make_stats(seconds, cpu=cpu))]
+
+    assert events(0, 95) == ["firing"]
+    assert events(10, 50) == ["resolved"]
+    assert events(20, 95) == []  # Fires again within the cooldown - silent
+    assert "cpu_percent.threshold" in detector.active
+    assert events(30, 50) == []  # Its resolution is silent too
+    assert events(400, 95) == ["firing"]
+
+
+def test_anomaly_against_baseline():
+    detector = AnomalyDetector(alpha=0.05, warmup=50)
+    for i in range(100):
+        detector.observe(make_stats(i, cpu=20.0 + (i % 5)))
+
+    spike = detector.observe(make_stats(100, cpu=70.0))
+
+    assert [(e.id, e.kind, e.state) for e in spike] == [("cpu_percent.anomaly", "anomaly", "firing")]
+    assert "unusually high" in spike[0].message
+    assert not detector.observe(make_stats(101, cpu=72.0))  # Already firing
+    assert [e.state for e in detector.observe(make_stats(102, cpu=22.0))] == ["resolved"]
+
+
+def test_disk_time_to_full_forecast():
+    """A disk growing 0.5 points a minute from 50% is full in ~100 minutes."""
+    detector = AnomalyDetector(forecast_hours=24)
+    fired = []
+    for minute in range(6):
+        fired += detector.observe(make_stats(minute * 60, disks=[disk("/", 50 + minute * 0.5), disk("/mnt", 30)]))
+
+    assert [(e.id, e.kind) for e in fired] == [("disk_full:/", "forecast")]
+    assert "full in about 1.6h" in fired[0].message
+    assert "disk_full:/mnt" not in detector.active  # Not growing
+
+
+def test_removed_disk_resolves_and_stale_disk_keeps_state():
+    detector = AnomalyDetector(cooldown=0)
+
+    fired = detector.observe(make_stats(0, disks=[disk("/", 40), disk("/mnt", 95)]))
+    stale = detector.observe(make_stats(1, disks=[disk("/", 40), disk("/mnt", 10, stale=True)]))
+    removed = detector.observe(make_stats(2, disks=[disk("/", 40)]))
+
+    assert [(e.id, e.state) for e in fired] == [("disk_percent:/mnt", "firing")]
+    assert stale == []
+    assert [(e.id, e.state) for e in removed] == [("disk_percent:/mnt", "resolved")]
+
+
+@pytest.mark.asyncio
+async def test_webhook_receives_alerts(webhook):
+    webhook["state"]["failures"] = 1  # First delivery fails and is retried
+    dispatcher = AlertDispatcher([WebhookNotifier(webhook["url"])], retry_delay=0.01)
+    detector = AnomalyDetector()
+    task = asyncio.create_task(dispatcher.run())
+    await asyncio.sleep(0)
+
+    dispatcher.submit(detector.observe(make_stats(0, cpu=99.0)))
+    async with asyncio.timeout(5):
+        while not dispatcher.sent:
+            await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    [payload] = webhook["received"]
+    assert payload["alerts"][0]["id"] == "cpu_percent.threshold"
+    assert payload["alerts"][0]["state"] == "firing"
+    assert payload["alerts"][0]["timestamp"] == "2026-01-01T12:00:00"
+    assert (dispatcher.sent, dispatcher.failures) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_webhook_is_dropped_after_retries(webhook):
+    webhook["state"]["failures"] = 10
+    dispatcher = AlertDispatcher([WebhookNotifier(webhook["url"])], retries=2, retry_delay=0.01)
+
+    await dispatcher._deliver(dispatcher.notifiers[0], AnomalyDetector().observe(make_stats(0, cpu=99.0)))
+
+    assert (dispatcher.sent, dispatcher.failures) == (0, 1)
+    assert webhook["state"]["failures"] == 8
+
+
+def test_notifiers_must_implement_send():
+    class Incomplete(Notifier):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
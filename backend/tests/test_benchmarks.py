@@ -0,0 +1,39 @@
+"""Smoke tests for the offline benchmark suite."""
+import pytest
+from benchmarks.compare import compare
+from benchmarks.fakes import fake_host
+from benchmarks.run import _fanout, summarize, tamagotchi_section
+
+
+def test_summarize_percentiles():
+    summary = summarize([i / 1000 for i in range(1, 101)])
+
+    assert summary["count"] == 100
+    assert (summary["p50_ms"], summary["p95_ms"], summary["max_ms"]) == (50.0, 95.0, 100.0)
+    assert summarize([]) == {"count": 0}
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"results": {"rest./api/stats": {"p50_ms": 1.0, "requests_per_sec": 1000.0}}}
+    current = {"results": {"rest./api/stats": {"p50_ms": 1.5, "requests_per_sec": 1100.0}}}
+
+    rows = {name: worse for name, _, _, _, worse in compare(baseline, current, threshold=0.2)}
+
+    assert rows == {"rest./api/stats.p50_ms": True, "rest./api/stats.requests_per_sec": False}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", ["ws", "sse"])
+async def test_fanout_delivers_to_fast_clients_despite_slow_ones(transport):
+    with fake_host():
+        result = await _fanout(clients=20, rounds=3, slow_ratio=0.25, slow_delay=0.05, transport=transport)
+
+    assert result["slow_clients"] == 5
+    assert result["deliver"]["count"] == 3
+    assert result["publish"]["count"] == 3
+
+
+def test_tamagotchi_section_has_the_broadcast_shape():
+    from app.services.tamagotchi_state import PUBLIC_FIELDS
+
+    assert tuple(tamagotchi_section()) == PUBLIC_FIELDS
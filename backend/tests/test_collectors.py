@@ -0,0 +1,137 @@
+"""Tests for the collector registry and scheduler."""
+import asyncio
+import threading
+
+import pytest
+from app.services.collectors import Collector, CollectorRegistry, CollectorScheduler
+
+HOST = {"cpu_percent": 1.0, "memory_percent": 2.0, "memory_used_gb": 3.0, "memory_total_gb": 4.0,
+        "disk_percent": 5.0, "disk_used_gb": 6.0, "disk_total_gb": 7.0}
+DOCKER = {"docker_containers_total": 2, "docker_containers_running": 1, "docker_containers_stopped": 1}
+
+
+def test_registry_collect_all_merges():
+    registry = CollectorRegistry()
+    registry.register(Collector("host", lambda: HOST, interval=1, timeout=1))
+    registry.register(Collector("docker", lambda: DOCKER, interval=1, timeout=1))
+
+    assert registry.collect_all() == {**HOST, **DOCKER}
+    assert [c.name for c in registry] == ["host", "docker"]
+    assert registry.runs() == 2
+
+
+def test_collect_all_times_out_each_collector():
+    """A stuck collector is cut off at its timeout and contributes its last values."""
+    release = threading.Event()
+    calls = {"docker": 0}
+
+    def docker():
+        calls["docker"] += 1
+        if calls["docker"] > 1:
+            release.wait(5)
+        return {**DOCKER, "docker_containers_total": calls["docker"]}
+
+    registry = CollectorRegistry()
+    registry.register(Collector("host", lambda: HOST, interval=1, timeout=1))
+    stuck = registry.register(Collector("docker", docker, interval=1, timeout=0.05))
+    registry.collect_all()
+
+    values = registry.collect_all()
+    release.set()
+
+    assert values == {**HOST, **DOCKER, "docker_containers_total": 1}
+    assert stuck.timeouts == 1
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("COLLECT_DISK_INTERVAL", "120")
+
+    collector = Collector("disk", dict, interval=30, timeout=10)
+
+    assert (collector.interval, collector.timeout) == (120.0, 10)
+
+
+@pytest.mark.asyncio
+async def test_stats_ready_after_every_collector_ran():
+    registry = CollectorRegistry()
+    host = registry.register(Collector("host", lambda: HOST, interval=1, timeout=1))
+    docker = registry.register(Collector("docker", lambda: DOCKER, interval=1, timeout=1))
+    scheduler = CollectorScheduler(registry)
+
+    await scheduler.run_collector(host)
+    assert scheduler.stats() is None
+
+    await scheduler.run_collector(docker)
+    stats = scheduler.stats()
+    assert stats.cpu_percent == 1.0 and stats.docker_containers_running == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_collector_does_not_hold_back_others():
+    """A stuck collector times out, keeps its last values and is not resubmitted."""
+    release = threading.Event()
+    calls = {"slow": 0}
+
+    def slow():
+        calls["slow"] += 1
+        if calls["slow"] > 1:
+            release.wait(5)
+        return DOCKER
+
+    registry = CollectorRegistry()
+    fast = registry.register(Collector("host", lambda: dict(HOST), interval=0.01, timeout=1))
+    stuck = registry.register(Collector("docker", slow, interval=0.01, timeout=0.05))
+    scheduler = CollectorScheduler(registry)
+    assert await scheduler.run_collector(stuck)
+
+    scheduler.start()
+    await asyncio.sleep(0.3)
+    await scheduler.stop()
+    release.set()
+
+    assert fast.runs >= 10
+    assert stuck.timeouts == 1
+    assert calls["slow"] == 2  # Never piled up behind the stuck call
+    assert scheduler.stats().docker_containers_total == 2
+
+
+@pytest.mark.asyncio
+async def test_collectors_run_at_their_own_interval():
+    registry = CollectorRegistry()
+    fast = registry.register(Collector("host", lambda: HOST, interval=0.02, timeout=1))
+    slow = registry.register(Collector("docker", lambda: DOCKER, interval=10, timeout=1))
+    scheduler = CollectorScheduler(registry)
+
+    scheduler.start()
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+
+    assert slow.runs == 1
+    assert fast.runs >= 5
+    assert set(scheduler.status()) == {"host", "docker"}
+
+
+@pytest.mark.asyncio
+async def test_collect_now_joins_call_in_flight():
+    """An on-demand read waits for the running call instead of submitting another."""
+    release = threading.Event()
+    calls = {"docker": 0}
+
+    def slow():
+        calls["docker"] += 1
+        release.wait(5)
+        return DOCKER
+
+    registry = CollectorRegistry()
+    docker = registry.register(Collector("docker", slow, interval=1, timeout=0.05))
+    scheduler = CollectorScheduler(registry)
+    assert not await scheduler.run_collector(docker)  # Timed out, still running
+
+    docker.timeout = 1
+    waiter = asyncio.create_task(scheduler.collect_now(docker))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert await waiter
+    assert calls["docker"] == 1
+    assert scheduler.values["docker_containers_total"] == 2
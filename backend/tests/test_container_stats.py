@@ -0,0 +1,162 @@
+"""Tests for concurrent per-container stats collection."""
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from app.services.container_stats import ContainerStatsCollector
+
+
+def raw_stats(cpu_total: int, system_total: int, name: str = "/web") -> dict:
+    """Minimal Docker stats payload (one_shot, so no precpu_stats)."""
+    return {
+        "name": name,
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": cpu_total},
+            "system_cpu_usage": system_total,
+            "online_cpus": 4,
+        },
+        "memory_stats": {
+            "usage": 300 * 1024 ** 2,
+            "limit": 1000 * 1024 ** 2,
+            "stats": {"inactive_file": 100 * 1024 ** 2},
+        },
+        "networks": {
+            "eth0": {"rx_bytes": 1000, "tx_bytes": 500},
+            "eth1": {"rx_bytes": 24, "tx_bytes": 12},
+        },
+        "blkio_stats": {
+            "io_service_bytes_recursive": [
+                {"op": "read", "value": 4096},
+                {"op": "write", "value": 8192},
+                {"op": "Read", "value": 4096},
+            ]
+        },
+    }
+
+
+def test_parse_container_stats():
+    """Memory excludes page cache; network and block I/O are summed."""
+    api_client = MagicMock()
+    api_client.stats.return_value = raw_stats(1_000, 10_000)
+    collector = ContainerStatsCollector(api_client)
+    
+    [stats] = collector.collect([("abcdef1234567890", "web")])
+    
+    assert stats.id == "abcdef123456"
+    assert stats.name == "web"
+    assert stats.cpu_percent == 0.0  # No baseline yet
+    assert stats.memory_used_mb == 200.0
+    assert stats.memory_limit_mb == 1000.0
+    assert stats.memory_percent == 20.0
+    assert stats.net_rx_bytes == 1024
+    assert stats.net_tx_bytes == 512
+    assert stats.block_read_bytes == 8192
+    assert stats.block_write_bytes == 8192
+    api_client.stats.assert_called_with("abcdef1234567890", stream=False, one_shot=True)
+
+
+def test_cpu_percent_from_previous_sample():
+    """CPU usage is the container's share of system CPU time since the last cycle."""
+    api_client = MagicMock()
+    collector = ContainerStatsCollector(api_client)
+    
+    api_client.stats.return_value = raw_stats(1_000, 100_000)
+    collector.collect([("c1", "web")])
+    
+    # 5% of all system CPU time across 4 cores -> 20% of one core
+    api_client.stats.return_value = raw_stats(6_000, 200_000)
+    [stats] = collector.collect([("c1", "web")])
+    assert stats.cpu_percent == 20.0
+
+
+def test_collection_is_concurrent():
+    """Slow stats requests run in parallel on the worker pool."""
+    api_client = MagicMock()
+    
+    def slow_stats(cid, **kwargs):
+        time.sleep(0.1)
+        return raw_stats(0, 0)
+    
+    api_client.stats.side_effect = slow_stats
+    collector = ContainerStatsCollector(api_client, workers=16, timeout=5)
+    containers = [(f"c{i}", f"app{i:02d}") for i in range(32)]
+    
+    started = time.monotonic()
+    results = collector.collect(containers)
+    elapsed = time.monotonic() - started
+    
+    assert len(results) == 32
+    assert [r.name for r in results] == sorted(r.name for r in results)
+    assert elapsed < 1.0  # Sequential would take 3.2s
+
+
+def test_failing_containers_are_skipped_and_slow_ones_stale():
+    """Containers that error are left out; ones that time out are reported stale."""
+    api_client = MagicMock()
+    release = threading.Event()
+    
+    def stats(cid, **kwargs):
+        if cid == "hung":
+            release.wait(2)
+        if cid == "broken":
+            raise RuntimeError("no such container")
+        return raw_stats(0, 0)
+    
+    api_client.stats.side_effect = stats
+    collector = ContainerStatsCollector(api_client, workers=4, timeout=0.2)
+    try:
+        results = collector.collect([("ok", "ok"), ("hung", "hung"), ("broken", "broken")])
+    finally:
+        release.set()
+    
+    assert [(r.name, r.stale) for r in results] == [("hung", True), ("ok", False)]
+
+
+def test_hung_container_is_not_resubmitted():
+    """A container whose request is still running keeps one worker and reports its last values."""
+    api_client = MagicMock()
+    hang = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def stats(cid, **kwargs):
+        calls.append(cid)
+        if cid == "db" and hang.is_set():
+            release.wait(2)
+        return raw_stats(0, 0)
+    
+    api_client.stats.side_effect = stats
+    collector = ContainerStatsCollector(api_client, workers=2, timeout=0.1)
+    containers = [("db", "db"), ("web", "web")]
+    try:
+        collector.collect(containers)
+        hang.set()
+        for _ in range(3):
+            db, web = collector.collect(containers)
+            assert (db.stale, db.memory_used_mb) == (True, 200.0)
+            assert web.stale is False
+    finally:
+        release.set()
+    
+    # One request for db while it hangs; web still gets a worker every cycle
+    assert calls.count("db") == 2
+    assert calls.count("web") == 4
+    
+    # The late answer is used once it arrives
+    collector._pending["db"].result(timeout=1)
+    db, _ = collector.collect(containers)
+    assert db.stale is False
+    assert calls.count("db") == 2
+
+
+def test_baselines_pruned_for_stopped_containers():
+    """Baselines of containers that stopped running are dropped."""
+    api_client = MagicMock()
+    api_client.stats.return_value = raw_stats(0, 0)
+    collector = ContainerStatsCollector(api_client)
+    
+    collector.collect([("a", "a"), ("b", "b")])
+    collector.collect([("a", "a")])
+    
+    assert set(collector._previous) == {"a"}
@@ -0,0 +1,66 @@
+"""Tests for the delta-based CPU sampler."""
+from collections import namedtuple
+
+import pytest
+from app.services.cpu_sampler import CpuSampler
+
+CpuTimes = namedtuple("CpuTimes", ["user", "system", "idle", "iowait", "guest"])
+
+
+@pytest.fixture
+def cpu_counters(monkeypatch):
+    """Feed CpuSampler from a mutable list of cumulative CPU times."""
+    state = {"times": CpuTimes(0.0, 0.0, 0.0, 0.0, 0.0)}
+    monkeypatch.setattr("app.services.cpu_sampler.psutil.cpu_times", lambda: state["times"])
+    monkeypatch.setattr("app.services.cpu_sampler.psutil.cpu_count", lambda: 4)
+    return state
+
+
+def test_sample_uses_delta_since_previous_sample(cpu_counters):
+    """Utilization is computed from the counters accumulated since the last call."""
+    sampler = CpuSampler()
+    
+    cpu_counters["times"] = CpuTimes(20.0, 5.0, 70.0, 5.0, 0.0)
+    assert sampler.sample() == 25.0
+    
+    # Second interval: 30s busy out of 40s total
+    cpu_counters["times"] = CpuTimes(45.0, 10.0, 80.0, 5.0, 0.0)
+    assert sampler.sample() == 75.0
+    assert sampler.percent == 75.0
+    assert sampler.interval is not None
+
+
+def test_sample_ignores_guest_time(cpu_counters):
+    """Guest time is already part of user time and must not be double counted."""
+    sampler = CpuSampler()
+    cpu_counters["times"] = CpuTimes(50.0, 0.0, 50.0, 0.0, 40.0)
+    assert sampler.sample() == 50.0
+
+
+def test_rapid_polls_return_last_complete_interval(cpu_counters):
+    """Polling faster than min_interval keeps the previous value and baseline."""
+    sampler = CpuSampler(min_interval=1.0)  # 4 cores -> 4s of CPU time
+    
+    cpu_counters["times"] = CpuTimes(2.0, 0.0, 6.0, 0.0, 0.0)
+    assert sampler.sample() == 25.0
+    
+    # Only 0.4s of CPU time elapsed - too short to measure reliably
+    cpu_counters["times"] = CpuTimes(2.4, 0.0, 6.0, 0.0, 0.0)
+    assert sampler.sample() == 25.0
+    
+    # Baseline was not moved, so the next reading spans the whole interval
+    cpu_counters["times"] = CpuTimes(4.0, 0.0, 8.0, 0.0, 0.0)
+    assert sampler.sample() == 50.0
+
+
+def test_counter_reset_rebases(cpu_counters):
+    """Counters going backwards rebase instead of producing negative values."""
+    sampler = CpuSampler()
+    cpu_counters["times"] = CpuTimes(50.0, 0.0, 50.0, 0.0, 0.0)
+    assert sampler.sample() == 50.0
+    
+    cpu_counters["times"] = CpuTimes(1.0, 0.0, 1.0, 0.0, 0.0)
+    assert sampler.sample() == 50.0
+    
+    cpu_counters["times"] = CpuTimes(11.0, 0.0, 11.0, 0.0, 0.0)
+    assert sampler.sample() == 50.0
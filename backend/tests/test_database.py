@@ -0,0 +1,47 @@
+"""Tests for the database engine factory and executor."""
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, StaticPool
+from app.database import create_db_engine, run_in_db
+
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_file_engine_is_tuned(tmp_path):
+    """File databases use WAL, synchronous=NORMAL, a busy timeout and a pool."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}", pool_size=3, busy_timeout=2500)
+
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1  # NORMAL
+    assert pragma(engine, "busy_timeout") == 2500
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 3
+    engine.dispose()
+
+
+def test_sqlite_memory_engine_shares_connection():
+    """In-memory databases keep a single shared connection."""
+    engine = create_db_engine("sqlite://")
+
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    assert pragma(engine, "busy_timeout") == 5000
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_db_runs_off_event_loop():
+    """Blocking database calls run on the dedicated executor."""
+    loop_thread = threading.current_thread().name
+
+    name = await run_in_db(lambda: threading.current_thread().name)
+
+    assert name != loop_thread
+    assert name.startswith("db")
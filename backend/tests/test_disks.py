@@ -0,0 +1,100 @@
+"""Tests for per-mountpoint disk monitoring."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from app.services.disks import DiskMonitor, discover_mountpoints
+
+GIB = 1024 ** 3
+
+
+def usage(used_gb: float, total_gb: float = 100.0):
+    return SimpleNamespace(percent=round(used_gb / total_gb * 100, 2), used=used_gb * GIB, total=total_gb * GIB)
+
+
+@pytest.fixture
+def fake_disks(monkeypatch):
+    """psutil.disk_usage backed by a dict of path -> usage, exception or callable."""
+    disks = {}
+    calls = {}
+
+    def disk_usage(path):
+        calls[path] = calls.get(path, 0) + 1
+        value = disks[path]
+        if isinstance(value, Exception):
+            raise value
+        return value() if callable(value) else value
+
+    monkeypatch.setattr("app.services.disks.psutil.disk_usage", disk_usage)
+    return SimpleNamespace(disks=disks, calls=calls)
+
+
+def test_primary_first_with_configured_mounts(fake_disks):
+    fake_disks.disks.update({"/": usage(10), "/mnt/a": usage(50), "/mnt/b": usage(75)})
+
+    disks = DiskMonitor("/", paths="/mnt/a, /mnt/b,/").sample()
+
+    assert [(d.path, d.percent, d.stale) for d in disks] == [
+        ("/", 10.0, False), ("/mnt/a", 50.0, False), ("/mnt/b", 75.0, False)
+    ]
+    assert disks[1].used_gb == 50.0
+
+
+def test_hung_mount_is_stale_and_not_resubmitted(fake_disks):
+    """A mount that doesn't answer is reported stale without blocking the others."""
+    release = threading.Event()
+
+    def hung():
+        release.wait(5)
+        return usage(20)
+
+    fake_disks.disks.update({"/": usage(10), "/mnt/nfs": hung})
+    monitor = DiskMonitor("/", paths="/mnt/nfs", timeout=0.05)
+
+    first = monitor.sample()
+    second = monitor.sample()
+    assert [(d.path, d.stale) for d in first] == [("/", False), ("/mnt/nfs", True)]
+    assert second[1].stale and second[1].total_gb == 0.0
+    assert fake_disks.calls["/mnt/nfs"] == 1  # Still stuck - never piled up
+    assert fake_disks.calls["/"] == 2
+
+    release.set()
+    for _ in range(100):
+        if monitor.mounts["/mnt/nfs"].pending.done():
+            break
+        time.sleep(0.01)
+    third = monitor.sample()
+    assert third[1].stale is False and third[1].percent == 20.0
+
+
+def test_failed_mount_keeps_last_known_values(fake_disks):
+    fake_disks.disks.update({"/": usage(10), "/mnt/smb": usage(40)})
+    monitor = DiskMonitor("/", paths="/mnt/smb")
+    monitor.sample()
+
+    fake_disks.disks["/mnt/smb"] = OSError("Stale file handle")
+    smb = monitor.sample()[1]
+
+    assert smb.stale and smb.percent == 40.0
+    assert smb.age is not None
+
+
+def test_missing_primary_falls_back_to_root(fake_disks):
+    fake_disks.disks.update({"/host/mnt/user": FileNotFoundError(), "/": usage(30)})
+
+    primary = DiskMonitor("/host/mnt/user").sample()[0]
+
+    assert (primary.path, primary.percent, primary.stale) == ("/host/mnt/user", 30.0, False)
+
+
+def test_discover_skips_pseudo_filesystems_and_duplicate_devices(monkeypatch):
+    partitions = [
+        SimpleNamespace(device="/dev/sda1", mountpoint="/", fstype="ext4"),
+        SimpleNamespace(device="tmpfs", mountpoint="/run", fstype="tmpfs"),
+        SimpleNamespace(device="/dev/sda1", mountpoint="/etc/hosts", fstype="ext4"),
+        SimpleNamespace(device="nas:/share", mountpoint="/mnt/nas", fstype="nfs4"),
+    ]
+    monkeypatch.setattr("app.services.disks.psutil.disk_partitions", lambda all=False: partitions)
+
+    assert discover_mountpoints() == ["/", "/mnt/nas"]
@@ -0,0 +1,86 @@
+"""Tests for the lazy, backing-off Docker connection."""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from app.services.docker_connection import DockerConnection
+
+
+@pytest.fixture
+def api_client(monkeypatch):
+    """APIClient whose version() fails until the test brings the daemon up."""
+    client = MagicMock()
+    client.version.side_effect = ConnectionRefusedError("No such file or directory")
+    monkeypatch.setattr("docker.APIClient", MagicMock(return_value=client))
+    return client
+
+
+def test_nothing_connects_until_asked(api_client):
+    from app.services.system_monitor import SystemMonitor
+    
+    monitor = SystemMonitor()
+    monitor.start_container_watch()
+    
+    assert api_client.version.call_count == 0
+    assert monitor.docker.status() == {"state": "disconnected", "attempts": 0}
+
+
+def test_reconnects_with_exponential_backoff(api_client):
+    clock = {"now": 100.0}
+    connected = []
+    docker = DockerConnection(on_connect=connected.append, retry_min=1, retry_max=4,
+                              clock=lambda: clock["now"])
+    
+    assert docker.get(wait=1) is None
+    assert docker.status() == {"state": "unavailable", "attempts": 1,
+                               "error": "No such file or directory", "retry_in": 1.0}
+    assert docker.get(wait=1) is None and docker.attempts == 1  # Backing off
+    
+    delays = []
+    for _ in range(3):
+        clock["now"] += 10
+        docker.get(wait=1)
+        delays.append(docker.status()["retry_in"])
+    assert delays == [2.0, 4.0, 4.0]
+    
+    # The daemon comes up after SysMon: picked up on the next attempt
+    api_client.version.side_effect = None
+    api_client.version.return_value = {"Version": "24.0.0", "ApiVersion": "1.43"}
+    clock["now"] += 10
+    assert docker.get(wait=1) is api_client
+    assert connected == [api_client]
+    assert docker.status()["state"] == "connected"
+
+
+def test_failed_call_marks_connection_down(api_client):
+    api_client.version.side_effect = None
+    api_client.version.return_value = {"Version": "24.0.0"}
+    lost = []
+    docker = DockerConnection(on_disconnect=lambda: lost.append(True), retry_min=30)
+    docker.get(wait=1)
+    
+    docker.failed(ConnectionError("daemon restarted"))
+    
+    assert lost == [True]
+    assert docker.get() is None
+    assert docker.status()["retry_in"] > 29
+
+
+def test_callers_never_wait_longer_than_asked(api_client):
+    release = threading.Event()
+    
+    def hanging_version():
+        release.wait(5)
+        return {"Version": "24.0.0"}
+    
+    api_client.version.side_effect = hanging_version
+    docker = DockerConnection()
+    
+    try:
+        assert docker.get(wait=0.05) is None
+        assert docker.status()["state"] == "connecting"
+        assert docker.get() is None and docker.attempts == 1  # One attempt at a time
+    finally:
+        release.set()
+    docker._attempt.join(1)
+    assert docker.get() is api_client
@@ -0,0 +1,117 @@
+"""Tests for the event-driven Docker container index."""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from app.services.docker_events import ContainerIndex
+
+
+def event(action: str, container_id: str, name: str = "web") -> dict:
+    return {
+        "Type": "container",
+        "Action": action,
+        "id": container_id,
+        "Actor": {"ID": container_id, "Attributes": {"name": name}},
+    }
+
+
+@pytest.fixture
+def api_client():
+    client = MagicMock()
+    client.containers.return_value = [
+        {"Id": "a", "State": "running", "Names": ["/web"]},
+        {"Id": "b", "State": "running", "Names": ["/db"]},
+        {"Id": "c", "State": "exited", "Names": ["/job"]},
+    ]
+    return client
+
+
+def test_resync_seeds_counts(api_client):
+    """A full listing seeds the index."""
+    index = ContainerIndex(api_client)
+    index.resync()
+    
+    assert index.synced
+    assert index.counts() == {"total": 3, "running": 2, "stopped": 1}
+    assert index.containers["a"] == ("running", "web")
+
+
+def test_events_update_counts(api_client):
+    """Lifecycle events move containers between states."""
+    index = ContainerIndex(api_client)
+    index.resync()
+    
+    index.apply_event(event("die", "a"))
+    assert index.counts() == {"total": 3, "running": 1, "stopped": 2}
+    
+    index.apply_event(event("create", "d", name="new"))
+    assert index.counts() == {"total": 4, "running": 1, "stopped": 3}
+    
+    index.apply_event(event("start", "d", name="new"))
+    assert index.counts() == {"total": 4, "running": 2, "stopped": 2}
+    assert index.containers["d"] == ("running", "new")
+    
+    index.apply_event(event("destroy", "c"))
+    assert index.counts() == {"total": 3, "running": 2, "stopped": 1}
+    
+    # Non-state events are ignored
+    index.apply_event(event("health_status: healthy", "a"))
+    index.apply_event({"Type": "network", "Action": "connect", "id": "n"})
+    assert index.counts() == {"total": 3, "running": 2, "stopped": 1}
+
+
+def test_pause_and_rename(api_client):
+    """Paused containers count toward total only; rename keeps state."""
+    index = ContainerIndex(api_client)
+    index.resync()
+    
+    index.apply_event(event("pause", "a"))
+    assert index.counts() == {"total": 3, "running": 1, "stopped": 1}
+    
+    index.apply_event(event("rename", "a", name="web2"))
+    assert index.containers["a"] == ("paused", "web2")
+
+
+def test_stream_reconnects_and_resyncs(api_client):
+    """A broken events stream triggers a resync and a new subscription."""
+    calls = {"events": 0}
+    resubscribed = threading.Event()
+    
+    def events(**kwargs):
+        calls["events"] += 1
+        if calls["events"] == 1:
+            def broken():
+                yield event("die", "a")
+                raise ConnectionError("daemon restarted")
+            return broken()
+        resubscribed.set()
+        return iter(())
+    
+    api_client.events.side_effect = events
+    index = ContainerIndex(api_client)
+    index.reconnect_delay = 0.01
+    index.start()
+    try:
+        assert resubscribed.wait(timeout=2)
+    finally:
+        index.stop()
+    
+    assert api_client.containers.call_count >= 2
+    assert api_client.events.call_args.kwargs["filters"] == {"type": "container"}
+
+
+def test_monitor_uses_index_counts(mock_system_monitor):
+    """SystemMonitor reads counts from the index instead of listing containers."""
+    from app.services.system_monitor import SystemMonitor
+    
+    monitor = SystemMonitor()
+    index = ContainerIndex(mock_system_monitor["api_client"])
+    index.resync()
+    index.apply_event(event("start", "jkl012"))
+    monitor.container_index = index
+    
+    listing_calls = mock_system_monitor["api_client"].containers.call_count
+    stats = monitor._get_docker_stats()
+    
+    assert stats == {"total": 4, "running": 4, "stopped": 0}
+    assert mock_system_monitor["api_client"].containers.call_count == listing_calls
@@ -0,0 +1,46 @@
+"""Tests for the shared JSON encoding layer."""
+import json
+from datetime import datetime
+
+from app.models import DiskUsage, SystemStats
+from app.services.encoding import JSONBytesResponse, SectionCache, dumps, join_object
+
+
+def test_dumps_models_and_datetimes():
+    stats = SystemStats(
+        cpu_percent=12.5, memory_percent=40.0, memory_used_gb=4.0, memory_total_gb=16.0,
+        disk_percent=50.0, disk_used_gb=100.0, disk_total_gb=200.0,
+        docker_containers_total=2, docker_containers_running=1, docker_containers_stopped=1,
+        timestamp=datetime(2026, 1, 20, 12, 30, 5, 123456),
+        disks=[DiskUsage(path="/", percent=50.0, used_gb=100.0, total_gb=200.0)],
+    )
+
+    decoded = json.loads(dumps(stats))
+
+    assert decoded["timestamp"] == "2026-01-20T12:30:05.123456"
+    assert decoded["disks"][0]["path"] == "/"
+    assert decoded == stats.model_dump(mode="json")
+
+
+def test_join_object_splices_encoded_values():
+    joined = join_object([("type", dumps("stats_update")), ("stats", dumps({"cpu_percent": 1.5}))])
+
+    assert json.loads(joined) == {"type": "stats_update", "stats": {"cpu_percent": 1.5}}
+
+
+def test_section_cache_reuses_unchanged_values():
+    cache = SectionCache()
+
+    first = cache.encode("tamagotchi", {"name": "Byte", "level": 1})
+    again = cache.encode("tamagotchi", {"name": "Byte", "level": 1})
+    changed = cache.encode("tamagotchi", {"name": "Byte", "level": 2})
+
+    assert again is first and cache.hits == 1
+    assert json.loads(changed)["level"] == 2
+
+
+def test_response_sends_encoded_bytes_as_they_are():
+    encoded = b'{"cpu_percent":1.0}'
+
+    assert JSONBytesResponse(encoded).body is encoded
+    assert JSONBytesResponse({"int_keys": {1: "a"}}).body == b'{"int_keys":{"1":"a"}}'
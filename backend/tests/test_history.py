@@ -0,0 +1,104 @@
+"""Tests for the in-memory metrics history."""
+from datetime import datetime, timedelta
+
+import pytest
+from app.models import SystemStats
+from app.services.history import HistoryTier, MetricsHistory, to_epoch
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_stats(seconds: float, cpu: float) -> SystemStats:
+    return SystemStats(
+        timestamp=BASE + timedelta(seconds=seconds),
+        cpu_percent=cpu,
+        memory_percent=50.0,
+        memory_used_gb=8.0,
+        memory_total_gb=16.0,
+        disk_percent=40.0,
+        disk_used_gb=400.0,
+        disk_total_gb=1000.0,
+        docker_containers_total=2,
+        docker_containers_running=1,
+        docker_containers_stopped=1
+    )
+
+
+def test_tier_averages_samples_per_bucket():
+    """Samples within one step are averaged into a single point."""
+    tier = HistoryTier("1m", step=60, retention=600, metrics=["cpu"])
+    start = to_epoch(BASE)
+    
+    for i, cpu in enumerate([10.0, 20.0, 30.0]):
+        tier.add(start + i * 20, [cpu])
+    tier.add(start + 60, [90.0])  # Closes the first bucket
+    
+    timestamps, series = tier.query(start, start + 120)
+    assert timestamps == [start, start + 60]
+    assert series["cpu"] == [20.0, 90.0]  # Second point is the open bucket
+
+
+def test_tier_ring_overwrites_oldest():
+    """Once full, the tier keeps only the newest capacity points."""
+    tier = HistoryTier("raw", step=2, retention=10, metrics=["cpu"])  # 5 slots
+    start = to_epoch(BASE)
+    
+    for i in range(12):
+        tier.add(start + i * 2, [float(i)])
+    
+    assert tier.count == 5
+    timestamps, series = tier.query(start, start + 100)
+    # 5 closed buckets in the ring (6..10) plus the open bucket (11)
+    assert series["cpu"] == [6.0, 7.0, 8.0, 9.0, 10.0, 11.0]
+    assert timestamps == sorted(timestamps)
+    assert tier.oldest() == start + 12
+
+
+def test_tier_query_range_and_late_samples():
+    """Queries are bounded by timestamp and late samples are dropped."""
+    tier = HistoryTier("raw", step=2, retention=100, metrics=["cpu"])
+    start = to_epoch(BASE)
+    for i in range(10):
+        tier.add(start + i * 2, [float(i)])
+    tier.add(start, [99.0])  # Late sample for an already written bucket
+    
+    _, series = tier.query(start + 4, start + 8)
+    assert series["cpu"] == [2.0, 3.0, 4.0]
+
+
+def test_history_memory_is_fixed():
+    """Memory is preallocated and does not grow with appended samples."""
+    history = MetricsHistory()
+    before = history.memory_bytes()
+    for i in range(5000):
+        history.append(make_stats(i * 2, float(i % 100)))
+    
+    assert history.memory_bytes() == before
+    # raw: 1800 slots, 1m: 1440 slots, 15m: 2880 slots, 11 arrays of doubles each
+    assert before == (1800 + 1440 + 2880) * 8 * (1 + len(history.metrics))
+
+
+def test_history_rollup_tiers():
+    """Every tier receives samples and rolls them up at its own step."""
+    history = MetricsHistory()
+    for i in range(90):  # 3 minutes of 2s samples
+        history.append(make_stats(i * 2, 50.0))
+    
+    start = to_epoch(BASE)
+    raw = history.query(start, start + 180, "raw")
+    minute = history.query(start, start + 180, "1m")
+    
+    assert len(raw["timestamps"]) == 90
+    assert minute["timestamps"] == [start, start + 60, start + 120]
+    assert minute["metrics"]["cpu_percent"] == [50.0, 50.0, 50.0]
+    assert minute["metrics"]["docker_containers_running"] == [1.0, 1.0, 1.0]
+
+
+def test_pick_resolution():
+    """Auto resolution picks the finest tier covering the range."""
+    history = MetricsHistory()
+    now = 1_000_000_000.0
+    assert history.pick_resolution(now - 600, now) == "raw"
+    assert history.pick_resolution(now - 6 * 3600, now) == "1m"
+    assert history.pick_resolution(now - 7 * 86400, now) == "15m"
+    assert history.pick_resolution(now - 365 * 86400, now) == "15m"
@@ -1,4 +1,7 @@
 """Tests for FastAPI main application."""
+import threading
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -6,16 +9,27 @@ from app.database import get_session
 
 
 @pytest.fixture
-def client(session, mock_system_monitor):
+def client(engine, session, mock_system_monitor, monkeypatch):
     """Create a test client with mocked dependencies."""
     def get_session_override():
         yield session
     
     app.dependency_overrides[get_session] = get_session_override
     
+    # Keep startup, history and Tamagotchi writes on the in-memory database
+    from app.main import stats_writer, tamagotchi_state
+    monkeypatch.setattr("app.database.engine", engine)
+    monkeypatch.setattr("app.main.engine", engine)
+    stats_writer.__init__(engine)
+    tamagotchi_state.__init__(engine)
+    
     # Re-initialize SystemMonitor with mocked dependencies
-    from app.main import monitor
+    from app.main import collector_scheduler, detector, monitor, nodes, snapshot
     monitor.__init__()
+    detector.__init__()
+    collector_scheduler.__init__(monitor.collectors)
+    snapshot.clear()
+    nodes.nodes.clear()
     
     with TestClient(app) as test_client:
         yield test_client
@@ -30,6 +44,32 @@ def test_health_check(client):
     data = response.json()
     assert data["status"] == "healthy"
     assert data["service"] == "SysMon"
+    assert data["startup_seconds"] is not None
+
+
+def test_startup_does_not_wait_for_docker(mock_system_monitor, request):
+    """A hanging Docker socket delays neither startup nor requests; health shows the state."""
+    release = threading.Event()
+    
+    def hanging_version():
+        release.wait(5)
+        return {"Version": "24.0.0"}
+    
+    mock_system_monitor["api_client"].version.side_effect = hanging_version
+    try:
+        started = time.monotonic()
+        client = request.getfixturevalue("client")
+        health = client.get("/api/health").json()
+        
+        assert time.monotonic() - started < 1.0
+        assert health["docker_available"] is False
+        assert health["docker"]["state"] == "connecting"
+    finally:
+        release.set()
+    
+    from app.main import monitor
+    monitor.docker._attempt.join(1)
+    assert client.get("/api/health").json()["docker"]["state"] == "connected"
 
 
 def test_get_stats(client, mock_system_monitor):
@@ -90,6 +130,27 @@ def test_rename_tamagotchi(client):
     assert data["name"] == new_name
 
 
+def test_tamagotchi_rows_are_applied_on_the_event_loop(client, monkeypatch):
+    """Rows from the database executor are mirrored into the state on the loop."""
+    import asyncio
+    from app.main import tamagotchi_state
+    
+    applied = []
+    apply = tamagotchi_state.apply
+    
+    def apply_on_loop(tamagotchi):
+        asyncio.get_running_loop()  # Raises on a worker thread
+        applied.append(tamagotchi.name)
+        apply(tamagotchi)
+    
+    monkeypatch.setattr(tamagotchi_state, "apply", apply_on_loop)
+    client.post("/api/tamagotchi/rename?name=Looped")
+    client.post("/api/tamagotchi/feed")
+    
+    assert applied == ["Looped", "Looped"]
+    assert tamagotchi_state.public()["name"] == "Looped"
+
+
 def test_feed_tamagotchi(client):
     """Test feed Tamagotchi endpoint."""
     # Get initial state
@@ -119,8 +180,10 @@ async def test_websocket_connection(client, mock_system_monitor):
         # Send a test message
         websocket.send_text("ping")
         
-        # Receive response
+        # Receive response (a broadcast may arrive first)
         data = websocket.receive_text()
+        while data.startswith('{"type":"stats_'):
+            data = websocket.receive_text()
         assert "Message received: ping" in data
 
 
@@ -133,3 +196,167 @@ async def test_websocket_disconnect(client, mock_system_monitor):
     
     # Connection should close gracefully without errors
     assert True
+
+
+def test_get_stats_history(client):
+    """Test metrics history endpoint."""
+    from app.main import history, snapshot
+    from app.services.history import to_epoch
+    
+    client.get("/api/stats")
+    history.append(snapshot.latest)
+    ts = to_epoch(snapshot.latest.timestamp)
+    
+    response = client.get(f"/api/stats/history?from={ts - 10}&to={ts + 10}&resolution=raw")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resolution"] == "raw"
+    assert data["step"] == 2
+    assert len(data["timestamps"]) >= 1
+    assert data["metrics"]["cpu_percent"][-1] == 45.5
+    
+    # Default range with automatic resolution
+    response = client.get("/api/stats/history")
+    assert response.status_code == 200
+    assert response.json()["resolution"] == "raw"
+
+
+def test_get_stats_history_invalid_params(client):
+    """Test history endpoint rejects bad parameters."""
+    assert client.get("/api/stats/history?resolution=5s").status_code == 400
+    assert client.get("/api/stats/history?from=200&to=100").status_code == 400
+
+
+def test_get_stats_archive(client):
+    """Test persisted history endpoint."""
+    response = client.get("/api/stats/archive?from=0&to=3600&step=60")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["step"] == 60
+    assert "cpu_percent" in data["metrics"]
+    
+    assert client.get("/api/stats/archive?from=200&to=100").status_code == 400
+
+
+def test_get_containers(client):
+    """Test per-container stats endpoint."""
+    response = client.get("/api/containers")
+    assert response.status_code == 200
+    containers = response.json()["containers"]
+    
+    # Three running containers in the mocked listing
+    assert len(containers) == 3
+    assert containers[0]["memory_used_mb"] == 512.0
+    assert containers[0]["memory_percent"] == 25.0
+
+
+def test_websocket_subscribe(client):
+    """Test WebSocket subscription acknowledgement."""
+    import json
+    
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(json.dumps({
+            "type": "subscribe",
+            "topics": ["host", "tamagotchi", "bogus"],
+            "interval": 10
+        }))
+        message = websocket.receive_json()
+        while message["type"] != "subscribed":
+            message = websocket.receive_json()
+    
+    assert message["topics"] == ["host", "tamagotchi"]
+    assert message["interval"] == 10
+    assert message["unknown_topics"] == ["bogus"]
+
+
+def test_node_ingest_and_query(client):
+    """Agents push batches; the hub lists nodes and serves their history."""
+    from app.services.history import numeric_fields
+    fields = numeric_fields()
+    now = time.time() // 2 * 2  # Align to the raw tier's 2s buckets
+    samples = [[now - 2] + [10.0] * len(fields), [now] + [20.0] * len(fields)]
+    
+    response = client.post("/api/nodes/web-1/samples", json={"fields": fields, "samples": samples})
+    assert response.status_code == 200
+    assert response.json() == {"node": "web-1", "accepted": 2}
+    
+    listed = client.get("/api/nodes").json()
+    assert [n["name"] for n in listed] == ["web-1"]
+    assert listed[0]["online"] is True
+    assert listed[0]["latest"]["cpu_percent"] == 20.0
+    
+    history = client.get("/api/nodes/web-1/history", params={"from": now - 60}).json()
+    assert history["resolution"] == "raw"
+    assert history["metrics"]["cpu_percent"] == [10.0, 20.0]
+    
+    assert client.get("/api/nodes/missing/history").status_code == 404
+
+
+def test_node_ingest_rejects_invalid_names(client):
+    """Names that are not URL-safe are refused instead of creating unreachable nodes."""
+    batch = {"fields": ["cpu_percent"], "samples": [[time.time(), 1.0]]}
+    
+    response = client.post("/api/nodes/web%201/samples", json=batch)
+    assert response.status_code == 422
+    assert client.get("/api/nodes").json() == []
+
+
+def test_node_ingest_requires_token(client, monkeypatch):
+    """With HUB_TOKEN set, agents must send it as a bearer token."""
+    monkeypatch.setattr("app.main.HUB_TOKEN", "secret")
+    batch = {"fields": ["cpu_percent"], "samples": [[time.time(), 1.0]]}
+    
+    assert client.post("/api/nodes/a/samples", json=batch).status_code == 401
+    response = client.post("/api/nodes/a/samples", json=batch, headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+
+
+def test_metrics_endpoint(client):
+    """/metrics renders the latest collected snapshot."""
+    client.get("/api/stats")
+    
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "sysmon_cpu_percent " in response.text
+    assert "sysmon_websocket_connections 0.0" in response.text
+
+
+def test_internal_timings(client):
+    """Collector stages are timed and reported."""
+    client.get("/api/stats")
+    
+    report = client.get("/api/internal/timings").json()
+    
+    for stage in ("collect.cpu", "collect.memory", "collect.disk", "collect.docker"):
+        assert report[stage]["count"] >= 1
+        assert report[stage]["p99_ms"] is not None
+
+
+def test_get_processes(client):
+    """The process table is served sorted by CPU or memory."""
+    response = client.get("/api/processes", params={"sort": "memory", "limit": 3})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sort"] == "memory"
+    assert 1 <= len(data["processes"]) <= 3
+    rss = [p["memory_rss_mb"] for p in data["processes"]]
+    assert rss == sorted(rss, reverse=True)
+    assert client.get("/api/processes", params={"sort": "name"}).status_code == 400
+
+
+def test_get_alerts(client):
+    """Firing alerts are listed until they resolve."""
+    from app.main import detector
+    from app.models import SystemStats
+    stats = SystemStats(**{**client.get("/api/stats").json(), "memory_percent": 97.0})
+    
+    detector.observe(stats)
+    alerts = client.get("/api/alerts").json()["alerts"]
+    
+    assert [(a["id"], a["state"], a["severity"]) for a in alerts] == [
+        ("memory_percent.threshold", "firing", "critical")
+    ]
+    assert "sysmon_alerts_firing 1.0" in client.get("/metrics").text
@@ -0,0 +1,78 @@
+"""Tests for the Prometheus exposition."""
+from datetime import datetime
+
+from app.models import ContainerStats, DiskUsage, SystemStats
+from app.services.metrics import MetricsExporter, format_metric
+
+
+def make_stats(cpu: float = 12.5) -> SystemStats:
+    return SystemStats(
+        timestamp=datetime(2026, 1, 1), cpu_percent=cpu, memory_percent=50.0,
+        memory_used_gb=8.0, memory_total_gb=16.0, disk_percent=40.0,
+        disk_used_gb=400.0, disk_total_gb=1000.0, docker_containers_total=2,
+        docker_containers_running=1, docker_containers_stopped=1
+    )
+
+
+def lines(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def test_format_metric_with_labels():
+    text = format_metric("m", "Help.", "gauge", [({"name": 'a"b\\c'}, 1), ({}, float("nan"))])
+
+    assert text == '# HELP m Help.\n# TYPE m gauge\nm{name="a\\"b\\\\c"} 1.0\nm NaN\n'
+
+
+def test_render_stats_counters_and_tamagotchi():
+    exporter = MetricsExporter()
+
+    text = exporter.render(make_stats(), None, {"health": 90.0, "level": 2},
+                           [("sysmon_collections_total", "counter", "Collections.", 7)])
+
+    assert "sysmon_cpu_percent 12.5" in lines(text)
+    assert f"sysmon_memory_used_bytes {8.0 * 1024 ** 3!r}" in lines(text)
+    assert "sysmon_stats_timestamp_seconds 1767225600.0" in lines(text)
+    assert 'sysmon_docker_containers{state="all"} 2.0' in lines(text)
+    assert 'sysmon_docker_containers{state="stopped"} 1.0' in lines(text)
+    assert "sysmon_docker_containers_total" not in text
+    assert "sysmon_tamagotchi_health 90.0" in lines(text)
+    assert "sysmon_collections_total 7.0" in lines(text)
+    assert "# TYPE sysmon_collections_total counter" in text
+
+
+def test_render_disk_mounts():
+    stats = make_stats()
+    stats.disks = [DiskUsage(path="/", percent=40.0, used_gb=1.0, total_gb=2.0),
+                   DiskUsage(path="/mnt/nas", percent=0.0, used_gb=0.0, total_gb=0.0, stale=True)]
+
+    text = MetricsExporter().render(stats, None, {}, [])
+
+    assert f'sysmon_disk_mount_used_bytes{{path="/"}} {float(1024 ** 3)!r}' in lines(text)
+    assert 'sysmon_disk_mount_stale{path="/mnt/nas"} 1.0' in lines(text)
+
+
+def test_snapshot_sections_rendered_once_per_snapshot():
+    exporter = MetricsExporter()
+    stats = make_stats()
+
+    for _ in range(5):
+        exporter.render(stats, None, {}, [])
+    assert exporter.renders == 1
+
+    text = exporter.render(make_stats(cpu=50.0), None, {}, [])
+    assert exporter.renders == 2
+    assert "sysmon_cpu_percent 50.0" in lines(text)
+
+
+def test_render_containers():
+    container = ContainerStats(
+        id="abcdef1234567890", name="web", cpu_percent=5.0, memory_used_mb=64.0,
+        memory_limit_mb=512.0, memory_percent=12.5, net_rx_bytes=10, net_tx_bytes=20,
+        block_read_bytes=30, block_write_bytes=40
+    )
+
+    text = MetricsExporter().render(None, [container], {}, [])
+
+    assert 'sysmon_container_memory_used_bytes{name="web",id="abcdef123456"} 67108864.0' in lines(text)
+    assert 'sysmon_container_network_receive_bytes_total{name="web",id="abcdef123456"} 10.0' in lines(text)
@@ -0,0 +1,67 @@
+"""Tests for the hub-side node registry."""
+import pytest
+from app.services.history import numeric_fields
+from app.services.nodes import NodeRegistry, is_valid_node_name, slugify_node_name
+
+FIELDS = numeric_fields()
+NOW = 1_767_225_600.0  # 2026-01-01
+
+
+def row(ts, cpu):
+    return [ts] + [cpu if f == "cpu_percent" else 1.0 for f in FIELDS]
+
+
+def test_ingest_keeps_latest_and_history():
+    registry = NodeRegistry()
+
+    stored = registry.ingest("web-1", FIELDS, [row(NOW + 2, 20.0), row(NOW, 10.0)])
+
+    state = registry.nodes["web-1"]
+    assert stored == 2
+    assert state.latest["cpu_percent"] == 20.0
+    assert state.timestamp == NOW + 2
+    result = state.history.query(NOW - 10, NOW + 10, "raw")
+    assert result["metrics"]["cpu_percent"] == [10.0, 20.0]
+
+
+def test_ingest_maps_fields_by_name():
+    """Agents may send a different column set; missing metrics default to 0."""
+    registry = NodeRegistry()
+
+    registry.ingest("old-agent", ["memory_percent", "unknown", "cpu_percent"], [[NOW, 40.0, 1.0, 5.0]])
+
+    latest = registry.nodes["old-agent"].latest
+    assert latest["cpu_percent"] == 5.0
+    assert latest["memory_percent"] == 40.0
+    assert latest["disk_percent"] == 0.0
+    assert "unknown" not in latest
+
+
+def test_summary_marks_offline_nodes():
+    registry = NodeRegistry(offline_after=10)
+    registry.ingest("a", FIELDS, [row(NOW, 1.0)])
+    registry.ingest("b", FIELDS, [row(NOW, 2.0)])
+    registry.nodes["b"].last_seen -= 60
+
+    summary = registry.summary()
+
+    assert list(summary) == ["a", "b"]
+    assert summary["a"]["online"] and not summary["b"]["online"]
+    assert summary["b"]["cpu_percent"] == 2.0
+
+
+def test_node_limit():
+    registry = NodeRegistry(max_nodes=1)
+    registry.ingest("a", FIELDS, [row(NOW, 1.0)])
+
+    with pytest.raises(ValueError):
+        registry.ingest("b", FIELDS, [row(NOW, 1.0)])
+
+
+def test_node_names():
+    assert is_valid_node_name("web-1.example_com")
+    for name in ("", "web 1", "a/b", "..", "-web", "x" * 65):
+        assert not is_valid_node_name(name)
+        assert is_valid_node_name(slugify_node_name(name))
+    assert slugify_node_name("web 1/a") == "web-1-a"
+    assert slugify_node_name("..") == "node"
@@ -0,0 +1,62 @@
+"""Tests for the top-N process table."""
+from types import SimpleNamespace
+
+import pytest
+from app.services import processes as processes_module
+from app.services.processes import ProcessTable
+
+
+def proc(pid, cpu, rss, created=1.0, name=None):
+    return SimpleNamespace(info={
+        "pid": pid, "name": name or f"p{pid}", "username": "root",
+        "cpu_times": SimpleNamespace(user=cpu, system=0.0),
+        "memory_info": SimpleNamespace(rss=rss), "create_time": created,
+    })
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    state = {"procs": [], "now": 0.0}
+    monkeypatch.setattr(processes_module.psutil, "process_iter", lambda attrs: iter(state["procs"]))
+    monkeypatch.setattr(processes_module.psutil, "virtual_memory", lambda: SimpleNamespace(total=1000 * 1024 ** 2))
+    monkeypatch.setattr(processes_module.time, "monotonic", lambda: state["now"])
+    return state
+
+
+def test_cpu_from_deltas_between_samples(fake_psutil):
+    table = ProcessTable(top_n=2)
+    fake_psutil["procs"] = [proc(1, 10.0, 100 * 1024 ** 2), proc(2, 50.0, 10 * 1024 ** 2), proc(3, 0.0, 500 * 1024 ** 2)]
+    first = table.sample()
+    assert all(p.cpu_percent == 0.0 for p in first["cpu"])
+
+    fake_psutil["now"] = 2.0
+    fake_psutil["procs"] = [proc(1, 12.0, 100 * 1024 ** 2), proc(2, 50.5, 10 * 1024 ** 2), proc(3, 0.0, 500 * 1024 ** 2)]
+    result = table.sample()
+
+    assert [(p.pid, p.cpu_percent) for p in result["cpu"]] == [(1, 100.0), (2, 25.0)]
+    assert [(p.pid, p.memory_rss_mb, p.memory_percent) for p in result["memory"]] == [(3, 500.0, 50.0), (1, 100.0, 10.0)]
+
+
+def test_exited_and_reused_pids(fake_psutil):
+    """Baselines of exited processes are dropped; a reused PID is not compared with its predecessor."""
+    table = ProcessTable()
+    fake_psutil["procs"] = [proc(1, 100.0, 1), proc(2, 5.0, 1)]
+    table.sample()
+
+    fake_psutil["now"] = 1.0
+    fake_psutil["procs"] = [proc(2, 5.5, 1, created=9.0)]
+    result = table.sample()
+
+    assert [(p.pid, p.cpu_percent) for p in result["cpu"]] == [(2, 0.0)]
+    assert set(table._baselines) == {2}
+    assert table.process_count == 1
+
+
+def test_access_denied_processes_are_skipped(fake_psutil):
+    denied = proc(1, 1.0, 1)
+    denied.info["cpu_times"] = None
+    fake_psutil["procs"] = [denied, proc(2, 1.0, 1)]
+
+    result = ProcessTable().sample()
+
+    assert [p.pid for p in result["cpu"]] == [2]
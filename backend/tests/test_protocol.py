@@ -0,0 +1,50 @@
+"""Tests for WebSocket delta encoding."""
+from app.websocket.protocol import diff_message
+
+
+def test_diff_keeps_only_changed_fields():
+    """Unchanged fields and sections are omitted from the delta."""
+    previous = {
+        "type": "stats_update", "seq": 1,
+        "stats": {"cpu_percent": 10.0, "memory_total_gb": 16.0},
+        "tamagotchi": {"name": "Server-chan", "level": 1},
+    }
+    current = {
+        "type": "stats_update", "seq": 2,
+        "stats": {"cpu_percent": 12.5, "memory_total_gb": 16.0},
+        "tamagotchi": {"name": "Server-chan", "level": 1},
+    }
+    assert diff_message(previous, current) == {"stats": {"cpu_percent": 12.5}}
+
+
+def test_diff_new_fields_and_non_dict_sections():
+    """New fields, new sections and changed lists are included."""
+    previous = {"stats": {"cpu_percent": 10.0}, "containers": [{"id": "a"}]}
+    current = {
+        "stats": {"cpu_percent": 10.0, "disk_percent": 5.0},
+        "containers": [{"id": "a"}, {"id": "b"}],
+        "tamagotchi": {"name": "x"},
+    }
+    assert diff_message(previous, current) == {
+        "stats": {"disk_percent": 5.0},
+        "containers": [{"id": "a"}, {"id": "b"}],
+        "tamagotchi": {"name": "x"},
+    }
+    assert diff_message(current, current) == {}
+
+
+def test_diff_lists_removed_fields_and_sections():
+    """Fields and sections that disappeared are listed so clients can drop them."""
+    previous = {
+        "type": "stats_update", "seq": 1,
+        "stats": {"cpu_percent": 10.0},
+        "nodes": {"alpha": {"cpu_percent": 1.0}, "beta": {"cpu_percent": 2.0}},
+        "containers": [{"id": "a"}],
+    }
+    current = {
+        "type": "stats_update", "seq": 2,
+        "stats": {"cpu_percent": 10.0},
+        "nodes": {"alpha": {"cpu_percent": 1.0}},
+    }
+    assert diff_message(previous, current) == {"removed": {"nodes": ["beta"], "containers": None}}
+    assert "removed" not in diff_message(current, previous)
@@ -0,0 +1,48 @@
+"""Tests for counter-delta rate computation."""
+from collections import namedtuple
+
+from app.services.rates import PARTITION_RE, CounterRates, PerCoreUsage, matches_any
+
+CpuTimes = namedtuple("CpuTimes", ["user", "system", "idle"])
+
+
+def test_rates_summed_across_devices():
+    rates = CounterRates(columns=2)
+    assert rates.update({"a": (0, 0), "b": (100, 0)}, now=0.0) == [0.0, 0.0]
+
+    assert rates.update({"a": (100, 10), "b": (300, 30)}, now=2.0) == [150.0, 20.0]
+
+
+def test_hot_plugged_device_does_not_spike():
+    """A new device's lifetime counters are not counted as one interval's traffic."""
+    rates = CounterRates(columns=1)
+    rates.update({"eth0": (0,)}, now=0.0)
+
+    assert rates.update({"eth0": (10,), "usb0": (10 ** 12,)}, now=1.0) == [10.0]
+    assert rates.update({"eth0": (20,), "usb0": (10 ** 12 + 5,)}, now=2.0) == [15.0]
+    # Device removed
+    assert rates.update({"usb0": (10 ** 12 + 10,)}, now=3.0) == [5.0]
+
+
+def test_counter_reset_does_not_spike():
+    rates = CounterRates(columns=1)
+    rates.update({"eth0": (10 ** 9,)}, now=0.0)
+
+    assert rates.update({"eth0": (50,)}, now=1.0) == [0.0]
+    assert rates.update({"eth0": (150,)}, now=2.0) == [100.0]
+
+
+def test_per_core_usage():
+    cores = PerCoreUsage()
+    assert cores.update([CpuTimes(0, 0, 0), CpuTimes(0, 0, 0)]) == [0.0, 0.0]
+
+    assert cores.update([CpuTimes(25, 0, 75), CpuTimes(100, 0, 0)]) == [25.0, 100.0]
+    # Core went offline: new baseline
+    assert cores.update([CpuTimes(50, 0, 150)]) == [0.0]
+
+
+def test_device_filters():
+    assert PARTITION_RE.match("sda1") and PARTITION_RE.match("nvme0n1p2")
+    assert not PARTITION_RE.match("sda") and not PARTITION_RE.match("nvme0n1")
+    assert matches_any("veth12ab", ["lo", "veth*"])
+    assert not matches_any("eth0", ["lo", "veth*"])
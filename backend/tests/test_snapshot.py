@@ -0,0 +1,98 @@
+"""Tests for the shared stats snapshot cache."""
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from app.models import SystemStats
+from app.services.snapshot import StatsSnapshot
+
+
+def make_stats(cpu: float = 10.0) -> SystemStats:
+    return SystemStats(
+        timestamp=datetime.utcnow(),
+        cpu_percent=cpu,
+        memory_percent=50.0,
+        memory_used_gb=8.0,
+        memory_total_gb=16.0,
+        disk_percent=40.0,
+        disk_used_gb=400.0,
+        disk_total_gb=1000.0,
+        docker_containers_total=2,
+        docker_containers_running=1,
+        docker_containers_stopped=1
+    )
+
+
+class SlowCollector:
+    """Collector that counts calls and takes a while to finish."""
+    
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self) -> SystemStats:
+        with self._lock:
+            self.calls += 1
+            cpu = float(self.calls)
+        time.sleep(self.delay)
+        return make_stats(cpu)
+
+
+@pytest.mark.asyncio
+async def test_get_returns_fresh_snapshot_without_collecting():
+    """Readers get the published snapshot while it is younger than max_age."""
+    collector = SlowCollector()
+    snapshot = StatsSnapshot(collector, max_age=60)
+    stats = make_stats(42.0)
+    snapshot.publish(stats)
+    
+    for _ in range(10):
+        assert await snapshot.get() is stats
+    assert collector.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_collection():
+    """Concurrent cache misses await a single in-flight collection."""
+    collector = SlowCollector()
+    snapshot = StatsSnapshot(collector, max_age=60)
+    
+    results = await asyncio.gather(*(snapshot.get() for _ in range(20)))
+    
+    assert collector.calls == 1
+    assert snapshot.collections == 1
+    assert all(r is results[0] for r in results)
+    assert snapshot.latest is results[0]
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_refreshed():
+    """A snapshot older than max_age triggers a new collection."""
+    collector = SlowCollector(delay=0)
+    snapshot = StatsSnapshot(collector, max_age=0)
+    snapshot.publish(make_stats(99.0))
+    
+    await asyncio.sleep(0.01)
+    stats = await snapshot.get()
+    
+    assert collector.calls == 1
+    assert stats.cpu_percent == 1.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_reader_does_not_cancel_shared_collection():
+    """Cancelling one waiter leaves the collection running for the others."""
+    collector = SlowCollector(delay=0.1)
+    snapshot = StatsSnapshot(collector, max_age=60)
+    
+    first = asyncio.create_task(snapshot.get())
+    second = asyncio.create_task(snapshot.get())
+    await asyncio.sleep(0.01)
+    first.cancel()
+    
+    stats = await second
+    assert stats.cpu_percent == 1.0
+    assert collector.calls == 1
@@ -0,0 +1,125 @@
+"""Tests for the Server-Sent Events stream (/api/stream)."""
+import asyncio
+import json
+
+import pytest
+from app.websocket.sse import EventStreamResponse, encode_event
+from tests.test_websocket_manager import make_websocket, managers, sections  # noqa: F401
+
+
+class FakeASGI:
+    """Records what an ASGI response sends; receive() blocks until the client leaves."""
+
+    def __init__(self):
+        self.messages = []
+        self.left = asyncio.Event()
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    async def receive(self):
+        await self.left.wait()
+        return {"type": "http.disconnect"}
+
+    def events(self):
+        """Data events received, as (id, decoded JSON)."""
+        events = []
+        body = b"".join(m.get("body", b"") for m in self.messages).decode()
+        for block in body.split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+            if "data" in fields:
+                events.append((fields.get("id"), json.loads(fields["data"])))
+        return events
+
+
+async def open_stream(manager, **kwargs):
+    asgi = FakeASGI()
+    task = asyncio.create_task(EventStreamResponse(manager, **kwargs)({"type": "http"}, asgi.receive, asgi.send))
+    while manager.get_connection_count() == 0 or not asgi.messages:
+        await asyncio.sleep(0)
+    return asgi, task
+
+
+async def close_stream(asgi, task):
+    asgi.left.set()
+    await asyncio.wait_for(task, 1)
+
+
+@pytest.mark.asyncio
+async def test_stream_shares_frames_with_websockets(managers):
+    """SSE and WebSocket clients of a subscription get the same message, built once."""
+    manager = managers(default_interval=1)
+    websocket = make_websocket()
+    await manager.connect(websocket)
+    asgi, task = await open_stream(manager)
+    await asyncio.sleep(0)
+
+    await manager.publish(sections(10.0), tick=0)
+    await manager.drain()
+
+    assert len(manager.groups) == 1
+    [(event_id, message)] = asgi.events()
+    assert message == json.loads(websocket.sent[0])
+    assert event_id == str(message["seq"])
+    start = asgi.messages[0]
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+    assert b"content-length" not in dict(start["headers"])
+    assert asgi.messages[1]["body"] == b"retry: 3000\n\n"
+
+    await close_stream(asgi, task)
+    assert manager.get_connection_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_resumes_with_delta(managers):
+    """A reconnecting delta client that missed nothing resumes with a delta."""
+    manager = managers(default_interval=1, keyframe_interval=100)
+    await manager.connect(make_websocket(), delta=True)  # Keeps the group alive
+    await manager.publish(sections(10.0), tick=0)
+    await manager.drain()
+    last_seq = next(iter(manager.groups.values())).previous_seq
+
+    resumed, resumed_task = await open_stream(manager, delta=True, last_event_id=last_seq)
+    behind, behind_task = await open_stream(manager, delta=True, last_event_id=last_seq - 1)
+    await manager.publish(sections(20.0), tick=0)
+    await manager.drain()
+
+    assert [m["type"] for _, m in resumed.events()] == ["stats_delta"]
+    assert resumed.events()[0][1]["stats"] == {"cpu_percent": 20.0}
+    assert [m["type"] for _, m in behind.events()] == ["stats_update"]
+    await close_stream(resumed, resumed_task)
+    await close_stream(behind, behind_task)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_comments_and_disconnect(managers):
+    manager = managers()
+    asgi, task = await open_stream(manager, heartbeat=0.01)
+
+    await asyncio.sleep(0.05)
+    await close_stream(asgi, task)
+
+    assert any(m.get("body") == b": heartbeat\n\n" for m in asgi.messages)
+    assert manager.get_connection_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_parses_subscription():
+    from app.main import stream_endpoint
+
+    response = await stream_endpoint(protocol="delta", topics="host,bogus", interval=5, last_event_id="42")
+    default = await stream_endpoint(last_event_id="junk")
+
+    assert response.key == (frozenset({"host"}), 5)
+    assert (response.delta, response.last_event_id) == (True, 42)
+    assert (default.key, default.delta, default.last_event_id) == (None, False, None)
+
+
+def test_events_are_encoded_once_per_message():
+    message = json.dumps({"type": "stats_update", "seq": 7})
+
+    first = encode_event(message, 7)
+
+    assert first == f"id: 7\ndata: {message}\n\n".encode()
+    assert encode_event(message, 7) is first
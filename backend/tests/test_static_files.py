@@ -0,0 +1,102 @@
+"""Tests for precompressed, cache-friendly frontend serving."""
+import gzip
+
+import pytest
+from fastapi.responses import FileResponse
+from app.services.static_files import IMMUTABLE, REVALIDATE, StaticIndex, accepted_encodings
+
+BUNDLE = b"console.log('SysMon dashboard');\n" * 200
+
+
+@pytest.fixture
+def dist(tmp_path):
+    """A built frontend: index.html, a hashed JS bundle, an image and a favicon."""
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(b"<!doctype html><div id=app></div>" * 20)
+    (tmp_path / "assets" / "index-B3x9_kQz.js").write_bytes(BUNDLE)
+    (tmp_path / "assets" / "logo-4f2a9c1d.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 4)
+    (tmp_path / "favicon.svg").write_bytes(b"<svg/>")
+    index = StaticIndex(tmp_path)
+    index.load()
+    index.compress()
+    return index
+
+
+def test_hashed_assets_are_compressed_and_immutable(dist):
+    response = dist.lookup("assets/index-B3x9_kQz.js").response("gzip, deflate, br")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Content-Type"].startswith("text/javascript") or \
+        response.headers["Content-Type"].startswith("application/javascript")
+    assert gzip.decompress(response.body) == BUNDLE
+    assert len(response.body) < len(BUNDLE) // 10
+
+
+def test_uncompressed_when_not_accepted_and_images_never_compressed(dist):
+    bundle = dist.lookup("assets/index-B3x9_kQz.js").response("identity")
+    image = dist.lookup("assets/logo-4f2a9c1d.png").response("gzip")
+
+    assert "Content-Encoding" not in bundle.headers and bundle.body == BUNDLE
+    assert "Content-Encoding" not in image.headers and "Vary" not in image.headers
+    assert image.headers["Cache-Control"] == IMMUTABLE
+
+
+def test_etag_revalidation_returns_304(dist):
+    static_file = dist.lookup("assets/index-B3x9_kQz.js")
+    first = static_file.response("gzip")
+
+    cached = static_file.response("gzip", if_none_match=first.headers["ETag"])
+    other_encoding = static_file.response("", if_none_match=first.headers["ETag"])
+
+    assert cached.status_code == 304 and cached.body == b""
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert other_encoding.status_code == 200  # Identity is a different representation
+
+
+def test_index_in_memory_and_spa_fallback(dist, tmp_path):
+    (tmp_path / "index.html").unlink()  # Served from memory, never read again
+
+    for path in ("", "index.html", "history/cpu"):
+        response = dist.lookup(path).response("")
+        assert response.body.startswith(b"<!doctype html>")
+        assert response.headers["Cache-Control"] == REVALIDATE
+    assert dist.lookup("assets/missing-00000000.js") is None
+
+
+def test_load_does_not_compress(tmp_path):
+    """Startup only reads and hashes; files are served as is until compress() runs."""
+    (tmp_path / "app.js").write_bytes(BUNDLE)
+    index = StaticIndex(tmp_path)
+    index.load()
+    static_file = index.lookup("app.js")
+
+    before = static_file.response("gzip")
+    index.compress()
+    after = static_file.response("gzip")
+
+    assert "Content-Encoding" not in before.headers and before.body == BUNDLE
+    assert after.headers["Content-Encoding"] == "gzip"
+    assert before.headers["ETag"] != after.headers["ETag"]
+
+
+def test_precompressed_siblings_and_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.static_files.STATIC_MEMORY_LIMIT", 1024)
+    (tmp_path / "index.html").write_bytes(b"<html></html>" * 10)
+    (tmp_path / "index.html.gz").write_bytes(b"prebuilt")
+    (tmp_path / "video.mp4").write_bytes(b"\x00" * 4096)
+    index = StaticIndex(tmp_path)
+    index.load()
+
+    # Build-time files are served from startup on and never recompressed
+    assert index.lookup("index.html").response("gzip").body == b"prebuilt"
+    index.compress()
+    assert index.lookup("index.html").response("gzip").body == b"prebuilt"
+    assert "index.html.gz" not in index.files
+    assert isinstance(index.lookup("video.mp4").response(""), FileResponse)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip;q=1.0, br;q=0, deflate") == ["gzip", "deflate"]
+    assert accepted_encodings("") == []
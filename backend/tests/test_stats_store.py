@@ -0,0 +1,143 @@
+"""Tests for durable stats history storage."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select, Session
+from app.models import StatsSample, SystemStats
+from app.services.history import to_epoch
+from app.services.stats_store import StatsWriter, compact, query_samples, write_rows, stats_to_row
+
+BASE = datetime(2026, 1, 1, 0, 0, 0)
+BASE_TS = to_epoch(BASE)
+
+
+def make_stats(seconds: float, cpu: float) -> SystemStats:
+    return SystemStats(
+        timestamp=BASE + timedelta(seconds=seconds),
+        cpu_percent=cpu,
+        memory_percent=50.0,
+        memory_used_gb=8.0,
+        memory_total_gb=16.0,
+        disk_percent=40.0,
+        disk_used_gb=400.0,
+        disk_total_gb=1000.0,
+        docker_containers_total=2,
+        docker_containers_running=1,
+        docker_containers_stopped=1
+    )
+
+
+def count_rows(engine, resolution=None):
+    with Session(engine) as session:
+        stmt = select(StatsSample)
+        if resolution is not None:
+            stmt = stmt.where(StatsSample.resolution == resolution)
+        return len(session.exec(stmt).all())
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_until_flush(engine):
+    """Samples are buffered and written in one batch."""
+    writer = StatsWriter(engine, batch_size=100, flush_interval=60)
+    for i in range(10):
+        writer.add(make_stats(i * 2, 10.0))
+    
+    assert writer.pending() == 10
+    assert count_rows(engine) == 0
+    
+    await writer.flush()
+    assert writer.pending() == 0
+    assert writer.rows_written == 10
+    assert count_rows(engine, resolution=0) == 10
+
+
+@pytest.mark.asyncio
+async def test_writer_retries_rows_after_failed_write(engine, monkeypatch):
+    """A batch that fails to write is kept and written by the next flush."""
+    from app.services import stats_store
+    
+    calls = []
+    
+    def flaky_write_rows(engine, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        write_rows(engine, rows)
+    
+    monkeypatch.setattr(stats_store, "write_rows", flaky_write_rows)
+    writer = StatsWriter(engine, batch_size=100, flush_interval=60, buffer_limit=8)
+    for i in range(5):
+        writer.add(make_stats(i * 2, 10.0))
+    
+    with pytest.raises(RuntimeError):
+        await writer.flush()
+    assert writer.pending() == 5
+    assert count_rows(engine) == 0
+    
+    for i in range(5, 10):
+        writer.add(make_stats(i * 2, 10.0))
+    await writer.flush()
+    
+    # Capped at buffer_limit: the two oldest samples were dropped
+    assert calls == [5, 8]
+    assert (writer.pending(), writer.rows_written, writer.rows_dropped) == (0, 8, 2)
+    assert count_rows(engine, resolution=0) == 8
+
+
+def test_query_samples_buckets_by_step(engine):
+    """Range queries average rows into step buckets."""
+    write_rows(engine, [stats_to_row(make_stats(i * 2, float(i % 2) * 100)) for i in range(60)])
+    
+    result = query_samples(engine, BASE_TS, BASE_TS + 119, step=60)
+    assert result["timestamps"] == [BASE_TS, BASE_TS + 60]
+    assert result["metrics"]["cpu_percent"] == [50.0, 50.0]
+    
+    # Range filter excludes rows outside [from, to]
+    result = query_samples(engine, BASE_TS + 60, BASE_TS + 119, step=2)
+    assert len(result["timestamps"]) == 30
+
+
+def test_query_samples_weights_rollups(engine):
+    """Buckets of mixed rows are weighted by samples; sub-second timestamps stay in their bucket."""
+    rollup = stats_to_row(make_stats(0, 10.0))
+    rollup.update(resolution=300, samples=3)
+    write_rows(engine, [rollup, stats_to_row(make_stats(59.5, 50.0))])
+    
+    result = query_samples(engine, BASE_TS, BASE_TS + 119, step=60)
+    assert result["timestamps"] == [BASE_TS]
+    assert result["metrics"]["cpu_percent"] == [20.0]
+
+
+def test_compaction_rolls_up_and_deletes(engine):
+    """Old raw rows become weighted 5-minute rollups; recent rows stay raw."""
+    # Two hours of 2s samples: cpu 20 in the first hour, 80 in the second
+    rows = [stats_to_row(make_stats(i * 2, 20.0 if i < 1800 else 80.0)) for i in range(3600)]
+    write_rows(engine, rows)
+    
+    # 25 hours after BASE: the first hour is past the 24h raw retention
+    now = BASE_TS + 25 * 3600
+    removed = compact(engine, now=now)
+    
+    assert removed == 1800
+    assert count_rows(engine, resolution=0) == 1800
+    assert count_rows(engine, resolution=300) == 12
+    
+    with Session(engine) as session:
+        rollups = session.exec(select(StatsSample).where(StatsSample.resolution == 300)).all()
+    assert all(r.samples == 150 for r in rollups)
+    assert all(r.cpu_percent == 20.0 for r in rollups)
+    
+    # Queries see rollups and raw rows without overlap
+    result = query_samples(engine, BASE_TS, BASE_TS + 7200, step=3600)
+    assert result["metrics"]["cpu_percent"] == [20.0, 80.0]
+    
+    # Running again is a no-op
+    assert compact(engine, now=now) == 0
+
+
+def test_compaction_applies_final_retention(engine):
+    """Rows older than the total retention are deleted."""
+    write_rows(engine, [stats_to_row(make_stats(0, 10.0))])
+    removed = compact(engine, now=BASE_TS + 400 * 86400)
+    assert removed >= 1
+    assert count_rows(engine) == 0
@@ -16,6 +16,7 @@ def test_get_stats(mock_system_monitor):
     assert stats.disk_percent == 70.0
     assert stats.disk_used_gb == 700.0
     assert stats.disk_total_gb == 1000.0
+    assert [(d.path, d.percent, d.stale) for d in stats.disks] == [("/", 70.0, False)]
     assert stats.docker_containers_total == 4
     assert stats.docker_containers_running == 3
     assert stats.docker_containers_stopped == 1
@@ -36,18 +37,18 @@ def test_health_score_calculation(mock_system_monitor):
     assert 35 <= health <= 45  # Allow some rounding tolerance
 
 
-def test_docker_unavailable():
+def test_docker_unavailable(monkeypatch):
     """Test behavior when Docker is unavailable."""
     from unittest.mock import MagicMock
     
     # Create monitor with failing Docker client
+    monkeypatch.setattr("docker.APIClient", MagicMock(side_effect=Exception("No socket")))
     monitor = SystemMonitor()
-    monitor.docker_client = None
-    monitor.docker_available = False
     
     stats = monitor._get_docker_stats()
     
     # Should return zeros gracefully
+    assert monitor.docker.state == "unavailable"
     assert stats["total"] == 0
     assert stats["running"] == 0
     assert stats["stopped"] == 0
@@ -63,7 +64,7 @@ def test_docker_error_handling(mock_system_monitor, monkeypatch):
     def raise_error(*args, **kwargs):
         raise Exception("Docker daemon not available")
     
-    monitor.api_client.containers = raise_error
+    mock_system_monitor["api_client"].containers.side_effect = raise_error
     
     stats = monitor._get_docker_stats()
     
@@ -71,3 +72,28 @@ def test_docker_error_handling(mock_system_monitor, monkeypatch):
     assert stats["total"] == 0
     assert stats["running"] == 0
     assert stats["stopped"] == 0
+
+
+def test_rate_metrics(mock_system_monitor):
+    """Throughput, IOPS, load and per-core usage come from counter deltas."""
+    from types import SimpleNamespace
+    psutil_mock = mock_system_monitor["psutil"]
+    nic = lambda rx, tx: SimpleNamespace(bytes_recv=rx, bytes_sent=tx)
+    disk = lambda rb, wb, r, w: SimpleNamespace(read_bytes=rb, write_bytes=wb, read_count=r, write_count=w)
+    monitor = SystemMonitor()
+    clock = {"now": 100.0}
+    monitor.net_rates.clock = monitor.disk_io_rates.clock = lambda: clock["now"]
+    psutil_mock.net_io_counters.return_value = {"eth0": nic(0, 0), "lo": nic(0, 0)}
+    psutil_mock.disk_io_counters.return_value = {"sda": disk(0, 0, 0, 0), "sda1": disk(0, 0, 0, 0)}
+    monitor.get_stats()
+    
+    clock["now"] = 102.0
+    psutil_mock.net_io_counters.return_value = {"eth0": nic(2000, 1000), "lo": nic(10 ** 9, 10 ** 9)}
+    psutil_mock.disk_io_counters.return_value = {"sda": disk(4096, 8192, 10, 20), "sda1": disk(4096, 8192, 10, 20)}
+    stats = monitor.get_stats()
+    
+    assert (stats.net_rx_bytes_per_sec, stats.net_tx_bytes_per_sec) == (1000.0, 500.0)
+    assert (stats.disk_read_bytes_per_sec, stats.disk_write_bytes_per_sec) == (2048.0, 4096.0)
+    assert (stats.disk_read_iops, stats.disk_write_iops) == (5.0, 10.0)
+    assert (stats.load_1, stats.load_5, stats.load_15) == (0.5, 0.75, 1.0)
+    assert stats.cpu_per_core == [0.0, 100.0]
@@ -0,0 +1,54 @@
+"""Tests for atomic Tamagotchi mutations."""
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import Session, SQLModel, select
+from app.database import create_db_engine
+from app.models import Tamagotchi
+from app.services.tamagotchi_actions import feed, rename
+
+
+def test_feed_levels_up_in_one_statement(session):
+    """XP resets and the level increases when the threshold is reached."""
+    session.add(Tamagotchi(xp=80, happiness=97.0))
+    session.commit()
+
+    first = feed(session)
+    assert (first.level, first.xp, first.happiness) == (1, 90, 100.0)
+
+    second = feed(session)
+    assert (second.level, second.xp) == (2, 0)
+
+
+def test_feed_without_tamagotchi(session):
+    assert feed(session) is None
+
+
+def test_rename_updates_or_creates(session):
+    created = rename(session, "Rex")
+    assert created.id is not None
+
+    renamed = rename(session, "Rexy")
+    assert renamed.id == created.id
+    assert [t.name for t in session.exec(select(Tamagotchi)).all()] == ["Rexy"]
+
+
+def test_concurrent_feeds_lose_no_xp(tmp_path):
+    """Hundreds of concurrent feeds are all applied."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'feed.db'}", pool_size=8)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Tamagotchi())
+        session.commit()
+
+    def feed_once(_):
+        with Session(engine) as session:
+            return feed(session)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(feed_once, range(300)))
+
+    # Level n takes 10 * n feeds: 280 feeds reach level 8, 20 more give 200 XP
+    with Session(engine) as session:
+        tamagotchi = session.exec(select(Tamagotchi)).one()
+    assert (tamagotchi.level, tamagotchi.xp) == (8, 200)
+    engine.dispose()
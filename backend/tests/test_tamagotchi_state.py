@@ -0,0 +1,153 @@
+"""Tests for the write-behind Tamagotchi state."""
+import asyncio
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, select
+from app.models import Tamagotchi
+from app.services.tamagotchi_state import TamagotchiState
+
+
+def stored(engine) -> Tamagotchi:
+    with Session(engine) as session:
+        return session.exec(select(Tamagotchi)).first()
+
+
+@pytest.fixture
+def state(engine):
+    with Session(engine) as session:
+        session.add(Tamagotchi(name="Server-chan", health=100.0))
+        session.commit()
+    state = TamagotchiState(engine, flush_interval=60, health_threshold=5)
+    state.load()
+    return state
+
+
+def test_load_and_public(state):
+    """The row is mirrored in memory and exposed for broadcasts."""
+    assert state.loaded
+    assert state.public() == {"name": "Server-chan", "level": 1, "xp": 0, "health": 100.0, "happiness": 100.0}
+    assert not state.is_dirty()
+
+
+def test_set_health_stays_in_memory(engine, state):
+    """Health updates do not touch the database until flushed."""
+    for health in (99.0, 98.5, 97.0):
+        state.set_health(health)
+
+    assert state.health == 97.0
+    assert stored(engine).health == 100.0
+
+    state.flush_sync()
+    assert stored(engine).health == 97.0
+    assert state.flushes == 1
+    assert not state.is_dirty()
+
+
+def test_flush_only_writes_dirty_fields(engine, state):
+    """A health flush does not clobber fields committed by the REST API."""
+    state.set_health(80.0)
+    with Session(engine) as session:
+        tamagotchi = session.exec(select(Tamagotchi)).first()
+        tamagotchi.name = "Renamed"
+        tamagotchi.xp = 30
+        session.add(tamagotchi)
+        session.commit()
+
+    state.flush_sync()
+
+    tamagotchi = stored(engine)
+    assert (tamagotchi.name, tamagotchi.xp, tamagotchi.health) == ("Renamed", 30, 80.0)
+
+
+def test_apply_keeps_unflushed_health(engine, state):
+    """Mirroring a committed row keeps the newer in-memory health."""
+    state.set_health(70.0)
+    tamagotchi = stored(engine)
+    tamagotchi.name = "Renamed"
+
+    state.apply(tamagotchi)
+
+    assert state.public()["name"] == "Renamed"
+    assert state.health == 70.0
+
+
+def test_apply_ignores_older_rows(engine, state):
+    """A row that finished after a newer one (out-of-order requests) is ignored."""
+    older = stored(engine)
+    newer = older.model_copy(update={"xp": 10, "updated_at": older.updated_at + timedelta(seconds=1)})
+    renamed = newer.model_copy(update={"name": "Renamed", "updated_at": newer.updated_at + timedelta(seconds=1)})
+
+    state.apply(newer)
+    state.apply(older)
+    assert state.public()["xp"] == 10
+
+    state.apply(renamed)
+    state.apply(newer)
+    assert (state.public()["name"], state.public()["xp"]) == ("Renamed", 10)
+
+
+@pytest.mark.asyncio
+async def test_threshold_change_triggers_flush(engine, state):
+    """Small changes wait for the interval; a large one is flushed right away."""
+    task = asyncio.create_task(state.run())
+    await asyncio.sleep(0)
+
+    state.set_health(98.0)
+    await asyncio.sleep(0.05)
+    assert state.flushes == 0
+
+    state.set_health(90.0)
+    for _ in range(100):
+        if state.flushes:
+            break
+        await asyncio.sleep(0.01)
+
+    assert state.flushes == 1
+    assert stored(engine).health == 90.0
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_interval_flush_and_shutdown(engine, state):
+    """Dirty state is flushed every interval and once more on shutdown."""
+    state.flush_interval = 0.05
+    task = asyncio.create_task(state.run())
+    state.set_health(99.0)
+    await asyncio.sleep(0.15)
+    assert stored(engine).health == 99.0
+
+    state.set_health(98.0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert stored(engine).health == 98.0
+
+
+@pytest.mark.asyncio
+async def test_update_during_flush_is_kept(engine, state):
+    """A health change made while a write is in flight stays dirty for the next flush."""
+    write = state._write
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write(values):
+        started.set()
+        release.wait(5)
+        write(values)
+
+    state._write = slow_write
+    state.set_health(90.0)
+    flush = asyncio.create_task(state.flush())
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+
+    state.set_health(80.0)
+    release.set()
+    await flush
+
+    assert stored(engine).health == 90.0
+    assert state.is_dirty()
+    await state.flush()
+    assert stored(engine).health == 80.0
@@ -0,0 +1,43 @@
+"""Tests for the latency histograms."""
+import pytest
+from app.services.timings import LatencyHistogram, Timings
+
+
+def test_quantiles_interpolate_within_buckets():
+    histogram = LatencyHistogram(bounds=[0.001, 0.01, 0.1])
+    for _ in range(90):
+        histogram.observe(0.0005)
+    for _ in range(10):
+        histogram.observe(0.05)
+
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == pytest.approx(0.001 * 50 / 90)
+    assert 0.01 < histogram.quantile(0.95) <= 0.05
+    assert histogram.quantile(1.0) == 0.05  # Never above the largest observation
+
+
+def test_overflow_bucket_uses_max():
+    histogram = LatencyHistogram(bounds=[0.001])
+    histogram.observe(3.0)
+
+    assert histogram.counts == [0, 1]
+    assert histogram.quantile(0.99) == pytest.approx(3.0 * 0.99 + 0.001 * 0.01)
+
+
+def test_empty_histogram_summary():
+    summary = LatencyHistogram().summary()
+
+    assert summary == {"count": 0, "mean_ms": None, "max_ms": None,
+                       "p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+
+def test_timer_records_named_stages():
+    timings = Timings()
+    with timings.time("collect.cpu"):
+        pass
+    timings.observe("ws.send", 0.002)
+
+    report = timings.report()
+    assert list(report) == ["collect.cpu", "ws.send"]
+    assert report["ws.send"]["count"] == 1
+    assert report["ws.send"]["max_ms"] == 2.0
@@ -1,14 +1,34 @@
 """Tests for WebSocket connection manager."""
+import asyncio
+import json
+import time
+
 import pytest
+import pytest_asyncio
 from fastapi import WebSocket
 from unittest.mock import AsyncMock, MagicMock
 from app.websocket.manager import ConnectionManager
 
 
+@pytest_asyncio.fixture
+async def managers():
+    """Track managers created by a test and stop their writer tasks afterwards."""
+    created = []
+    
+    def factory(**kwargs) -> ConnectionManager:
+        manager = ConnectionManager(**kwargs)
+        created.append(manager)
+        return manager
+    
+    yield factory
+    for manager in created:
+        await manager.shutdown()
+
+
 @pytest.mark.asyncio
-async def test_connect():
+async def test_connect(managers):
     """Test WebSocket connection."""
-    manager = ConnectionManager()
+    manager = managers()
     websocket = MagicMock(spec=WebSocket)
     websocket.accept = AsyncMock()
     
@@ -20,9 +40,9 @@ async def test_connect():
 
 
 @pytest.mark.asyncio
-async def test_disconnect():
+async def test_disconnect(managers):
     """Test WebSocket disconnection."""
-    manager = ConnectionManager()
+    manager = managers()
     websocket = MagicMock(spec=WebSocket)
     websocket.accept = AsyncMock()
     
@@ -34,9 +54,9 @@ async def test_disconnect():
 
 
 @pytest.mark.asyncio
-async def test_send_personal_message():
+async def test_send_personal_message(managers):
     """Test sending message to specific client."""
-    manager = ConnectionManager()
+    manager = managers()
     websocket = MagicMock(spec=WebSocket)
     websocket.accept = AsyncMock()
     websocket.send_text = AsyncMock()
@@ -48,9 +68,9 @@ async def test_send_personal_message():
 
 
 @pytest.mark.asyncio
-async def test_broadcast():
+async def test_broadcast(managers):
     """Test broadcasting to multiple clients."""
-    manager = ConnectionManager()
+    manager = managers()
     
     websocket1 = MagicMock(spec=WebSocket)
     websocket1.accept = AsyncMock()
@@ -65,6 +85,7 @@ async def test_broadcast():
     
     message = {"type": "test", "data": "hello"}
     await manager.broadcast(message)
+    await manager.drain()
     
     # Both clients should receive the message
     assert websocket1.send_text.call_count == 1
@@ -72,9 +93,9 @@ async def test_broadcast():
 
 
 @pytest.mark.asyncio
-async def test_broadcast_with_failed_connection():
+async def test_broadcast_with_failed_connection(managers):
     """Test broadcast removes failed connections."""
-    manager = ConnectionManager()
+    manager = managers()
     
     # Working connection
     websocket1 = MagicMock(spec=WebSocket)
@@ -93,8 +114,333 @@ async def test_broadcast_with_failed_connection():
     
     message = {"type": "test", "data": "hello"}
     await manager.broadcast(message)
+    await manager.drain()
     
     # Failed connection should be removed
     assert manager.get_connection_count() == 1
     assert websocket1 in manager.active_connections
     assert websocket2 not in manager.active_connections
+
+
+def make_websocket(send_delay: float = 0.0) -> MagicMock:
+    """Mock WebSocket whose send_text takes send_delay seconds."""
+    websocket = MagicMock(spec=WebSocket)
+    websocket.accept = AsyncMock()
+    websocket.close = AsyncMock()
+    websocket.sent = []
+    
+    async def send_text(message):
+        if send_delay:
+            await asyncio.sleep(send_delay)
+        websocket.sent.append(message)
+    
+    websocket.send_text = AsyncMock(side_effect=send_text)
+    return websocket
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_delay_others(managers):
+    """A stalled client does not hold up delivery to healthy clients."""
+    manager = managers(send_timeout=5)
+    slow = make_websocket(send_delay=1.0)
+    fast = [make_websocket() for _ in range(50)]
+    
+    for websocket in [slow, *fast]:
+        await manager.connect(websocket)
+    
+    started = time.monotonic()
+    await manager.broadcast({"type": "test"})
+    while not all(ws.sent for ws in fast):
+        await asyncio.sleep(0.001)
+    
+    assert time.monotonic() - started < 0.5
+    assert not slow.sent
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_gets_latest_messages(managers):
+    """When a client's queue is full the oldest messages are dropped."""
+    manager = managers(send_timeout=5, queue_size=2, default_interval=1)
+    websocket = make_websocket(send_delay=0.05)
+    await manager.connect(websocket)
+    
+    for i in range(10):
+        await manager.publish(sections(float(i)), tick=0)
+    await manager.drain()
+    
+    received = [json.loads(message)["stats"]["cpu_percent"] for message in websocket.sent]
+    # First message was already being sent; then only the two newest survive
+    assert received[-2:] == [8.0, 9.0]
+    assert len(received) <= 3
+    assert manager.active_connections[websocket].dropped >= 7
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_disconnects_client(managers):
+    """A client whose send exceeds the timeout is disconnected and closed."""
+    manager = managers(send_timeout=0.05)
+    stalled = make_websocket(send_delay=10)
+    await manager.connect(stalled)
+    
+    await manager.broadcast({"type": "test"})
+    for _ in range(100):
+        if manager.get_connection_count() == 0:
+            break
+        await asyncio.sleep(0.01)
+    
+    assert manager.get_connection_count() == 0
+    stalled.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_writer(managers):
+    """Disconnecting stops the client's writer task."""
+    manager = managers()
+    websocket = make_websocket()
+    await manager.connect(websocket)
+    task = manager.active_connections[websocket].task
+    
+    manager.disconnect(websocket)
+    await asyncio.gather(task, return_exceptions=True)
+    
+    assert task.cancelled()
+    # Disconnecting twice is harmless
+    manager.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_while_sends_complete(managers):
+    """Shutdown stops writers even when their last send finished in the same step."""
+    manager = managers()
+    websockets = [make_websocket() for _ in range(3)]
+    for websocket in websockets:
+        await manager.connect(websocket)
+    
+    await manager.broadcast({"type": "test"})
+    while not all(ws.sent for ws in websockets):
+        await asyncio.sleep(0)
+    
+    # The writers have sent but not yet resumed when they are cancelled
+    await asyncio.wait_for(manager.shutdown(), timeout=2)
+    assert manager.get_connection_count() == 0
+
+
+def sections(cpu: float, name: str = "Server-chan") -> dict:
+    """One tick's worth of data as built by the broadcast loop."""
+    return {
+        "stats": {"timestamp": "t", "cpu_percent": cpu, "memory_total_gb": 16.0, "docker_containers_running": 3},
+        "tamagotchi": {"name": name, "level": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_delta_client_receives_keyframe_then_deltas(managers):
+    """Delta clients get a full keyframe first, then only changed fields."""
+    manager = managers(keyframe_interval=100, default_interval=1)
+    delta_client = make_websocket()
+    legacy_client = make_websocket()
+    await manager.connect(delta_client, delta=True)
+    await manager.connect(legacy_client)
+    
+    await manager.publish(sections(10.0), tick=0)
+    await manager.drain()
+    await manager.publish(sections(20.0), tick=0)
+    await manager.drain()
+    
+    keyframe, delta = [json.loads(m) for m in delta_client.sent]
+    assert keyframe["type"] == "stats_update"
+    assert keyframe["tamagotchi"] == {"name": "Server-chan", "level": 1}
+    assert delta == {
+        "type": "stats_delta",
+        "seq": keyframe["seq"] + 1,
+        "base": keyframe["seq"],
+        "stats": {"cpu_percent": 20.0},
+    }
+    
+    # Legacy clients always get full messages
+    assert [json.loads(m)["type"] for m in legacy_client.sent] == ["stats_update", "stats_update"]
+
+
+@pytest.mark.asyncio
+async def test_periodic_keyframes(managers):
+    """Every keyframe_interval-th update is sent in full to delta clients."""
+    manager = managers(keyframe_interval=3, default_interval=1)
+    websocket = make_websocket()
+    await manager.connect(websocket, delta=True)
+    
+    for i in range(6):
+        await manager.publish(sections(float(i)), tick=0)
+        await manager.drain()
+    
+    types = [json.loads(m)["type"] for m in websocket.sent]
+    assert types == ["stats_update", "stats_delta", "stats_update",
+                     "stats_delta", "stats_delta", "stats_update"]
+
+
+@pytest.mark.asyncio
+async def test_dropped_update_falls_back_to_keyframe(managers):
+    """A delta that doesn't build on the last delivered update is sent in full."""
+    manager = managers(keyframe_interval=100, queue_size=1, default_interval=1)
+    websocket = make_websocket(send_delay=0.05)
+    await manager.connect(websocket, delta=True)
+    
+    await manager.publish(sections(1.0), tick=0)
+    await asyncio.sleep(0)  # Writer starts sending update 1
+    await manager.publish(sections(2.0), tick=0)  # Dropped by the next broadcast
+    await manager.publish(sections(3.0), tick=0)
+    await manager.drain()
+    
+    received = [json.loads(m) for m in websocket.sent]
+    assert [m["stats"]["cpu_percent"] for m in received] == [1.0, 3.0]
+    assert received[-1]["type"] == "stats_update"
+
+
+@pytest.mark.asyncio
+async def test_request_keyframe(managers):
+    """A resync request makes the next update a full keyframe."""
+    manager = managers(keyframe_interval=100, default_interval=1)
+    websocket = make_websocket()
+    await manager.connect(websocket, delta=True)
+    
+    await manager.publish(sections(1.0), tick=0)
+    await manager.drain()
+    manager.request_keyframe(websocket)
+    await manager.publish(sections(2.0), tick=0)
+    await manager.drain()
+    
+    assert [json.loads(m)["type"] for m in websocket.sent] == ["stats_update", "stats_update"]
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_filter_topics_and_rates(managers):
+    """Clients only receive their topics, at their own interval."""
+    manager = managers(default_interval=2)
+    default = make_websocket()
+    wall = make_websocket()
+    debug = make_websocket()
+    for websocket in (default, wall, debug):
+        await manager.connect(websocket)
+    
+    manager.subscribe(wall, {"tamagotchi"}, interval=10)
+    manager.subscribe(debug, {"host", "docker"}, interval=1)
+    
+    for tick in range(10):
+        await manager.publish(sections(float(tick)), tick)
+        await manager.drain()
+    
+    assert len(default.sent) == 5
+    assert len(wall.sent) == 1
+    assert len(debug.sent) == 10
+    
+    wall_msg = json.loads(wall.sent[0])
+    assert set(wall_msg) == {"type", "seq", "tamagotchi"}
+    debug_msg = json.loads(debug.sent[-1])
+    assert set(debug_msg) == {"type", "seq", "stats"}
+    assert debug_msg["stats"]["cpu_percent"] == 9.0
+
+
+@pytest.mark.asyncio
+async def test_groups_share_one_serialized_frame(managers):
+    """Clients with the same subscription share a single encoded frame per tick."""
+    manager = managers(default_interval=1)
+    clients = [make_websocket() for _ in range(20)]
+    for websocket in clients:
+        await manager.connect(websocket)
+    manager.subscribe(clients[0], {"host"}, interval=1)
+    
+    await manager.publish(sections(1.0), tick=0)
+    queued = [manager.active_connections[ws].queue[0] for ws in clients[1:]]
+    
+    assert len(manager.groups) == 2
+    assert all(frame is queued[0] for frame in queued)
+    await manager.drain()
+
+
+@pytest.mark.asyncio
+async def test_publish_reuses_given_and_unchanged_encodings(managers):
+    """Pre-encoded stats are spliced in as-is; unchanged sections are not re-encoded."""
+    manager = managers(default_interval=1)
+    full, host_only = make_websocket(), make_websocket()
+    for websocket in (full, host_only):
+        await manager.connect(websocket)
+    manager.subscribe(host_only, {"host"}, interval=1)
+    
+    data = sections(1.0)
+    marker = b'{"encoded":"once"}'
+    await manager.publish(data, tick=0, encoded={"stats": marker})
+    await manager.publish(sections(2.0), tick=0)
+    await manager.drain()
+    
+    first = json.loads(full.sent[0])
+    assert first["stats"] == {"encoded": "once"}
+    # A filtered stats section is encoded from the data instead
+    assert json.loads(host_only.sent[0])["stats"]["cpu_percent"] == 1.0
+    # The Tamagotchi didn't change on the second tick
+    assert manager._sections.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_host_and_docker_topics_split_stats(managers):
+    """host and docker topics select the matching stats fields."""
+    manager = managers(default_interval=1)
+    websocket = make_websocket()
+    await manager.connect(websocket)
+    manager.subscribe(websocket, {"docker"}, interval=1)
+    
+    await manager.publish(sections(1.0), tick=0)
+    await manager.drain()
+    
+    message = json.loads(websocket.sent[0])
+    assert message["stats"] == {"timestamp": "t", "docker_containers_running": 3}
+
+
+@pytest.mark.asyncio
+async def test_subscribe_clamps_interval_and_regroups(managers):
+    """Intervals are clamped and empty groups removed."""
+    manager = managers()
+    websocket = make_websocket()
+    await manager.connect(websocket)
+    
+    assert manager.subscribe(websocket, {"host"}, interval=0.2) == (frozenset({"host"}), 1)
+    assert manager.subscribe(websocket, {"host"}, interval=3600) == (frozenset({"host"}), 60)
+    assert list(manager.groups) == [(frozenset({"host"}), 60)]
+    assert manager.subscribed_topics() == {"host"}
+    
+    manager.disconnect(websocket)
+    assert manager.groups == {}
+
+
+@pytest.mark.asyncio
+async def test_alerts_are_not_dropped_for_slow_clients(managers):
+    """Alerts queued behind a stalled send are delivered; only stats updates are dropped."""
+    manager = managers(queue_size=2, default_interval=1)
+    websocket = make_websocket(send_delay=0.05)
+    await manager.connect(websocket)
+    
+    await manager.publish(sections(1.0), tick=0)
+    await asyncio.sleep(0)  # Writer is stuck sending update 1
+    await manager.broadcast({"type": "alert", "alerts": [{"id": "cpu_percent.threshold", "state": "firing"}]})
+    for cpu in (2.0, 3.0, 4.0, 5.0):
+        await manager.publish(sections(cpu), tick=0)
+    await manager.drain()
+    
+    received = [json.loads(m) for m in websocket.sent]
+    assert [m["type"] for m in received] == ["stats_update", "alert", "stats_update", "stats_update"]
+    assert received[1]["alerts"][0]["state"] == "firing"
+    assert manager.active_connections[websocket].dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_client_too_far_behind_for_alerts_is_disconnected(managers, monkeypatch):
+    """Rather than losing an alert, a client whose event queue overflows is disconnected."""
+    monkeypatch.setattr("app.websocket.manager.WS_EVENT_QUEUE_SIZE", 2)
+    manager = managers()
+    websocket = make_websocket(send_delay=0.05)
+    await manager.connect(websocket)
+    
+    for i in range(4):
+        await manager.broadcast({"type": "alert", "alerts": [{"id": str(i)}]})
+    await manager.drain()
+    
+    assert websocket not in manager.active_connections
+    websocket.close.assert_called_once()
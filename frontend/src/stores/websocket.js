@@ -3,29 +3,53 @@ import { writable } from 'svelte/store'
 function createWebSocketStore() {
   const { subscribe, set, update } = writable({
     connected: false,
+    transport: null, // 'websocket', or 'sse' when falling back to /api/stream
     stats: null,
-    tamagotchi: null
+    tamagotchi: null,
+    nodes: null, // Hub only: latest metrics per agent, when subscribed to 'nodes'
+    alerts: [] // Alerts currently firing
   })
 
   let ws = null
+  let source = null // EventSource for /api/stream, used when WebSockets are blocked
   let reconnectTimeout = null
+  let lastSeq = null // Sequence number of the last stats update applied
+  let failedAttempts = 0 // WebSocket connections in a row that never opened
+  let subscription = null // Last { topics, interval } requested
   const RECONNECT_DELAY = 3000 // 3 seconds
+  // Switch to Server-Sent Events after this many WebSocket connections fail to open
+  // (proxies and corporate networks that break the WebSocket upgrade)
+  const SSE_FALLBACK_AFTER = 2
 
   function connect() {
+    if (source) {
+      connectStream()
+      return
+    }
+
     // Determine WebSocket URL
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
     const host = window.location.host
-    const wsUrl = `${protocol}//${host}/ws`
+    // Delta protocol: server sends only changed fields between keyframes
+    const wsUrl = `${protocol}//${host}/ws?protocol=delta`
 
     console.log('Connecting to WebSocket:', wsUrl)
 
     try {
       ws = new WebSocket(wsUrl)
+      let opened = false
 
       ws.onopen = () => {
         console.log('✓ WebSocket connected')
-        update(store => ({ ...store, connected: true }))
-        
+        opened = true
+        failedAttempts = 0
+        lastSeq = null
+        update(store => ({ ...store, connected: true, transport: 'websocket' }))
+        loadAlerts()
+        if (subscription) {
+          send({ type: 'subscribe', ...subscription })
+        }
+
         // Clear any pending reconnection
         if (reconnectTimeout) {
           clearTimeout(reconnectTimeout)
@@ -33,21 +57,7 @@ function createWebSocketStore() {
         }
       }
 
-      ws.onmessage = (event) => {
-        try {
-          const data = JSON.parse(event.data)
-          
-          if (data.type === 'stats_update') {
-            update(store => ({
-              ...store,
-              stats: data.stats,
-              tamagotchi: data.tamagotchi
-            }))
-          }
-        } catch (error) {
-          console.error('Error parsing WebSocket message:', error)
-        }
-      }
+      ws.onmessage = (event) => handleMessage(event.data)
 
       ws.onerror = (error) => {
         console.error('WebSocket error:', error)
@@ -55,50 +65,177 @@ function createWebSocketStore() {
 
       ws.onclose = () => {
         console.log('✗ WebSocket disconnected')
+        ws = null
         update(store => ({ ...store, connected: false }))
-        
-        // Attempt to reconnect
-        reconnectTimeout = setTimeout(() => {
-          console.log('Attempting to reconnect...')
-          connect()
-        }, RECONNECT_DELAY)
+
+        if (!opened && ++failedAttempts >= SSE_FALLBACK_AFTER && typeof EventSource !== 'undefined') {
+          console.log('WebSocket unavailable, falling back to Server-Sent Events')
+          connectStream()
+          return
+        }
+        scheduleReconnect()
       }
     } catch (error) {
       console.error('Failed to create WebSocket:', error)
-      
-      // Attempt to reconnect
-      reconnectTimeout = setTimeout(() => {
-        console.log('Attempting to reconnect...')
-        connect()
-      }, RECONNECT_DELAY)
+      scheduleReconnect()
+    }
+  }
+
+  function scheduleReconnect() {
+    // Attempt to reconnect
+    reconnectTimeout = setTimeout(() => {
+      console.log('Attempting to reconnect...')
+      connect()
+    }, RECONNECT_DELAY)
+  }
+
+  // Same messages as /ws, one event each. A new EventSource starts with a keyframe;
+  // its own reconnects send Last-Event-ID and resume where they left off
+  function connectStream() {
+    if (source) {
+      source.close()
+    }
+    const params = new URLSearchParams({ protocol: 'delta' })
+    if (subscription) {
+      params.set('topics', subscription.topics.join(','))
+      params.set('interval', subscription.interval)
+    }
+    lastSeq = null
+    source = new EventSource(`/api/stream?${params}`)
+
+    source.onopen = () => {
+      console.log('✓ Event stream connected')
+      update(store => ({ ...store, connected: true, transport: 'sse' }))
+      loadAlerts()
+    }
+
+    source.onmessage = (event) => handleMessage(event.data)
+
+    source.onerror = () => {
+      update(store => ({ ...store, connected: false }))
+      // EventSource reconnects by itself unless the server refused the stream
+      if (source && source.readyState === EventSource.CLOSED) {
+        reconnectTimeout = setTimeout(connectStream, RECONNECT_DELAY)
+      }
+    }
+  }
+
+  function handleMessage(raw) {
+    try {
+      const data = JSON.parse(raw)
+
+      if (data.type === 'stats_update') {
+        // Full keyframe
+        lastSeq = data.seq ?? null
+        update(store => ({
+          ...store,
+          stats: data.stats,
+          tamagotchi: data.tamagotchi,
+          nodes: data.nodes ?? store.nodes
+        }))
+      } else if (data.type === 'stats_delta') {
+        if (lastSeq === null || data.base !== lastSeq) {
+          // Missed an update - ask for a fresh keyframe
+          send({ type: 'resync' })
+          return
+        }
+        lastSeq = data.seq
+        const removed = data.removed ?? {}
+        update(store => ({
+          ...store,
+          stats: applyDelta(store.stats, data.stats, removed.stats),
+          tamagotchi: applyDelta(store.tamagotchi, data.tamagotchi, removed.tamagotchi),
+          // Changed nodes are sent whole; nodes that went away are listed in removed
+          nodes: applyDelta(store.nodes, data.nodes, removed.nodes)
+        }))
+      } else if (data.type === 'alert') {
+        // Only alerts that fired or resolved are sent
+        update(store => ({ ...store, alerts: applyAlerts(store.alerts, data.alerts) }))
+      }
+    } catch (error) {
+      console.error('Error parsing message:', error)
+    }
+  }
+
+  // Merge a delta into one section. removed is undefined (nothing removed),
+  // a list of fields that are gone, or null when the whole section is gone
+  function applyDelta(section, changed, removed) {
+    if (removed === null) {
+      return null
+    }
+    const next = changed ? { ...section, ...changed } : section
+    if (!removed) {
+      return next
+    }
+    const remaining = { ...next }
+    for (const key of removed) {
+      delete remaining[key]
+    }
+    return remaining
+  }
+
+  function applyAlerts(active, events) {
+    const changed = new Set(events.map(alert => alert.id))
+    return [
+      ...active.filter(alert => !changed.has(alert.id)),
+      ...events.filter(alert => alert.state === 'firing')
+    ]
+  }
+
+  // Alerts that fired before we connected
+  async function loadAlerts() {
+    try {
+      const response = await fetch('/api/alerts')
+      const { alerts } = await response.json()
+      update(store => ({ ...store, alerts }))
+    } catch (error) {
+      console.error('Failed to load alerts:', error)
     }
   }
 
   function disconnect() {
     if (ws) {
+      ws.onclose = null
       ws.close()
       ws = null
     }
+    if (source) {
+      source.close()
+      source = null
+    }
     if (reconnectTimeout) {
       clearTimeout(reconnectTimeout)
       reconnectTimeout = null
     }
+    update(store => ({ ...store, connected: false }))
   }
 
   function send(message) {
-    if (ws && ws.readyState === WebSocket.OPEN) {
+    if (source) {
+      // The event stream is one-way: resync and subscribe reopen it
+      if (message.type === 'resync' || message.type === 'subscribe') {
+        connectStream()
+      }
+    } else if (ws && ws.readyState === WebSocket.OPEN) {
       ws.send(JSON.stringify(message))
     } else {
       console.warn('WebSocket not connected')
     }
   }
 
+  // Choose metric groups (host, docker, tamagotchi, containers, nodes) and update interval in seconds
+  function subscribeTopics(topics, interval) {
+    subscription = { topics, interval }
+    send({ type: 'subscribe', topics, interval })
+  }
+
   // Auto-connect on store creation
   connect()
 
   return {
     subscribe,
     send,
+    subscribeTopics,
     disconnect,
     reconnect: connect
   }
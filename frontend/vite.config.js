@@ -1,8 +1,38 @@
+import { readdirSync, readFileSync, writeFileSync } from 'node:fs'
+import { join } from 'node:path'
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib'
 import { defineConfig } from 'vite'
 import { svelte } from '@sveltejs/vite-plugin-svelte'
 
+// Text formats worth compressing (same list the backend uses)
+const COMPRESSIBLE = /\.(html|js|mjs|css|svg|json|map|txt|xml|webmanifest|ico)$/
+
+// Write .gz and .br files next to every text file in dist/ at build time, so the
+// backend serves them from startup instead of compressing on the server
+function precompress() {
+  let outDir
+  return {
+    name: 'sysmon-precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = config.build.outDir
+    },
+    closeBundle() {
+      for (const entry of readdirSync(outDir, { recursive: true, withFileTypes: true })) {
+        if (!entry.isFile() || !COMPRESSIBLE.test(entry.name)) continue
+        const file = join(entry.parentPath ?? entry.path, entry.name)
+        const data = readFileSync(file)
+        writeFileSync(`${file}.gz`, gzipSync(data, { level: 9 }))
+        writeFileSync(`${file}.br`, brotliCompressSync(data, {
+          params: { [constants.BROTLI_PARAM_QUALITY]: 11, [constants.BROTLI_PARAM_SIZE_HINT]: data.length }
+        }))
+      }
+    }
+  }
+}
+
 export default defineConfig({
-  plugins: [svelte()],
+  plugins: [svelte(), precompress()],
   server: {
     port: 5173,
     proxy: {